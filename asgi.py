@@ -2,6 +2,8 @@
 ASGI config for Sat_Shine project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served by gunicorn with uvicorn workers so the long-lived notification stream
+(/auth/notifications/stream/) does not tie up a worker per connection.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -11,6 +13,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Sat_Shine.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Sat_Shine.settings_production')
 
 application = get_asgi_application()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, AuditLog
+from .models import CustomUser, AuditLog, BackgroundTask, BulkUploadBatch, GPSAnomaly
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -39,4 +39,26 @@ class AuditLogAdmin(admin.ModelAdmin):
         return False
     
     def has_change_permission(self, request, obj=None):
-        return False
\ No newline at end of file
+        return False
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['name', 'payload', 'attempts', 'created_at', 'started_at', 'finished_at', 'last_error']
+    ordering = ['-created_at']
+
+@admin.register(BulkUploadBatch)
+class BulkUploadBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'file_name', 'uploaded_by', 'status', 'total_rows', 'valid_rows', 'created_rows', 'created_at']
+    list_filter = ['status']
+    readonly_fields = ['uploaded_by', 'file_name', 'total_rows', 'valid_rows', 'error_rows', 'created_rows', 'last_error', 'created_at', 'completed_at']
+    ordering = ['-created_at']
+
+@admin.register(GPSAnomaly)
+class GPSAnomalyAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'kind', 'value', 'detected_at']
+    list_filter = ['kind']
+    search_fields = ['user__employee_id']
+    readonly_fields = ['attendance', 'user', 'date', 'kind', 'value', 'detail', 'detected_at']
+    ordering = ['-date']
@@ -2,6 +2,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q, Count, Case, When, IntegerField
 from django.db import transaction
@@ -9,14 +10,23 @@ from django.core.paginator import Paginator
 from datetime import datetime, timedelta, date, time
 from .models import CustomUser, Attendance, LeaveRequest, AuditLog, TravelRequest
 from .views import create_audit_log
+from .kpi_service import get_dashboard_kpis, invalidate_dashboard_kpis
+from .attendance_summary import summary_keys, refresh_summary, summary_totals
+from .attendance_grid import AttendanceGrid, build_date_range
+from .travel_resolver import TravelResolver
+from .leave_attendance import apply_leave
+from .associate_directory import get_associate_for
+from .attendance_geo import attendance_geojson, parse_bbox
+from .csv_export import iter_values, stream_csv
 import json
 import csv
 from io import StringIO
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_http_methods
+from django.views.decorators.gzip import gzip_page
 
 def check_pending_travel_requests(user, attendance_date):
-    """Check if user has pending travel requests for the given date"""
+    """Check if user has pending travel requests for the given date (use TravelResolver for batches)"""
     return TravelRequest.objects.filter(
         user=user,
         from_date__lte=attendance_date,
@@ -25,16 +35,8 @@ def check_pending_travel_requests(user, attendance_date):
     ).exists()
 
 def get_responsible_associate(user_dccb):
-    """Get the Associate responsible for a given DCCB"""
-    associates = CustomUser.objects.filter(
-        designation='Associate',
-        is_active=True
-    )
-    
-    for assoc in associates:
-        if assoc.multiple_dccb and user_dccb in assoc.multiple_dccb:
-            return assoc
-    return None
+    """Details (id, employee_id, first_name, last_name) of the Associate responsible for a DCCB, from the cached directory"""
+    return get_associate_for(user_dccb)
 
 def admin_required(view_func):
     """Decorator to ensure only admin users can access admin views"""
@@ -67,89 +69,27 @@ def admin_dashboard(request):
     storage.used = True
     
     today = timezone.localdate()
-    
-    # Total Employees KPI
-    total_employees = CustomUser.objects.filter(role='field_officer').count()
-    active_employees = CustomUser.objects.filter(role='field_officer', is_active=True).count()
-    
-    # Designation-wise count
-    designation_counts = CustomUser.objects.filter(role='field_officer').values('designation').annotate(
-        count=Count('id')
-    ).order_by('designation')
-    
-    # DCCB-wise count
-    dccb_counts = CustomUser.objects.filter(role='field_officer').exclude(dccb__isnull=True).values('dccb').annotate(
-        count=Count('id')
-    ).order_by('dccb')
-    
-    # Attendance KPIs for today - include DC confirmed records
-    attendance_kpis = Attendance.objects.filter(date=today).aggregate(
-        present=Count(Case(When(status='present', then=1), output_field=IntegerField())),
-        absent=Count(Case(When(Q(status='absent') | Q(is_confirmed_by_dc=True, status='auto_not_marked'), then=1), output_field=IntegerField())),
-        half_day=Count(Case(When(status='half_day', then=1), output_field=IntegerField()))
-    )
-    
-    # Calculate late arrivals (present after 9:30 AM)
-    late_cutoff = time(9, 30)
-    late_arrivals = Attendance.objects.filter(
-        date=today,
-        status='present',
-        check_in_time__gt=late_cutoff
-    ).count()
-    attendance_kpis['late_arrivals'] = late_arrivals
-    
-    # Calculate not marked
-    marked_today = Attendance.objects.filter(date=today).count()
-    not_marked = active_employees - marked_today
-    attendance_kpis['not_marked'] = not_marked
-    
-    # Approval Status KPIs
-    # DC Confirmation pending count - ONLY MT and Support need DC confirmation
-    dc_pending = Attendance.objects.filter(
-        user__designation__in=['MT', 'Support'],
-        date__lte=today,
-        is_confirmed_by_dc=False,
-        status__in=['present', 'half_day']
-    ).exclude(
-        user__designation__in=['Associate', 'DC']  # DEFENSIVE GUARD
-    ).count()
-    
-    # Admin Approval pending count - Associates, DCs (direct), and MT/Support (post-DC-confirmation)
-    admin_pending = Attendance.objects.filter(
-        date__lte=today,
-        is_approved_by_admin=False,
-        status__in=['present', 'half_day']
-    ).filter(
-        Q(user__designation__in=['Associate', 'DC']) |  # Associates and DCs go directly to admin
-        Q(user__designation__in=['MT', 'Support'], is_confirmed_by_dc=True)  # MT/Support after DC confirmation
-    ).count()
-    
-    # Travel Approval pending count
-    travel_pending = TravelRequest.objects.filter(status='pending').count()
-    
-    approval_status = {
-        'dc_pending': dc_pending,
-        'admin_pending': admin_pending,
-        'travel_pending': travel_pending
+    kpis = get_dashboard_kpis(today)
+    
+    attendance_kpis = {
+        'present': kpis['attendance']['present'],
+        'absent': kpis['attendance']['absent'],
+        'half_day': kpis['attendance']['half_day'],
+        'late_arrivals': kpis['attendance']['late_arrivals'],
+        'not_marked': kpis['attendance']['not_marked'],
     }
     
-    # Pending leave requests
-    pending_leaves = LeaveRequest.objects.filter(status='pending').count()
-    
     context = {
-        'total_employees': total_employees,
-        'active_employees': active_employees,
-        'designation_counts': designation_counts,
-        'dccb_counts': dccb_counts,
+        'total_employees': kpis['total_employees'],
+        'active_employees': kpis['active_employees'],
+        'designation_counts': kpis['designation_counts'],
+        'dccb_counts': kpis['dccb_counts'],
         'attendance_kpis': attendance_kpis,
-        'approval_status': approval_status,
-        'pending_leaves': pending_leaves,
+        'approval_status': kpis['approval_status'],
+        'pending_leaves': kpis['pending_leaves'],
         'today': today,
     }
     
-    # Debug print to verify approval_status data
-    print(f"DEBUG: approval_status = {approval_status}")
-    
     return render(request, 'authe/admin_dashboard.html', context)
 
 @login_required
@@ -393,102 +333,26 @@ def attendance_daily(request):
     if dccb_filter:
         employees = employees.filter(dccb=dccb_filter)
     
-    # Generate complete date range
-    date_range = []
-    current_date = from_date
-    
-    # Get holidays safely
-    try:
-        from .models import Holiday
-        holidays = Holiday.objects.filter(date__range=[from_date, to_date])
-        holiday_dates = {h.date: h for h in holidays}
-    except (ImportError, AttributeError):
-        # If Holiday model doesn't exist, continue without holidays
-        holiday_dates = {}
-    
-    # Generate all dates in range (including full month)
-    while current_date <= to_date:
-        is_sunday = current_date.weekday() == 6
-        is_holiday = current_date in holiday_dates or is_sunday
-        
-        date_range.append({
-            'date': current_date,
-            'is_sunday': is_sunday,
-            'is_holiday': is_holiday,
-            'holiday_name': holiday_dates.get(current_date, {}).get('name', 'Sunday') if is_holiday else None
-        })
-        current_date += timedelta(days=1)
-    
-    # Get attendance data
-    attendance_records = Attendance.objects.filter(
-        date__range=[from_date, to_date],
-        user__in=employees
-    ).select_related('user')
-    
-    # Organize attendance by employee and date
-    attendance_dict = {}
-    for record in attendance_records:
-        if record.user.employee_id not in attendance_dict:
-            attendance_dict[record.user.employee_id] = {}
-        
-        # Check if late (after 9:30 AM)
-        is_late = False
-        if record.check_in_time and record.check_in_time > time(9, 30):
-            is_late = True
-        
-        # Determine final status considering DC confirmation
-        final_status = record.status
-        if record.is_confirmed_by_dc and record.status == 'auto_not_marked':
-            final_status = 'absent'  # DC confirmed NM records become Absent
-        
-        attendance_dict[record.user.employee_id][record.date] = {
-            'status': final_status,
-            'is_late': is_late,
-            'check_in_time': record.check_in_time,
-            'is_dc_confirmed': record.is_confirmed_by_dc,
-            'is_admin_approved': record.is_approved_by_admin,
-            'is_leave_day': getattr(record, 'is_leave_day', False)
-        }
-    
-    # Prepare final data structure
-    attendance_data = []
-    for employee in employees:
-        employee_attendance = []
-        
-        for date_info in date_range:
-            date_obj = date_info['date']
-            attendance = attendance_dict.get(employee.employee_id, {}).get(date_obj, {})
-            
-            # Check if this employee has DC confirmed attendance for dates not in records
-            status = attendance.get('status', 'not_marked')
-            
-            # If no attendance record exists, check if DC has confirmed this employee's attendance
-            if status == 'not_marked':
-                # Check if there's a DC confirmed record that would make this absent
-                dc_confirmed_record = Attendance.objects.filter(
-                    user=employee,
-                    date=date_obj,
-                    is_confirmed_by_dc=True
-                ).first()
-                
-                if dc_confirmed_record:
-                    status = 'absent'  # DC confirmed NM becomes Absent
-            
-            employee_attendance.append({
-                'date': date_obj,
-                'status': status,
-                'is_late': attendance.get('is_late', False),
-                'is_sunday': date_info['is_sunday'],
-                'is_holiday': date_info['is_holiday'],
-                'is_dc_confirmed': attendance.get('is_dc_confirmed', False),
-                'is_admin_approved': attendance.get('is_admin_approved', False),
-                'is_leave_day': attendance.get('is_leave_day', False)
-            })
-        
-        attendance_data.append({
+    # Generate complete date range (including full month)
+    date_range = build_date_range(from_date, to_date)
+    
+    # Paginate employees, then load the page's attendance into a status grid with one query
+    paginator = Paginator(employees.order_by('employee_id'), 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_employees = list(page_obj)
+    page_query = request.GET.copy()
+    page_query.pop('page', None)
+    page_query = page_query.urlencode()
+    grid = AttendanceGrid.load([employee.id for employee in page_employees], from_date, to_date)
+    
+    # DC confirmed NM records display as Absent
+    attendance_data = [
+        {
             'employee': employee,
-            'attendance_list': employee_attendance
-        })
+            'attendance_list': grid.matrix_row(employee.id, date_range, resolve_confirmed=True)
+        }
+        for employee in page_employees
+    ]
     
     context = {
         'attendance_data': attendance_data,
@@ -501,6 +365,9 @@ def attendance_daily(request):
         'dccb_choices': CustomUser.DCCB_CHOICES,
         'current_month': from_date.strftime('%B %Y'),
         'total_days': len(date_range),
+        'page_obj': page_obj,
+        'page_query': page_query,
+        'total_employees': paginator.count,
     }
     
     return render(request, 'authe/admin_attendance_daily.html', context)
@@ -575,31 +442,9 @@ def decide_leave(request, leave_id):
             leave_request.admin_remarks = admin_remarks
             leave_request.save()
             
-            # If leave is approved, create attendance records for leave dates
+            # If leave is approved, mark attendance for leave dates in bulk
             if action == 'approve':
-                from datetime import timedelta
-                current_date = leave_request.start_date
-                
-                while current_date <= leave_request.end_date:
-                    # Create or update attendance record for each leave date
-                    attendance, created = Attendance.objects.get_or_create(
-                        user=leave_request.user,
-                        date=current_date,
-                        defaults={
-                            'status': 'absent',
-                            'remarks': f'On approved leave: {leave_request.leave_type}',
-                            'is_leave_day': True
-                        }
-                    )
-                    
-                    # If attendance already exists, update it to absent
-                    if not created:
-                        attendance.status = 'absent'
-                        attendance.remarks = f'On approved leave: {leave_request.leave_type}'
-                        attendance.is_leave_day = True
-                        attendance.save()
-                    
-                    current_date += timedelta(days=1)
+                apply_leave(leave_request)
             
             # Create audit log
             after_data = f"Status: {leave_request.status}"
@@ -611,8 +456,8 @@ def decide_leave(request, leave_id):
             )
             
             # Send notification to user
-            from .notification_service import notify_leave_approval
-            notify_leave_approval(leave_request, action == 'approve')
+            from .notification_service import queue_notification
+            queue_notification('notify_leave_approval', leave_request, action == 'approve')
         
         return JsonResponse({
             'success': True,
@@ -628,23 +473,21 @@ def compact_analytics(request):
     """Compact analytics dashboard with 4 charts in 2x2 grid"""
     today = timezone.localdate()
     
-    # Get attendance data for today
-    attendance_today = Attendance.objects.filter(date=today)
-    total_employees = CustomUser.objects.filter(role='field_officer', is_active=True).count()
+    kpis = get_dashboard_kpis(today)
+    total_employees = kpis['active_employees']
     
     # 1. Attendance Status Distribution - include DC confirmed
-    status_counts = attendance_today.aggregate(
-        present=Count(Case(When(status='present', then=1), output_field=IntegerField())),
-        absent=Count(Case(When(Q(status='absent') | Q(is_confirmed_by_dc=True, status='auto_not_marked'), then=1), output_field=IntegerField())),
-        half_day=Count(Case(When(status='half_day', then=1), output_field=IntegerField()))
-    )
+    status_counts = {
+        'present': kpis['attendance']['present'],
+        'absent': kpis['attendance']['absent'],
+        'half_day': kpis['attendance']['half_day'],
+    }
     not_marked = total_employees - sum(status_counts.values())
     attendance_percentage = round((status_counts['present'] + status_counts['half_day'] * 0.5) / total_employees * 100, 1) if total_employees > 0 else 0
     
     # 2. Late Arrival Distribution
-    late_cutoff = time(9, 30)
-    on_time = attendance_today.filter(status__in=['present', 'half_day'], check_in_time__lte=late_cutoff).count()
-    late = attendance_today.filter(status__in=['present', 'half_day'], check_in_time__gt=late_cutoff).count()
+    on_time = kpis['attendance']['on_time']
+    late = kpis['attendance']['late']
     
     # 3. DCCB Attendance Comparison (top 6 DCCBs) - include DC confirmed
     dccb_stats = []
@@ -662,15 +505,20 @@ def compact_analytics(request):
             'total': dccb['total']
         })
     
-    # 4. Attendance Trend (last 7 days)
+    # 4. Attendance Trend (last 7 days) - one grouped read of the daily summary table
+    daily = {
+        row['date']: row
+        for row in summary_totals(today - timedelta(days=6), today, group_by=('date',))
+    }
+    day_total = total_employees
+    
     trend_data = []
     for i in range(6, -1, -1):
         date = today - timedelta(days=i)
-        day_attendance = Attendance.objects.filter(date=date)
-        day_total = CustomUser.objects.filter(role='field_officer', is_active=True).count()
+        day = daily.get(date, {})
         
-        present_count = day_attendance.filter(status__in=['present', 'half_day']).count()
-        absent_count = day_attendance.filter(status='absent').count()
+        present_count = (day.get('present') or 0) + (day.get('half_day') or 0)
+        absent_count = day.get('absent') or 0
         
         present_pct = round(present_count / day_total * 100, 1) if day_total > 0 else 0
         absent_pct = round(absent_count / day_total * 100, 1) if day_total > 0 else 0
@@ -719,84 +567,61 @@ def attendance_geo(request):
 
 @login_required
 @admin_required
+@gzip_page
 def attendance_geo_data(request):
-    """API endpoint for map loading - simplified version"""
-    date_str = request.GET.get('date', timezone.localdate().isoformat())
+    """
+    Compact GeoJSON for the attendance map.
+    Accepts date or from_date/to_date (up to GEO_MAX_RANGE_DAYS), status, bbox (min_lng,min_lat,max_lng,max_lat)
+    and zoom - low zooms return grid clusters, high zooms individual points.
+    """
+    today = timezone.localdate()
+    date_str = request.GET.get('date', today.isoformat())
     status_filter = request.GET.get('status', '')
     
     try:
         selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
     except ValueError:
-        selected_date = timezone.localdate()
+        selected_date = today
     
     try:
-        # Get all attendance records with GPS data
-        attendance_query = Attendance.objects.filter(
-            latitude__isnull=False,
-            longitude__isnull=False
-        ).select_related('user')
-        
-        # Apply date filter
-        if date_str:
-            attendance_query = attendance_query.filter(date=selected_date)
-        
-        # Apply status filter
-        if status_filter:
-            attendance_query = attendance_query.filter(status=status_filter)
-        
-        # If no records for selected date, show recent GPS data
-        if not attendance_query.exists():
-            attendance_query = Attendance.objects.filter(
-                latitude__isnull=False,
-                longitude__isnull=False
-            ).select_related('user').order_by('-date')[:20]
-        
-        # Build response data
-        geo_data = []
-        for record in attendance_query:
-            try:
-                lat = float(record.latitude)
-                lng = float(record.longitude)
-                
-                # Calculate timing status
-                timing_status = 'Not Marked'
-                if record.check_in_time:
-                    if record.check_in_time <= time(9, 30):
-                        timing_status = 'On Time'
-                    else:
-                        timing_status = 'Late Arrival'
-                
-                geo_data.append({
-                    'employee_id': record.user.employee_id,
-                    'name': f"{record.user.first_name} {record.user.last_name}",
-                    'designation': record.user.designation,
-                    'dccb': record.user.dccb or 'Not Assigned',
-                    'status': record.status,
-                    'date': record.date.isoformat(),
-                    'lat': lat,
-                    'lng': lng,
-                    'timing_status': timing_status,
-                    'check_in_time': record.check_in_time.strftime('%H:%M') if record.check_in_time else 'Not Marked',
-                    'location_address': record.location_address or f'GPS: {lat:.6f}, {lng:.6f}',
-                    'location_accuracy': int(record.location_accuracy) if record.location_accuracy else 0
-                })
-            except (ValueError, TypeError) as e:
-                continue
-        
+        from_date = datetime.strptime(request.GET['from_date'], '%Y-%m-%d').date()
+        to_date = datetime.strptime(request.GET.get('to_date', request.GET['from_date']), '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        from_date = to_date = selected_date
+    
+    max_days = getattr(settings, 'GEO_MAX_RANGE_DAYS', 31)
+    if from_date > to_date or (to_date - from_date).days >= max_days:
+        return JsonResponse({
+            'success': False,
+            'error': f'Date range must be 1 to {max_days} days'
+        }, status=400)
+    
+    try:
+        zoom = int(request.GET['zoom'])
+    except (KeyError, ValueError):
+        zoom = None
+    
+    try:
+        payload = attendance_geojson(
+            from_date, to_date,
+            status=status_filter or None,
+            bbox=parse_bbox(request.GET.get('bbox')),
+            zoom=zoom
+        )
         return JsonResponse({
             'success': True,
-            'count': len(geo_data),
-            'selected_date': selected_date.isoformat(),
-            'message': f'Found {len(geo_data)} GPS attendance records',
-            'data': geo_data
-        })
+            'from_date': from_date.isoformat(),
+            'to_date': to_date.isoformat(),
+            **payload
+        }, json_dumps_params={'separators': (',', ':')})
         
     except Exception as e:
         return JsonResponse({
             'success': False,
             'error': str(e),
-            'selected_date': selected_date.isoformat(),
-            'data': []
+            'from_date': from_date.isoformat(),
+            'to_date': to_date.isoformat(),
+            'features': []
         })
 
 @login_required
@@ -804,7 +629,6 @@ def attendance_geo_data(request):
 def attendance_detailed(request):
     """Detailed attendance view with scrollable table"""
     from datetime import datetime, timedelta
-    from .models import Holiday
     
     # Get date range (default: current month)
     today = timezone.localdate()
@@ -830,67 +654,24 @@ def attendance_detailed(request):
         employees = employees.filter(designation=designation_filter)
     
     # Generate date range
-    date_range = []
-    current_date = from_date
-    holidays = Holiday.objects.filter(date__range=[from_date, to_date])
-    holiday_dates = {h.date: h for h in holidays}
-    
-    while current_date <= to_date:
-        is_sunday = current_date.weekday() == 6
-        is_holiday = current_date in holiday_dates or is_sunday
-        
-        date_range.append({
-            'date': current_date,
-            'is_sunday': is_sunday,
-            'is_holiday': is_holiday,
-            'holiday_name': holiday_dates.get(current_date, {}).get('name', 'Sunday') if is_holiday else None
-        })
-        current_date += timedelta(days=1)
-    
-    # Get attendance data
-    attendance_records = Attendance.objects.filter(
-        date__range=[from_date, to_date],
-        user__in=employees
-    ).select_related('user')
-    
-    # Organize attendance by employee and date
-    attendance_dict = {}
-    for record in attendance_records:
-        if record.user.employee_id not in attendance_dict:
-            attendance_dict[record.user.employee_id] = {}
-        
-        # Check if late (after 9:30 AM)
-        is_late = False
-        if record.check_in_time and record.check_in_time > time(9, 30):
-            is_late = True
-        
-        attendance_dict[record.user.employee_id][record.date] = {
-            'status': record.status,
-            'is_late': is_late,
-            'check_in_time': record.check_in_time
-        }
-    
-    # Prepare final data structure
-    attendance_data = []
-    for employee in employees:
-        employee_attendance = []
-        
-        for date_info in date_range:
-            date_obj = date_info['date']
-            attendance = attendance_dict.get(employee.employee_id, {}).get(date_obj, {})
-            
-            employee_attendance.append({
-                'date': date_obj,
-                'status': attendance.get('status', 'not_marked'),
-                'is_late': attendance.get('is_late', False),
-                'is_sunday': date_info['is_sunday'],
-                'is_holiday': date_info['is_holiday']
-            })
-        
-        attendance_data.append({
+    date_range = build_date_range(from_date, to_date)
+    
+    # Paginate employees and load the page into a status grid with one query
+    paginator = Paginator(employees.order_by('employee_id'), 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_employees = list(page_obj)
+    page_query = request.GET.copy()
+    page_query.pop('page', None)
+    page_query = page_query.urlencode()
+    grid = AttendanceGrid.load([employee.id for employee in page_employees], from_date, to_date)
+    
+    attendance_data = [
+        {
             'employee': employee,
-            'attendance_list': employee_attendance
-        })
+            'attendance_list': grid.matrix_row(employee.id, date_range)
+        }
+        for employee in page_employees
+    ]
     
     context = {
         'attendance_data': attendance_data,
@@ -901,6 +682,9 @@ def attendance_detailed(request):
         'designation_filter': designation_filter,
         'dccb_choices': CustomUser.DCCB_CHOICES,
         'designation_choices': CustomUser.DESIGNATION_CHOICES,
+        'page_obj': page_obj,
+        'page_query': page_query,
+        'total_employees': paginator.count,
     }
     
     return render(request, 'authe/admin_attendance_detailed.html', context)
@@ -913,7 +697,6 @@ def export_attendance_detailed(request):
     
     # Get same data as detailed view
     from datetime import datetime, timedelta
-    from .models import Holiday
     
     today = timezone.localdate()
     from_date_str = request.GET.get('from_date', today.replace(day=1).isoformat())
@@ -935,36 +718,10 @@ def export_attendance_detailed(request):
     if designation_filter:
         employees = employees.filter(designation=designation_filter)
     
-    # Generate date range
-    date_range = []
-    current_date = from_date
-    holidays = Holiday.objects.filter(date__range=[from_date, to_date])
-    holiday_dates = {h.date for h in holidays}
-    
-    while current_date <= to_date:
-        is_holiday = current_date in holiday_dates or current_date.weekday() == 6
-        date_range.append({
-            'date': current_date,
-            'is_holiday': is_holiday
-        })
-        current_date += timedelta(days=1)
-    
-    # Get attendance data
-    attendance_records = Attendance.objects.filter(
-        date__range=[from_date, to_date],
-        user__in=employees
-    ).select_related('user')
-    
-    attendance_dict = {}
-    for record in attendance_records:
-        if record.user.employee_id not in attendance_dict:
-            attendance_dict[record.user.employee_id] = {}
-        
-        status_code = 'P' if record.status == 'present' else 'A' if record.status == 'absent' else 'H' if record.status == 'half_day' else 'NM'
-        if record.check_in_time and record.check_in_time > time(9, 30) and record.status in ['present', 'half_day']:
-            status_code += '*'  # Late indicator
-        
-        attendance_dict[record.user.employee_id][record.date] = status_code
+    # Generate date range and load every employee's attendance into a status grid
+    date_range = build_date_range(from_date, to_date)
+    employee_rows = list(employees.order_by('employee_id').values_list('id', 'employee_id', 'dccb', 'designation'))
+    grid = AttendanceGrid.load([row[0] for row in employee_rows], from_date, to_date, users=employees)
     
     if format_type == 'csv':
         response = HttpResponse(content_type='text/csv')
@@ -982,81 +739,13 @@ def export_attendance_detailed(request):
         writer.writerow(header)
         
         # Data rows
-        for employee in employees:
-            row = [employee.employee_id, employee.dccb or '', employee.designation]
-            for date_info in date_range:
-                if date_info['is_holiday']:
-                    row.append('HOL')
-                else:
-                    row.append(attendance_dict.get(employee.employee_id, {}).get(date_info['date'], 'NM'))
-            writer.writerow(row)
+        for user_id, employee_id, dccb, designation in employee_rows:
+            writer.writerow([employee_id, dccb or '', designation] + grid.export_row(user_id, date_range))
         
         return response
     
     return JsonResponse({'error': 'Invalid format'}, status=400)
 
-@login_required
-@admin_required
-def export_employees(request):
-    """Export employee list"""
-    format_type = request.GET.get('format', 'csv')
-    
-    # Apply same filters as employee list
-    employees = CustomUser.objects.filter(role='field_officer').select_related()
-    
-    search = request.GET.get('search', '')
-    if search:
-        employees = employees.filter(
-            Q(employee_id__icontains=search) |
-            Q(first_name__icontains=search) |
-            Q(last_name__icontains=search)
-        )
-    
-    dccb_filter = request.GET.get('dccb', '')
-    if dccb_filter:
-        employees = employees.filter(dccb=dccb_filter)
-    
-    designation_filter = request.GET.get('designation', '')
-    if designation_filter:
-        employees = employees.filter(designation=designation_filter)
-    
-    if status_filter == 'active':
-        employees = employees.filter(is_active=True)
-    elif status_filter == 'inactive':
-        employees = employees.filter(is_active=False)
-    
-    if format_type == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="employees_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        
-        writer = csv.writer(response)
-        
-        # Header with metadata
-        writer.writerow([f'Employee Master List - Generated: {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}'])
-        writer.writerow([f'Total Records: {employees.count()}'])
-        writer.writerow([])  # Empty row
-        
-        # Column headers
-        writer.writerow([
-            'Employee ID', 'Full Name', 'Designation', 'Contact Number', 
-            'DCCB', 'Reporting Manager', 'Registration Date', 'Status'
-        ])
-        
-        # Data rows
-        for emp in employees:
-            writer.writerow([
-                emp.employee_id,
-                f'{emp.first_name} {emp.last_name}',
-                emp.designation,
-                emp.contact_number,
-                emp.dccb or '',
-                emp.reporting_manager or '',
-                emp.date_joined.strftime('%Y-%m-%d %H:%M:%S'),
-                'Active' if emp.is_active else 'Inactive'
-            ])
-        
-        return response
-    
 @login_required
 @admin_required
 def employee_detail(request, employee_id):
@@ -1113,7 +802,7 @@ def export_employees(request):
     """Export employee list"""
     format_type = request.GET.get('format', 'csv')
     
-    employees = CustomUser.objects.filter(role='field_officer').select_related()
+    employees = CustomUser.objects.filter(role='field_officer')
     
     search = request.GET.get('search', '')
     if search:
@@ -1138,25 +827,25 @@ def export_employees(request):
         employees = employees.filter(is_active=False)
     
     if format_type == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="employees_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Employee ID', 'Full Name', 'Designation', 'Contact Number', 'DCCB', 'Reporting Manager', 'Registration Date', 'Status'])
-        
-        for emp in employees:
-            writer.writerow([
-                emp.employee_id,
-                f'{emp.first_name} {emp.last_name}',
-                emp.designation,
-                emp.contact_number,
-                emp.dccb or '',
-                emp.reporting_manager or '',
-                emp.date_joined.strftime('%Y-%m-%d'),
-                'Active' if emp.is_active else 'Inactive'
-            ])
-        
-        return response
+        header = ['Employee ID', 'Full Name', 'Designation', 'Contact Number', 'DCCB', 'Reporting Manager', 'Registration Date', 'Status']
+        
+        def rows():
+            for emp in iter_values(
+                employees, 'employee_id', 'first_name', 'last_name', 'designation', 'contact_number',
+                'dccb', 'reporting_manager', 'date_joined', 'is_active'
+            ):
+                yield [
+                    emp['employee_id'],
+                    f"{emp['first_name']} {emp['last_name']}",
+                    emp['designation'],
+                    emp['contact_number'],
+                    emp['dccb'] or '',
+                    emp['reporting_manager'] or '',
+                    emp['date_joined'].strftime('%Y-%m-%d'),
+                    'Active' if emp['is_active'] else 'Inactive'
+                ]
+        
+        return stream_csv(f'employees_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv', header, rows())
     
     return JsonResponse({'error': 'Invalid format'}, status=400)
 
@@ -1282,10 +971,16 @@ def export_dccb_summary(request, format_type, from_date, to_date, dccb_filter):
     """Export DCCB-wise attendance summary"""
     from django.db.models import Count, Q
     
-    # Get DCCB-wise summary
+    # Get DCCB-wise summary - roster and summary counters in two grouped queries
     dccb_query = CustomUser.objects.filter(role='field_officer', is_active=True)
     if dccb_filter:
         dccb_query = dccb_query.filter(dccb=dccb_filter)
+    roster = dict(dccb_query.order_by().values('dccb').annotate(total=Count('id')).values_list('dccb', 'total'))
+    counters = {
+        row['dccb']: row
+        for row in summary_totals(from_date, to_date, dccb=dccb_filter, group_by=('dccb',))
+    }
+    days_in_range = (to_date - from_date).days + 1
     
     dccb_summary = []
     total_present = total_absent = total_half_day = total_not_marked = total_employees = 0
@@ -1297,27 +992,18 @@ def export_dccb_summary(request, format_type, from_date, to_date, dccb_filter):
         if dccb_filter and dccb_filter != dccb_code:
             continue
             
-        employees = dccb_query.filter(dccb=dccb_code)
-        emp_count = employees.count()
+        emp_count = roster.get(dccb_code, 0)
         
         if emp_count == 0:
             continue
             
-        # Calculate attendance stats for date range
-        present = Attendance.objects.filter(
-            user__in=employees, date__range=[from_date, to_date], status='present'
-        ).count()
-        
-        absent = Attendance.objects.filter(
-            user__in=employees, date__range=[from_date, to_date], status='absent'
-        ).count()
-        
-        half_day = Attendance.objects.filter(
-            user__in=employees, date__range=[from_date, to_date], status='half_day'
-        ).count()
+        # Attendance stats for date range
+        row = counters.get(dccb_code, {})
+        present = row.get('present') or 0
+        absent = row.get('absent') or 0
+        half_day = row.get('half_day') or 0
         
         # Calculate not marked (total possible days - marked days)
-        days_in_range = (to_date - from_date).days + 1
         total_possible = emp_count * days_in_range
         marked = present + absent + half_day
         not_marked = total_possible - marked
@@ -1416,55 +1102,20 @@ def export_standard_attendance(request, format_type, from_date, to_date, dccb_fi
         if dccb_filter:
             employees = employees.filter(dccb=dccb_filter)
         
-        date_range = []
-        current_date = from_date
-        
-        # Get holidays safely
-        try:
-            from .models import Holiday
-            holidays = Holiday.objects.filter(date__range=[from_date, to_date])
-            holiday_dates = {h.date for h in holidays}
-        except:
-            holiday_dates = set()
-        
-        while current_date <= to_date:
-            is_holiday = current_date in holiday_dates or current_date.weekday() == 6
-            date_range.append({'date': current_date, 'is_holiday': is_holiday})
-            current_date += timedelta(days=1)
-        
-        attendance_records = Attendance.objects.filter(date__range=[from_date, to_date], user__in=employees).select_related('user')
-        
-        attendance_dict = {}
-        for record in attendance_records:
-            if record.user.employee_id not in attendance_dict:
-                attendance_dict[record.user.employee_id] = {}
-            
-            status_code = 'P' if record.status == 'present' else 'A' if record.status == 'absent' else 'H' if record.status == 'half_day' else 'NM'
-            if record.check_in_time and record.check_in_time > time(9, 30) and record.status in ['present', 'half_day']:
-                status_code += '*'  # Late indicator
-            
-            attendance_dict[record.user.employee_id][record.date] = status_code
+        date_range = build_date_range(from_date, to_date)
+        employee_rows = list(employees.order_by('employee_id').values_list('id', 'employee_id', 'dccb', 'designation'))
+        grid = AttendanceGrid.load([row[0] for row in employee_rows], from_date, to_date, users=employees)
         
         if format_type == 'csv':
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="daily_attendance_{from_date}_{to_date}.csv"'
-            
-            writer = csv.writer(response)
             header = ['Employee ID', 'DCCB', 'Designation']
             for date_info in date_range:
                 header.append(date_info['date'].strftime('%d-%b'))
-            writer.writerow(header)
             
-            for employee in employees:
-                row = [employee.employee_id, employee.dccb or '', employee.designation]
-                for date_info in date_range:
-                    if date_info['is_holiday']:
-                        row.append('HOL')
-                    else:
-                        row.append(attendance_dict.get(employee.employee_id, {}).get(date_info['date'], 'NM'))
-                writer.writerow(row)
-            
-            return response
+            rows = (
+                [employee_id, dccb or '', designation] + grid.export_row(user_id, date_range)
+                for user_id, employee_id, dccb, designation in employee_rows
+            )
+            return stream_csv(f'daily_attendance_{from_date}_{to_date}.csv', header, rows)
         
         return JsonResponse({'error': 'Invalid format'}, status=400)
         
@@ -1542,43 +1193,17 @@ def approval_status(request):
     """Main approval status dashboard"""
     import logging
     logger = logging.getLogger(__name__)
-    logger.error("🚨 APPROVAL STATUS VIEW v2026-01-28-DEBUG")
+    logger.debug("APPROVAL STATUS VIEW v2026-01-28-DEBUG")
     
     today = timezone.localdate()
     
-    # Calculate approval status counts
-    # DC Confirmation - ONLY MT and Support need DC confirmation
-    dc_pending = Attendance.objects.filter(
-        user__designation__in=['MT', 'Support'],
-        date__lte=today,
-        is_confirmed_by_dc=False,
-        status__in=['present', 'half_day']
-    ).exclude(
-        user__designation__in=['Associate', 'DC']  # DEFENSIVE GUARD
-    ).count()
-    
-    # DEBUG: Log breakdown
-    logger.error(f"APPROVAL STATUS DEBUG → dc_pending={dc_pending}")
-    
-    # Admin Approval - Associates, DCs (direct), and MT/Support (post-DC-confirmation)
-    admin_pending = Attendance.objects.filter(
-        date__lte=today,
-        is_approved_by_admin=False,
-        status__in=['present', 'half_day']
-    ).filter(
-        Q(user__designation__in=['Associate', 'DC']) |
-        Q(user__designation__in=['MT', 'Support'], is_confirmed_by_dc=True)
-    ).count()
-    
-    logger.error(f"APPROVAL STATUS DEBUG → admin_pending={admin_pending}")
-    
-    from .models import TravelRequest
-    travel_pending = TravelRequest.objects.filter(status='pending').count()
+    # Approval counters come from the shared (cached) KPI service
+    approval_counts = get_dashboard_kpis(today)['approval_status']
     
     context = {
-        'dc_pending': dc_pending,
-        'admin_pending': admin_pending,
-        'travel_pending': travel_pending,
+        'dc_pending': approval_counts['dc_pending'],
+        'admin_pending': approval_counts['admin_pending'],
+        'travel_pending': approval_counts['travel_pending'],
         'today': today
     }
     
@@ -1633,10 +1258,11 @@ def dc_confirmation(request):
     if employee_id_filter:
         attendance_query = attendance_query.filter(user__employee_id__icontains=employee_id_filter)
     
-    # Check for travel request restrictions
+    # Check for travel request restrictions - one travel query for every listed record
     blocked_records = []
-    for attendance in attendance_query:
-        if check_pending_travel_requests(attendance.user, attendance.date):
+    resolver = TravelResolver(attendance_query)
+    for attendance in resolver:
+        if resolver.travel_for(attendance, 'pending'):
             blocked_records.append({
                 'attendance': attendance,
                 'reason': 'Pending travel request approval required'
@@ -1664,7 +1290,6 @@ def dc_confirmation(request):
 def admin_approval(request):
     """Admin approval screen with travel request validation"""
     from datetime import datetime, timedelta
-    from .travel_approval_validator import validate_dc_attendance_for_admin_approval
     
     if request.GET.get('format') == 'csv':
         return export_admin_approval_records(request)
@@ -1717,17 +1342,16 @@ def admin_approval(request):
     if designation_filter:
         attendance_records = attendance_records.filter(user__designation=designation_filter)
     
-    # Add travel remark for DC users
-    attendance_list = []
-    for attendance in attendance_records:
-        _, _, remark = validate_dc_attendance_for_admin_approval(attendance)
-        attendance.travel_remark = remark
-        attendance_list.append(attendance)
-    
-    paginator = Paginator(attendance_list, 50)
+    paginator = Paginator(attendance_records, 50)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    # Add travel remark for DC users - only the displayed page is resolved
+    resolver = TravelResolver(page_obj.object_list)
+    for attendance in resolver:
+        _, _, attendance.travel_remark = resolver.admin_approval(attendance)
+    page_obj.object_list = resolver.records
+    
     context = {
         'page_obj': page_obj,
         'from_date': from_date,
@@ -1816,56 +1440,56 @@ def export_todays_attendance(request):
     
     try:
         # Get all today's attendance records
-        attendance_records = Attendance.objects.filter(date=today).select_related('user').order_by('check_in_time', 'user__employee_id')
+        attendance_records = Attendance.objects.filter(date=today).order_by('check_in_time', 'user__employee_id')
+        status_labels = dict(Attendance.STATUS_CHOICES)
         
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="todays_attendance_{today.strftime("%Y%m%d")}.csv"'
-        
-        writer = csv.writer(response)
-        
-        # Write header
-        writer.writerow([
+        header = [
             'Employee ID', 'Employee Name', 'DCCB', 'Designation', 'Check-In Time', 
             'Check-Out Time', 'Attendance Status', 'Time Status', 'Travel Status', 
             'Travel Approved', 'Task', 'Work Place', 'Location', 'DC Confirmation', 
             'Approval Status', 'Remarks'
-        ])
-        
-        # Write data rows
-        for attendance in attendance_records:
-            try:
-                # Determine time status
-                time_status = 'Not Marked'
-                if attendance.check_in_time:
-                    time_status = 'On Time' if attendance.check_in_time <= time(9, 30) else 'Late'
-                
-                # Location info
-                location = ''
-                if attendance.latitude and attendance.longitude:
-                    location = f"{attendance.latitude:.6f}, {attendance.longitude:.6f}"
-                
-                writer.writerow([
-                    attendance.user.employee_id,
-                    f"{attendance.user.first_name} {attendance.user.last_name}",
-                    attendance.user.dccb or 'Not Assigned',
-                    attendance.user.designation,
-                    attendance.check_in_time.strftime('%H:%M') if attendance.check_in_time else 'NM',
-                    attendance.check_out_time.strftime('%H:%M') if attendance.check_out_time else 'NM',
-                    attendance.get_status_display(),
-                    time_status,
-                    'Yes' if attendance.travel_required else 'No',
-                    'Yes' if attendance.travel_approved else 'No',
-                    attendance.task or 'NM',
-                    attendance.workplace or 'NM',
-                    location or 'NM',
-                    'Done' if attendance.is_confirmed_by_dc else 'Pending',
-                    'Approved' if attendance.is_approved_by_admin else 'Pending',
-                    attendance.remarks or 'NM'
-                ])
-            except Exception as e:
-                writer.writerow([f'Error processing record {attendance.id}: {str(e)}', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''])
+        ]
         
-        return response
+        def rows():
+            for attendance in iter_values(
+                attendance_records, 'id', 'user__employee_id', 'user__first_name', 'user__last_name',
+                'user__dccb', 'user__designation', 'check_in_time', 'check_out_time', 'status',
+                'travel_required', 'travel_approved', 'task', 'workplace', 'latitude', 'longitude',
+                'is_confirmed_by_dc', 'is_approved_by_admin', 'remarks'
+            ):
+                try:
+                    # Determine time status
+                    time_status = 'Not Marked'
+                    if attendance['check_in_time']:
+                        time_status = 'On Time' if attendance['check_in_time'] <= time(9, 30) else 'Late'
+                    
+                    # Location info
+                    location = ''
+                    if attendance['latitude'] and attendance['longitude']:
+                        location = f"{attendance['latitude']:.6f}, {attendance['longitude']:.6f}"
+                    
+                    yield [
+                        attendance['user__employee_id'],
+                        f"{attendance['user__first_name']} {attendance['user__last_name']}",
+                        attendance['user__dccb'] or 'Not Assigned',
+                        attendance['user__designation'],
+                        attendance['check_in_time'].strftime('%H:%M') if attendance['check_in_time'] else 'NM',
+                        attendance['check_out_time'].strftime('%H:%M') if attendance['check_out_time'] else 'NM',
+                        status_labels.get(attendance['status'], attendance['status']),
+                        time_status,
+                        'Yes' if attendance['travel_required'] else 'No',
+                        'Yes' if attendance['travel_approved'] else 'No',
+                        attendance['task'] or 'NM',
+                        attendance['workplace'] or 'NM',
+                        location or 'NM',
+                        'Done' if attendance['is_confirmed_by_dc'] else 'Pending',
+                        'Approved' if attendance['is_approved_by_admin'] else 'Pending',
+                        attendance['remarks'] or 'NM'
+                    ]
+                except Exception as e:
+                    yield [f"Error processing record {attendance['id']}: {str(e)}", '', '', '', '', '', '', '', '', '', '', '', '', '', '', '']
+        
+        return stream_csv(f'todays_attendance_{today.strftime("%Y%m%d")}.csv', header, rows())
         
     except Exception as e:
         # Return error as CSV
@@ -2107,8 +1731,6 @@ def travel_approval(request):
 def bulk_approve_attendance(request):
     """Bulk approve attendance records with travel request validation"""
     try:
-        from .travel_approval_validator import validate_dc_attendance_for_admin_approval
-        
         data = json.loads(request.body)
         attendance_ids = data.get('attendance_ids', [])
         
@@ -2127,9 +1749,10 @@ def bulk_approve_attendance(request):
             blocked_records = []
             approved_records = []
             
-            for attendance in attendance_records:
+            resolver = TravelResolver(attendance_records)
+            for attendance in resolver:
                 # Validate DC attendance for pending travel
-                can_approve, error_msg, _ = validate_dc_attendance_for_admin_approval(attendance)
+                can_approve, error_msg, _ = resolver.admin_approval(attendance)
                 
                 if not can_approve:
                     blocked_records.append({
@@ -2143,21 +1766,29 @@ def bulk_approve_attendance(request):
             
             if approved_records:
                 approved_ids = [att.id for att in approved_records]
+                touched_keys = summary_keys(Attendance.objects.filter(id__in=approved_ids))
                 updated_count = Attendance.objects.filter(id__in=approved_ids).update(
                     is_approved_by_admin=True,
                     approved_by_admin=request.user,
                     admin_approved_at=timezone.now()
                 )
                 
-                from .notification_service import notify_admin_approval_to_user
-                for attendance in approved_records:
-                    notify_admin_approval_to_user(attendance.user, request.user)
+                from .notification_service import queue_notification
+                queue_notification(
+                    'notify_admin_approval_to_users',
+                    [attendance.user_id for attendance in approved_records],
+                    request.user
+                )
                 
                 Attendance.objects.filter(
                     id__in=approved_ids,
                     status='auto_not_marked',
                     is_approved_by_admin=True
                 ).update(status='absent')
+                
+                # .update() bypasses post_save, so refresh summaries and cached counters explicitly
+                refresh_summary(touched_keys)
+                invalidate_dashboard_kpis()
             else:
                 updated_count = 0
             
@@ -2182,6 +1813,45 @@ def bulk_approve_attendance(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
+# Travel export columns - shared by export_travel_requests and export_travel_requests_enhanced
+TRAVEL_EXPORT_HEADER = [
+    'Employee ID', 'Name', 'DCCB', 'From Date', 'To Date', 'Duration', 'Days', 'ER ID',
+    'Distance (KM)', 'Address', 'Contact Person', 'Purpose', 'Status', 'Approved By',
+    'Remarks', 'Created At'
+]
+
+def travel_export_rows(travel_requests):
+    """Stream travel request CSV rows from a values() projection"""
+    duration_labels = dict(TravelRequest.DURATION_CHOICES)
+    for tr in iter_values(
+        travel_requests, 'user__employee_id', 'user__first_name', 'user__last_name', 'user__dccb',
+        'from_date', 'to_date', 'duration', 'days_count', 'er_id', 'distance_km', 'address',
+        'contact_person', 'purpose', 'status', 'approved_by__employee_id', 'approved_by__first_name',
+        'approved_by__last_name', 'remarks', 'created_at'
+    ):
+        approved_by_text = 'N/A'
+        if tr['approved_by__employee_id']:
+            approved_by_text = f"{tr['approved_by__employee_id']} - {tr['approved_by__first_name']} {tr['approved_by__last_name']}"
+        
+        yield [
+            tr['user__employee_id'],
+            f"{tr['user__first_name']} {tr['user__last_name']}",
+            tr['user__dccb'] or 'N/A',
+            tr['from_date'].strftime('%d %b %Y'),
+            tr['to_date'].strftime('%d %b %Y'),
+            duration_labels.get(tr['duration'], tr['duration'] or 'N/A'),
+            str(tr['days_count']) if tr['days_count'] else 'N/A',
+            tr['er_id'] or 'N/A',
+            str(tr['distance_km']) if tr['distance_km'] else 'N/A',
+            tr['address'] or 'N/A',
+            tr['contact_person'] or 'N/A',
+            tr['purpose'] or 'N/A',
+            tr['status'].title() if tr['status'] else 'N/A',
+            approved_by_text,
+            tr['remarks'] or 'N/A',
+            tr['created_at'].strftime('%d %b %Y %H:%M') if tr['created_at'] else 'N/A'
+        ]
+
 @login_required
 @admin_required
 def export_travel_requests_enhanced(request):
@@ -2207,7 +1877,7 @@ def export_travel_requests_enhanced(request):
         designation_filter = request.GET.get('designation', '')
         status_filter = request.GET.get('status', '')
         
-        travel_requests = TravelRequest.objects.all().select_related('user', 'approved_by').order_by('-created_at')
+        travel_requests = TravelRequest.objects.order_by('-created_at')
         
         if employee_id_filter:
             travel_requests = travel_requests.filter(user__employee_id__icontains=employee_id_filter)
@@ -2220,55 +1890,11 @@ def export_travel_requests_enhanced(request):
         
         travel_requests = travel_requests.filter(created_at__date__range=[from_date, to_date])
         
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="travel_requests_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        
-        writer = csv.writer(response)
-        
-        writer.writerow([
-            'Employee ID',
-            'Name',
-            'DCCB',
-            'From Date',
-            'To Date',
-            'Duration',
-            'Days',
-            'ER ID',
-            'Distance (KM)',
-            'Address',
-            'Contact Person',
-            'Purpose',
-            'Status',
-            'Approved By',
-            'Remarks',
-            'Created At'
-        ])
-        
-        for travel in travel_requests:
-            approved_by_name = 'N/A'
-            if travel.approved_by:
-                approved_by_name = f"{travel.approved_by.employee_id} - {travel.approved_by.first_name} {travel.approved_by.last_name}"
-            
-            writer.writerow([
-                travel.user.employee_id,
-                f"{travel.user.first_name} {travel.user.last_name}",
-                travel.user.dccb or 'N/A',
-                travel.from_date.strftime('%d %b %Y'),
-                travel.to_date.strftime('%d %b %Y'),
-                travel.get_duration_display() if hasattr(travel, 'get_duration_display') else (travel.duration or 'N/A'),
-                str(travel.days_count) if travel.days_count else 'N/A',
-                travel.er_id or 'N/A',
-                str(travel.distance_km) if travel.distance_km else 'N/A',
-                travel.address or 'N/A',
-                travel.contact_person or 'N/A',
-                travel.purpose or 'N/A',
-                travel.status.title() if travel.status else 'N/A',
-                approved_by_name,
-                travel.remarks or 'N/A',
-                travel.created_at.strftime('%d %b %Y %H:%M') if travel.created_at else 'N/A'
-            ])
-        
-        return response
+        return stream_csv(
+            f'travel_requests_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv',
+            TRAVEL_EXPORT_HEADER,
+            travel_export_rows(travel_requests)
+        )
         
     except Exception as e:
         response = HttpResponse(content_type='text/csv')
@@ -2385,7 +2011,7 @@ def export_travel_requests(request):
     """Export travel requests with correct headers and data"""
     try:
         # Get all travel requests
-        travel_requests = TravelRequest.objects.select_related('user', 'approved_by').all().order_by('-created_at')
+        travel_requests = TravelRequest.objects.order_by('-created_at')
         
         # Apply filters if provided
         status_filter = request.GET.get('status', '')
@@ -2396,60 +2022,11 @@ def export_travel_requests(request):
         if dccb_filter:
             travel_requests = travel_requests.filter(user__dccb=dccb_filter)
         
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="travel_requests_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        
-        writer = csv.writer(response)
-        
-        # Write headers exactly as they appear on screen
-        headers = [
-            'Employee ID',
-            'Name', 
-            'DCCB',
-            'From Date',
-            'To Date', 
-            'Duration',
-            'Days',
-            'ER ID',
-            'Distance (KM)',
-            'Address',
-            'Contact Person',
-            'Purpose',
-            'Status',
-            'Approved By',
-            'Remarks',
-            'Created At'
-        ]
-        writer.writerow(headers)
-        
-        # Write data rows
-        for tr in travel_requests:
-            approved_by_text = 'N/A'
-            if tr.approved_by:
-                approved_by_text = f"{tr.approved_by.employee_id} - {tr.approved_by.first_name} {tr.approved_by.last_name}"
-            
-            row = [
-                tr.user.employee_id,
-                f"{tr.user.first_name} {tr.user.last_name}",
-                tr.user.dccb or 'N/A',
-                tr.from_date.strftime('%d %b %Y'),
-                tr.to_date.strftime('%d %b %Y'),
-                tr.get_duration_display() if hasattr(tr, 'get_duration_display') else (tr.duration or 'N/A'),
-                str(tr.days_count) if tr.days_count else 'N/A',
-                tr.er_id or 'N/A',
-                str(tr.distance_km) if tr.distance_km else 'N/A',
-                tr.address or 'N/A',
-                tr.contact_person or 'N/A', 
-                tr.purpose or 'N/A',
-                tr.status.title() if tr.status else 'N/A',
-                approved_by_text,
-                tr.remarks or 'N/A',
-                tr.created_at.strftime('%d %b %Y %H:%M') if tr.created_at else 'N/A'
-            ]
-            writer.writerow(row)
-        
-        return response
+        return stream_csv(
+            f'travel_requests_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv',
+            TRAVEL_EXPORT_HEADER,
+            travel_export_rows(travel_requests)
+        )
         
     except Exception as e:
         # Error response
@@ -0,0 +1,39 @@
+"""
+Associate Directory - cached DCCB -> responsible Associate mapping
+Built from every active Associate's multiple_dccb list once, then served from the cache until users change
+(for a few seconds only when the cache is per process - other processes never see the invalidation)
+"""
+from django.core.cache import cache
+from .models import CustomUser
+from .shared_cache import cache_ttl
+
+ASSOCIATE_DIRECTORY_CACHE_KEY = 'associate_directory:dccb_map'
+
+def build_associate_directory():
+    """DCCB -> Associate details; where several Associates list a DCCB the earliest account wins"""
+    directory = {}
+    associates = CustomUser.objects.filter(designation='Associate', is_active=True).order_by('id').values(
+        'id', 'employee_id', 'first_name', 'last_name', 'multiple_dccb'
+    )
+    for assoc in associates:
+        for dccb in assoc.pop('multiple_dccb') or []:
+            directory.setdefault(dccb, assoc)
+    return directory
+
+def get_associate_directory():
+    """Cached DCCB -> Associate mapping, rebuilt on a miss"""
+    directory = cache.get(ASSOCIATE_DIRECTORY_CACHE_KEY)
+    if directory is None:
+        directory = build_associate_directory()
+        cache.set(ASSOCIATE_DIRECTORY_CACHE_KEY, directory, cache_ttl('ASSOCIATE_DIRECTORY_CACHE_TTL', 300))
+    return directory
+
+def get_associate_for(dccb):
+    """Details (id, employee_id, first_name, last_name) of the Associate covering a DCCB, or None"""
+    if not dccb:
+        return None
+    return get_associate_directory().get(dccb)
+
+def invalidate_associate_directory():
+    """Drop the cached mapping - called when users change"""
+    cache.delete(ASSOCIATE_DIRECTORY_CACHE_KEY)
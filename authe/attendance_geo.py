@@ -0,0 +1,214 @@
+"""
+Attendance Geo - compact GeoJSON payloads for the attendance map
+Low zooms get grid clusters aggregated in the database; high zooms get individual points
+with repeated values (employees, statuses, dates) moved into lookup tables.
+"""
+import math
+from datetime import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q
+from django.db.models.functions import Floor
+from .geofence import EARTH_RADIUS_M, haversine_m
+from .geohash import ATTENDANCE_PRECISION, cells_for_bbox, encode, prefix_upper_bound
+from .models import Attendance, CustomUser
+
+LATE_CUTOFF = time(9, 30)
+STATUSES = [choice[0] for choice in Attendance.STATUS_CHOICES]
+
+def parse_bbox(value):
+    """'min_lng,min_lat,max_lng,max_lat' -> tuple of floats, or None when missing or malformed"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        return None
+    if min_lng > max_lng or min_lat > max_lat:
+        return None
+    return min_lng, min_lat, max_lng, max_lat
+
+def geohash_q(bbox):
+    """
+    Coarse filter on the (geohash, date) index - one range condition per covering cell prefix.
+    Returns an empty Q when the box is too large to cover with GEO_INDEX_MAX_CELLS cells.
+    """
+    min_lng, min_lat, max_lng, max_lat = bbox
+    condition = Q()
+    for prefix in cells_for_bbox(min_lat, min_lng, max_lat, max_lng, getattr(settings, 'GEO_INDEX_MAX_CELLS', 16)):
+        upper = prefix_upper_bound(prefix)
+        cell = Q(geohash__gte=prefix, geohash__lt=upper) if upper else Q(geohash__gte=prefix)
+        condition |= cell
+    return condition
+
+def within_bbox(records, bbox):
+    """Attendance rows inside a (min_lng, min_lat, max_lng, max_lat) box - cell prefixes first, exact bounds second"""
+    min_lng, min_lat, max_lng, max_lat = bbox
+    return records.filter(geohash_q(bbox)).filter(
+        longitude__range=(min_lng, max_lng),
+        latitude__range=(min_lat, max_lat)
+    )
+
+def within_radius(latitude, longitude, radius_m, records=None, fields=('id', 'user_id', 'date')):
+    """
+    Attendance rows within radius_m meters of a point, nearest first.
+    The radius's bounding box narrows the candidates through the geohash index; the exact
+    haversine distance is then computed on the candidates only. Returns value dicts with a 'distance' key.
+    """
+    if records is None:
+        records = Attendance.objects.all()
+    lat_delta = math.degrees(radius_m / EARTH_RADIUS_M)
+    # The circle is widest in longitude on its poleward side
+    poleward = min(abs(latitude) + lat_delta, 89.9)
+    lng_delta = min(lat_delta / math.cos(math.radians(poleward)), 180.0)
+    bbox = (longitude - lng_delta, latitude - lat_delta, longitude + lng_delta, latitude + lat_delta)
+    
+    candidates = list(within_bbox(records, bbox).order_by().values(*fields, 'latitude', 'longitude'))
+    if not candidates:
+        return []
+    distances = haversine_m(
+        [latitude] * len(candidates), [longitude] * len(candidates),
+        [row['latitude'] for row in candidates], [row['longitude'] for row in candidates]
+    )
+    nearby = []
+    for row, distance in zip(candidates, distances):
+        if distance <= radius_m:
+            row['distance'] = round(float(distance), 1)
+            nearby.append(row)
+    nearby.sort(key=lambda row: row['distance'])
+    return nearby
+
+def backfill_geohash(queryset, batch_size=2000):
+    """
+    Set Attendance.geohash for rows written before the spatial index existed (or by .update()/bulk_create).
+    Returns the number of rows written.
+    """
+    queryset.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True)).exclude(geohash=None).update(geohash=None)
+    rows = queryset.filter(latitude__isnull=False, longitude__isnull=False).order_by().values_list(
+        'id', 'latitude', 'longitude'
+    )
+    written = 0
+    batch = []
+    for attendance_id, latitude, longitude in rows.iterator(chunk_size=batch_size):
+        batch.append(Attendance(id=attendance_id, geohash=encode(latitude, longitude, ATTENDANCE_PRECISION)))
+        if len(batch) >= batch_size:
+            written += _write_geohashes(batch)
+            batch = []
+    if batch:
+        written += _write_geohashes(batch)
+    return written
+
+def _write_geohashes(batch):
+    with transaction.atomic():
+        Attendance.objects.bulk_update(batch, ['geohash'], batch_size=500)
+    return len(batch)
+
+def geo_queryset(from_date, to_date, status=None, bbox=None):
+    """Attendance rows with GPS data in the date range, optionally limited to a status and bounding box"""
+    records = Attendance.objects.filter(
+        date__range=(from_date, to_date),
+        latitude__isnull=False,
+        longitude__isnull=False
+    )
+    if status:
+        records = records.filter(status=status)
+    if bbox:
+        records = within_bbox(records, bbox)
+    return records.order_by()
+
+def cell_size(zoom):
+    """Grid cell edge in degrees - roughly GEO_CLUSTER_CELL_PX screen pixels at this zoom"""
+    return 360 / (256 * 2 ** zoom) * getattr(settings, 'GEO_CLUSTER_CELL_PX', 60)
+
+def feature_collection(mode, features, count, **extra):
+    return {'type': 'FeatureCollection', 'mode': mode, 'count': count, 'features': features, **extra}
+
+def cluster_collection(records, zoom):
+    """
+    Grid clusters aggregated by the database - one MultiPoint feature whose coordinates are
+    cluster centroids, with per-cluster counters as parallel property arrays.
+    """
+    size = cell_size(zoom)
+    cells = records.annotate(
+        cell_x=Floor(F('longitude') / size),
+        cell_y=Floor(F('latitude') / size)
+    ).values('cell_x', 'cell_y').annotate(
+        total=Count('id'),
+        lat=Avg('latitude'),
+        lng=Avg('longitude'),
+        present=Count('id', filter=Q(status='present')),
+        late=Count('id', filter=Q(status='present', check_in_time__gt=LATE_CUTOFF)),
+        half_day=Count('id', filter=Q(status='half_day')),
+        absent=Count('id', filter=Q(status__in=['absent', 'auto_not_marked']))
+    ).order_by()
+    
+    coordinates = []
+    properties = {'count': [], 'present': [], 'late': [], 'half_day': [], 'absent': []}
+    for cell in cells:
+        coordinates.append([round(cell['lng'], 5), round(cell['lat'], 5)])
+        properties['count'].append(cell['total'])
+        for field in ['present', 'late', 'half_day', 'absent']:
+            properties[field].append(cell[field])
+    
+    features = []
+    if coordinates:
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'MultiPoint', 'coordinates': coordinates},
+            'properties': properties
+        })
+    return feature_collection('clusters', features, sum(properties['count']), cell_size=size)
+
+def point_collection(rows):
+    """
+    Individual records as one MultiPoint feature. Property arrays run parallel to the coordinates
+    and hold indexes into the top-level employees/statuses/dates tables.
+    """
+    coordinates = []
+    properties = {'employee': [], 'status': [], 'date': [], 'check_in': [], 'accuracy': []}
+    employee_index, date_index = {}, {}
+    status_index = {status: position for position, status in enumerate(STATUSES)}
+    
+    for user_id, day, status, check_in_time, lat, lng, accuracy in rows:
+        coordinates.append([round(lng, 6), round(lat, 6)])
+        properties['employee'].append(employee_index.setdefault(user_id, len(employee_index)))
+        properties['status'].append(status_index.get(status, -1))
+        properties['date'].append(date_index.setdefault(day, len(date_index)))
+        properties['check_in'].append(check_in_time.strftime('%H:%M') if check_in_time else None)
+        properties['accuracy'].append(int(accuracy) if accuracy else None)
+    
+    users = CustomUser.objects.in_bulk(list(employee_index))
+    employees = []
+    for user_id in employee_index:
+        user = users[user_id]
+        employees.append([user.employee_id, f"{user.first_name} {user.last_name}", user.designation, user.dccb or 'Not Assigned'])
+    
+    features = []
+    if coordinates:
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'MultiPoint', 'coordinates': coordinates},
+            'properties': properties
+        })
+    return feature_collection(
+        'points', features, len(coordinates),
+        employees=employees,
+        statuses=STATUSES,
+        dates=[day.isoformat() for day in date_index]
+    )
+
+def attendance_geojson(from_date, to_date, status=None, bbox=None, zoom=None):
+    """
+    Map payload for a date range. Zooms below GEO_CLUSTER_MAX_ZOOM are clustered; at higher zooms
+    the points are returned unless there are more than GEO_MAX_POINTS, in which case they are clustered too.
+    """
+    records = geo_queryset(from_date, to_date, status, bbox)
+    if zoom is None:
+        zoom = getattr(settings, 'GEO_CLUSTER_MAX_ZOOM', 14)
+    
+    if zoom >= getattr(settings, 'GEO_CLUSTER_MAX_ZOOM', 14):
+        max_points = getattr(settings, 'GEO_MAX_POINTS', 5000)
+        rows = list(records.values_list(
+            'user_id', 'date', 'status', 'check_in_time', 'latitude', 'longitude', 'location_accuracy'
+        )[:max_points + 1])
+        if len(rows) <= max_points:
+            return point_collection(rows)
+    return cluster_collection(records, zoom)
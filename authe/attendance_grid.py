@@ -0,0 +1,160 @@
+"""
+Attendance Status Grid - compact employee x day matrix for the attendance views and exports
+One byte per cell: low 3 bits hold the status code, the high bits hold flags
+"""
+from array import array
+from datetime import time, timedelta
+from .models import Attendance
+
+LATE_CUTOFF = time(9, 30)
+
+# Status codes (low 3 bits)
+NOT_MARKED = 0
+PRESENT = 1
+HALF_DAY = 2
+ABSENT = 3
+AUTO_NOT_MARKED = 4
+STATUS_MASK = 0x07
+
+# Flag bits
+FLAG_LATE = 0x08
+FLAG_DC_CONFIRMED = 0x10
+FLAG_ADMIN_APPROVED = 0x20
+FLAG_LEAVE = 0x40
+
+STATUS_CODES = {
+    'present': PRESENT,
+    'half_day': HALF_DAY,
+    'absent': ABSENT,
+    'auto_not_marked': AUTO_NOT_MARKED,
+}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+STATUS_NAMES[NOT_MARKED] = 'not_marked'
+
+EXPORT_LABELS = {PRESENT: 'P', HALF_DAY: 'H', ABSENT: 'A'}
+
+def get_holiday_dates(from_date, to_date):
+    """Holiday names by date, empty when the Holiday model is not installed"""
+    try:
+        from .models import Holiday
+    except ImportError:
+        return {}
+    return dict(Holiday.objects.filter(date__range=[from_date, to_date]).values_list('date', 'name'))
+
+def build_date_range(from_date, to_date):
+    """Column headers for the matrix - one dict per day with Sunday/holiday markers"""
+    holiday_dates = get_holiday_dates(from_date, to_date)
+    date_range = []
+    current_date = from_date
+    while current_date <= to_date:
+        is_sunday = current_date.weekday() == 6
+        is_holiday = current_date in holiday_dates or is_sunday
+        date_range.append({
+            'date': current_date,
+            'is_sunday': is_sunday,
+            'is_holiday': is_holiday,
+            'holiday_name': holiday_dates.get(current_date, 'Sunday') if is_holiday else None
+        })
+        current_date += timedelta(days=1)
+    return date_range
+
+def encode_cell(status, check_in_time, is_confirmed_by_dc, is_approved_by_admin, is_leave_day):
+    """Pack one attendance record into a single byte"""
+    code = STATUS_CODES.get(status, NOT_MARKED)
+    if check_in_time and check_in_time > LATE_CUTOFF:
+        code |= FLAG_LATE
+    if is_confirmed_by_dc:
+        code |= FLAG_DC_CONFIRMED
+    if is_approved_by_admin:
+        code |= FLAG_ADMIN_APPROVED
+    if is_leave_day:
+        code |= FLAG_LEAVE
+    return code
+
+def cell_status(cell, resolve_confirmed=False):
+    """
+    Status name for a cell. With resolve_confirmed, DC-confirmed auto_not_marked
+    cells read as absent, matching the daily matrix.
+    """
+    status = cell & STATUS_MASK
+    if resolve_confirmed and status == AUTO_NOT_MARKED and cell & FLAG_DC_CONFIRMED:
+        return 'absent'
+    return STATUS_NAMES[status]
+
+def cell_label(cell):
+    """Export label - P/A/H/NM, with * for a late present or half day"""
+    status = cell & STATUS_MASK
+    label = EXPORT_LABELS.get(status, 'NM')
+    if cell & FLAG_LATE and status in (PRESENT, HALF_DAY):
+        label += '*'
+    return label
+
+class AttendanceGrid:
+    """Status grid for a fixed list of employees over a date range"""
+    
+    def __init__(self, user_ids, from_date, to_date):
+        self.from_date = from_date
+        self.to_date = to_date
+        self.days = (to_date - from_date).days + 1
+        self.rows = {user_id: index for index, user_id in enumerate(user_ids)}
+        self.cells = array('B', bytes(len(self.rows) * self.days))
+    
+    @classmethod
+    def load(cls, user_ids, from_date, to_date, users=None):
+        """
+        Build the grid with a single values_list query.
+        users may be a CustomUser queryset to filter by subquery instead of an id list.
+        """
+        user_ids = list(user_ids)
+        grid = cls(user_ids, from_date, to_date)
+        if not user_ids:
+            return grid
+        
+        records = Attendance.objects.filter(date__range=[from_date, to_date]).order_by()
+        if users is not None:
+            records = records.filter(user__in=users.values('id'))
+        else:
+            records = records.filter(user_id__in=user_ids)
+        
+        for user_id, day, status, check_in_time, dc_confirmed, admin_approved, leave_day in records.values_list(
+            'user_id', 'date', 'status', 'check_in_time',
+            'is_confirmed_by_dc', 'is_approved_by_admin', 'is_leave_day'
+        ):
+            row = grid.rows.get(user_id)
+            if row is None:
+                continue
+            grid.cells[row * grid.days + (day - from_date).days] = encode_cell(
+                status, check_in_time, dc_confirmed, admin_approved, leave_day
+            )
+        return grid
+    
+    def row(self, user_id):
+        """All cells for one employee, oldest day first"""
+        start = self.rows[user_id] * self.days
+        return self.cells[start:start + self.days]
+    
+    def cell(self, user_id, day):
+        return self.cells[self.rows[user_id] * self.days + (day - self.from_date).days]
+    
+    def matrix_row(self, user_id, date_range, resolve_confirmed=False):
+        """Template-ready cell dicts for one employee"""
+        return [
+            {
+                'date': date_info['date'],
+                'status': cell_status(cell, resolve_confirmed),
+                'is_late': bool(cell & FLAG_LATE),
+                'is_sunday': date_info['is_sunday'],
+                'is_holiday': date_info['is_holiday'],
+                'is_dc_confirmed': bool(cell & FLAG_DC_CONFIRMED),
+                'is_admin_approved': bool(cell & FLAG_ADMIN_APPROVED),
+                'is_leave_day': bool(cell & FLAG_LEAVE),
+            }
+            for date_info, cell in zip(date_range, self.row(user_id))
+        ]
+    
+    def export_row(self, user_id, date_range):
+        """CSV cells for one employee - HOL on Sundays/holidays, otherwise the status label"""
+        return [
+            'HOL' if date_info['is_holiday'] else cell_label(cell)
+            for date_info, cell in zip(date_range, self.row(user_id))
+        ]
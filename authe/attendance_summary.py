@@ -0,0 +1,166 @@
+"""
+Daily Attendance Summary - materialized counters per (date, DCCB, designation)
+Kept current by signals on Attendance saves and user changes, and by refresh calls after bulk updates
+"""
+from datetime import time
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from .models import Attendance, DailyAttendanceSummary
+
+LATE_CUTOFF = time(9, 30)
+
+SUMMARY_COUNTERS = [
+    'present', 'half_day', 'absent', 'not_marked',
+    'on_time', 'late', 'travelling', 'travel_approved',
+    'on_leave', 'dc_confirmed', 'admin_approved', 'admin_pending',
+]
+
+def summary_aggregates():
+    """Conditional counts matching SUMMARY_COUNTERS, usable in aggregate() or annotate()"""
+    return {
+        'present': Count('id', filter=Q(status='present')),
+        'half_day': Count('id', filter=Q(status='half_day')),
+        'absent': Count('id', filter=Q(status='absent')),
+        'not_marked': Count('id', filter=Q(status='auto_not_marked')),
+        'on_time': Count('id', filter=Q(check_in_time__lte=LATE_CUTOFF)),
+        'late': Count('id', filter=Q(check_in_time__gt=LATE_CUTOFF)),
+        'travelling': Count('id', filter=Q(travel_required=True)),
+        'travel_approved': Count('id', filter=Q(travel_approved=True)),
+        'on_leave': Count('id', filter=Q(is_leave_day=True)),
+        'dc_confirmed': Count('id', filter=Q(is_confirmed_by_dc=True)),
+        'admin_approved': Count('id', filter=Q(is_approved_by_admin=True)),
+        'admin_pending': Count('id', filter=Q(is_confirmed_by_dc=True, is_approved_by_admin=False)),
+    }
+
+def summary_source():
+    """
+    Attendance rows that feed the summary - active field officers only, the same roster the
+    reports count total_employees from, so marked and not-marked figures add up
+    """
+    return Attendance.objects.filter(user__role='field_officer', user__is_active=True).order_by()
+
+def aggregate_attendance(queryset):
+    """Summary counters computed live for an arbitrary Attendance queryset (one query)"""
+    return queryset.order_by().aggregate(**summary_aggregates())
+
+def summary_keys(queryset):
+    """Distinct (date, dccb, designation) keys touched by an Attendance queryset"""
+    return set(
+        queryset.order_by().values_list('date', 'user__dccb', 'user__designation').distinct()
+    )
+
+def _grouped_counts(queryset):
+    """Group Attendance rows by summary key and count every counter in one query"""
+    rows = queryset.values('date', 'user__dccb', 'user__designation').annotate(**summary_aggregates())
+    return {
+        (row['date'], row['user__dccb'], row['user__designation']): row
+        for row in rows
+    }
+
+def _dccb_filter(field, dccbs):
+    condition = Q(**{f'{field}__in': [dccb for dccb in dccbs if dccb is not None]})
+    if None in dccbs:
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+def refresh_summary(keys):
+    """
+    Recompute the summary rows for the given (date, dccb, designation) keys.
+    Call after QuerySet.update() or bulk_create(), which bypass the save signals.
+    The summary rows are created if missing and locked before anything is counted, so concurrent
+    refreshes of one key run one after the other and the last one counts every committed row.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+    
+    dates = {key[0] for key in keys}
+    dccbs = {key[1] for key in keys}
+    designations = {key[2] for key in keys}
+    summaries = DailyAttendanceSummary.objects.filter(
+        _dccb_filter('dccb', dccbs), date__in=dates, designation__in=designations
+    )
+    
+    with transaction.atomic():
+        # Insert missing rows first - a concurrent insert of the same key is skipped, not an IntegrityError
+        present_keys = set(summaries.values_list('date', 'dccb', 'designation'))
+        DailyAttendanceSummary.objects.bulk_create([
+            DailyAttendanceSummary(date=key[0], dccb=key[1], designation=key[2])
+            for key in keys - present_keys
+        ], ignore_conflicts=True)
+        
+        locked, to_delete = {}, []
+        for summary in summaries.select_for_update().order_by('date', 'dccb', 'designation', 'id'):
+            key = (summary.date, summary.dccb, summary.designation)
+            if key not in keys:
+                continue
+            if key in locked:
+                # NULL DCCBs escape the unique constraint - fold duplicates into the first row
+                to_delete.append(summary.pk)
+            else:
+                locked[key] = summary
+        
+        counts = _grouped_counts(
+            summary_source().filter(_dccb_filter('user__dccb', dccbs), date__in=dates, user__designation__in=designations)
+        )
+        
+        now = timezone.now()
+        to_update = []
+        for key, summary in locked.items():
+            row = counts.get(key)
+            if row is None:
+                to_delete.append(summary.pk)
+                continue
+            for field in SUMMARY_COUNTERS:
+                setattr(summary, field, row[field])
+            summary.updated_at = now
+            to_update.append(summary)
+        
+        if to_delete:
+            DailyAttendanceSummary.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            DailyAttendanceSummary.objects.bulk_update(to_update, SUMMARY_COUNTERS + ['updated_at'])
+    
+    return len(keys)
+
+def refresh_summary_for_user(user, dccb=None, designation=None):
+    """Recompute every date a user has attendance for, under their old and current keys"""
+    dates = set(Attendance.objects.filter(user=user).values_list('date', flat=True))
+    keys = {(date, user.dccb, user.designation) for date in dates}
+    if designation is not None:
+        keys |= {(date, dccb, designation) for date in dates}
+    return refresh_summary(keys)
+
+def rebuild_summary(start_date, end_date):
+    """Rebuild the summary for a date range from scratch. Returns rows written."""
+    with transaction.atomic():
+        DailyAttendanceSummary.objects.filter(date__range=[start_date, end_date]).delete()
+        counts = _grouped_counts(summary_source().filter(date__range=[start_date, end_date]))
+        summaries = [
+            DailyAttendanceSummary(
+                date=key[0], dccb=key[1], designation=key[2],
+                **{field: row[field] for field in SUMMARY_COUNTERS}
+            )
+            for key, row in counts.items()
+        ]
+        DailyAttendanceSummary.objects.bulk_create(summaries, batch_size=500)
+    return len(summaries)
+
+def summary_totals(start_date, end_date=None, dccb=None, designation=None, group_by=()):
+    """
+    Summed counters from the summary table.
+    Returns one dict when group_by is empty, otherwise a list of dicts per group.
+    """
+    queryset = DailyAttendanceSummary.objects.filter(date__range=[start_date, end_date or start_date])
+    if dccb:
+        queryset = queryset.filter(dccb=dccb)
+    if designation:
+        queryset = queryset.filter(designation=designation)
+    
+    sums = {field: Sum(field) for field in SUMMARY_COUNTERS}
+    if not group_by:
+        totals = queryset.order_by().aggregate(**sums)
+        return {field: totals[field] or 0 for field in SUMMARY_COUNTERS}
+    
+    return list(queryset.order_by().values(*group_by).annotate(**sums).order_by(*group_by))
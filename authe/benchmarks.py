@@ -0,0 +1,172 @@
+"""
+Benchmarks - wall time, query count and peak memory of the hot views and exports
+Every scenario runs through the test client inside a rolled-back transaction, so the
+database is left untouched; results are compared with JSON baselines stored per database vendor.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from .middleware import QueryRecorder
+from .models import Attendance, CustomUser
+from .user_journal import scratch_backup_dir
+
+BASELINE_DIR = Path(__file__).resolve().parent / 'benchmark_baselines'
+
+# Metric -> smallest absolute increase that counts as a regression (noise floor)
+MIN_DELTAS = {'wall_ms': 20, 'queries': 2, 'peak_kb': 256}
+
+class BenchmarkError(Exception):
+    pass
+
+def admin_user():
+    user = CustomUser.objects.filter(role_level__gte=10, is_active=True).order_by('id').first()
+    if user is None:
+        raise BenchmarkError('No admin user (role_level >= 10) to run the admin scenarios as')
+    return user
+
+def field_user(today):
+    """An MT without attendance today, so mark_attendance takes the create path"""
+    user = CustomUser.objects.filter(role='field_officer', designation='MT', is_active=True).exclude(
+        attendance__date=today
+    ).order_by('id').first()
+    if user is None:
+        raise BenchmarkError('No MT without attendance today to run mark_attendance as - generate a dataset first')
+    return user
+
+def scenarios():
+    """Scenario name -> (user lookup, request) - requests take the client and today's date"""
+    return {
+        'admin_dashboard': (admin_user, lambda client, today: client.get('/auth/admin-dashboard/')),
+        'attendance_daily': (admin_user, lambda client, today: client.get(
+            '/auth/admin/attendance/daily/', {'date_range': 'last_30_days'}
+        )),
+        'reports_analytics_dashboard': (admin_user, lambda client, today: client.get(
+            '/auth/reports/', {'date': (today - timedelta(days=1)).isoformat()}
+        )),
+        'export_master_attendance_report': (admin_user, lambda client, today: client.get(
+            '/auth/reports/export-master-attendance/',
+            {'start_date': (today - timedelta(days=30)).isoformat(), 'end_date': (today - timedelta(days=1)).isoformat()}
+        )),
+        'dc_confirmation': (admin_user, lambda client, today: client.get(
+            '/auth/admin/dc-confirmation/',
+            {'from_date': (today - timedelta(days=30)).isoformat(), 'to_date': today.isoformat()}
+        )),
+        'mark_attendance': (lambda: field_user(timezone.localdate()), lambda client, today: client.post(
+            '/auth/mark-attendance/',
+            json.dumps({'status': 'present', 'workplace': 'DCCB', 'latitude': 23.0225, 'longitude': 72.5714, 'accuracy': 12}),
+            content_type='application/json'
+        )),
+    }
+
+def consume(response):
+    """Read the whole body so streamed exports are measured too"""
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+def run_once(client, request, today, trace_memory=False):
+    """One cold run (empty cache) inside a transaction that is rolled back. Returns the measurements."""
+    cache.clear()
+    recorder = QueryRecorder()
+    with transaction.atomic():
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = request(client, today)
+            size = consume(response)
+        wall = time.perf_counter() - started
+        peak = 0
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        transaction.set_rollback(True)
+    if response.status_code >= 300:
+        raise BenchmarkError(f'HTTP {response.status_code}')
+    return {'wall_ms': wall * 1000, 'queries': recorder.count, 'peak_kb': peak / 1024, 'bytes': size}
+
+def run_benchmarks(names=None, repeat=3, log=None):
+    """
+    Run the scenarios (all by default). Wall time is the median of `repeat` runs; peak memory
+    comes from one extra run under tracemalloc, which is kept out of the timings.
+    """
+    log = log or (lambda message: None)
+    today = timezone.localdate()
+    available = scenarios()
+    unknown = set(names or []) - set(available)
+    if unknown:
+        raise BenchmarkError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    
+    results = {}
+    # DataPersistenceMiddleware may write a user snapshot - keep it out of the real backup directory
+    with override_settings(ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver']), scratch_backup_dir():
+        for name, (user_lookup, request) in available.items():
+            if names and name not in names:
+                continue
+            client = Client()
+            client.force_login(user_lookup())
+            try:
+                runs = [run_once(client, request, today) for _ in range(repeat)]
+                traced = run_once(client, request, today, trace_memory=True)
+            except BenchmarkError as e:
+                raise BenchmarkError(f'{name}: {e}')
+            results[name] = {
+                'wall_ms': round(statistics.median(run['wall_ms'] for run in runs), 1),
+                'queries': runs[-1]['queries'],
+                'peak_kb': round(traced['peak_kb']),
+                'bytes': runs[-1]['bytes'],
+            }
+            log(f"{name}: {results[name]['wall_ms']}ms, {results[name]['queries']} queries, {results[name]['peak_kb']} KB peak")
+    return results
+
+def dataset_size():
+    return {
+        'employees': CustomUser.objects.filter(role='field_officer').count(),
+        'attendance': Attendance.objects.count(),
+    }
+
+def baseline_path(vendor=None):
+    return BASELINE_DIR / f'{vendor or connections["default"].vendor}.json'
+
+def load_baseline(path):
+    try:
+        with open(path) as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return None
+
+def save_baseline(path, results, dataset):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as baseline_file:
+        json.dump({
+            'vendor': connections['default'].vendor,
+            'recorded_at': timezone.now().isoformat(timespec='seconds'),
+            'dataset': dataset,
+            'scenarios': results,
+        }, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+def compare(results, baseline, threshold_percent):
+    """
+    Regressions against the baseline as (scenario, metric, baseline value, current value).
+    A metric regresses when it grows by more than threshold_percent and by more than its noise floor.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline['scenarios'].get(name)
+        if not previous:
+            continue
+        for metric, floor in MIN_DELTAS.items():
+            before, after = previous[metric], current[metric]
+            if after > before * (1 + threshold_percent / 100) and after - before > floor:
+                regressions.append((name, metric, before, after))
+    return regressions
@@ -0,0 +1,441 @@
+"""
+Bulk Employee Upload - streaming validation and set-based creation
+Rows are read with openpyxl in read-only mode and checked against preloaded uniqueness sets,
+staged in BulkUploadBatch/BulkUploadRow for preview, then created with bulk_create chunk by chunk.
+"""
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from openpyxl import load_workbook
+from .models import BulkUploadBatch, BulkUploadRow, CustomUser
+from .password_pool import hash_passwords
+
+REQUIRED_COLUMNS = [
+    'Employee ID', 'First Name', 'Last Name', 'Designation',
+    'Department', 'Contact Number', 'Email ID', 'Password', 'Confirm Password'
+]
+VALID_DESIGNATIONS = ['MT', 'DC', 'Support', 'Associate', 'Manager', 'HR', 'Delivery Head']
+VALID_DEPARTMENTS = [choice[0] for choice in CustomUser.DEPARTMENT_CHOICES]
+VALID_DCCBS = [choice[0] for choice in CustomUser.DCCB_CHOICES]
+
+def cell_text(value):
+    """Cell value as stripped text - empty for blank cells, whole-number floats without '.0'"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def iter_sheet_rows(excel_file):
+    """
+    Stream (row_number, {column: value}) from the first worksheet without loading it into memory.
+    Returns the header list alongside the row iterator.
+    """
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    rows = workbook.worksheets[0].iter_rows(values_only=True)
+    header = [cell_text(value) for value in next(rows, ())]
+    
+    def generate():
+        try:
+            for row_number, values in enumerate(rows, start=2):
+                if not any(value not in (None, '') for value in values):
+                    continue
+                yield row_number, dict(zip(header, values))
+        finally:
+            workbook.close()
+    
+    return header, generate()
+
+def load_existing_keys():
+    """Employee IDs, contact numbers and emails already taken - three queries for the whole file"""
+    return {
+        'employee_id': set(CustomUser.objects.values_list('employee_id', flat=True)),
+        'contact_number': set(CustomUser.objects.values_list('contact_number', flat=True)),
+        'email': set(CustomUser.objects.values_list('email', flat=True)),
+    }
+
+def check_unique(key, value, row_number, label, existing, seen, row_errors):
+    """Reject values already in the database or used by an earlier row of the same file"""
+    if value in existing[key]:
+        row_errors.append(f'Row {row_number}: {label} already exists')
+        return False
+    first_row = seen[key].get(value)
+    if first_row is not None:
+        row_errors.append(f'Row {row_number}: {label} duplicates row {first_row}')
+        return False
+    seen[key][value] = row_number
+    return True
+
+def validate_row(row_number, row, columns, existing, seen):
+    """Validate one sheet row - returns (row_data, preview_row, row_errors)"""
+    row_errors = []
+    row_data = {}
+    
+    # Employee ID validation
+    employee_id = cell_text(row.get('Employee ID')).upper()
+    if not re.match(r'^(MGJ[0-9]{5}|MP[0-9]{4})$', employee_id):
+        row_errors.append(f'Row {row_number}: Invalid Employee ID format')
+    elif check_unique('employee_id', employee_id, row_number, 'Employee ID', existing, seen, row_errors):
+        row_data['employee_id'] = employee_id
+    
+    # Name validation
+    first_name = cell_text(row.get('First Name')).upper()
+    last_name = cell_text(row.get('Last Name')).upper()
+    if not first_name:
+        row_errors.append(f'Row {row_number}: First Name is required')
+    else:
+        row_data['first_name'] = first_name
+    
+    if not last_name:
+        row_errors.append(f'Row {row_number}: Last Name is required')
+    else:
+        row_data['last_name'] = last_name
+    
+    # Designation validation
+    designation = cell_text(row.get('Designation'))
+    if designation not in VALID_DESIGNATIONS:
+        row_errors.append(f'Row {row_number}: Invalid designation')
+    else:
+        row_data['designation'] = designation
+    
+    # Department validation
+    department = cell_text(row.get('Department'))
+    if department not in VALID_DEPARTMENTS:
+        row_errors.append(f'Row {row_number}: Invalid department')
+    else:
+        row_data['department'] = department
+    
+    # Contact number validation
+    contact = re.sub(r'[^0-9]', '', cell_text(row.get('Contact Number')))
+    if not re.match(r'^[0-9]{10}$', contact):
+        row_errors.append(f'Row {row_number}: Invalid contact number format')
+    elif check_unique('contact_number', contact, row_number, 'Contact number', existing, seen, row_errors):
+        row_data['contact_number'] = contact
+    
+    # Email validation
+    email = cell_text(row.get('Email ID')).lower()
+    if not re.match(r'^[^\s@]+@[^\s@]+\.[^\s@]+$', email):
+        row_errors.append(f'Row {row_number}: Invalid email format')
+    elif check_unique('email', email, row_number, 'Email', existing, seen, row_errors):
+        row_data['email'] = email
+    
+    # Password validation
+    password = cell_text(row.get('Password'))
+    confirm_password = cell_text(row.get('Confirm Password'))
+    if len(password) < 12 or len(password) > 16:
+        row_errors.append(f'Row {row_number}: Password must be 12-16 characters')
+    elif not re.match(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*[0-9])(?=.*[!@#$%^&*]).*$', password):
+        row_errors.append(f'Row {row_number}: Password must include uppercase, lowercase, number, and symbol')
+    elif password != confirm_password:
+        row_errors.append(f'Row {row_number}: Passwords do not match')
+    else:
+        row_data['password'] = password
+    
+    # Role-specific validation
+    dccb_value = cell_text(row.get('DCCB')) if 'DCCB' in columns else ''
+    manager_value = cell_text(row.get('Reporting Manager')) if 'Reporting Manager' in columns else ''
+    if employee_id.startswith('MGJ'):  # Field Officer
+        if designation not in ['MT', 'DC', 'Support', 'Associate']:
+            row_errors.append(f'Row {row_number}: Invalid designation for Field Officer')
+        
+        # DCCB validation
+        if designation == 'Associate':
+            # Multiple DCCB for Associates (if provided in Excel)
+            if dccb_value:
+                dccb_list = [d.strip() for d in dccb_value.split(',')]
+                invalid_dccbs = [d for d in dccb_list if d not in VALID_DCCBS]
+                if invalid_dccbs:
+                    row_errors.append(f'Row {row_number}: Invalid DCCB(s): {", ".join(invalid_dccbs)}')
+                else:
+                    row_data['multiple_dccb'] = dccb_list
+        else:
+            # Single DCCB for other Field Officers
+            if dccb_value:
+                if dccb_value not in VALID_DCCBS:
+                    row_errors.append(f'Row {row_number}: Invalid DCCB')
+                else:
+                    row_data['dccb'] = dccb_value
+            else:
+                row_errors.append(f'Row {row_number}: DCCB is required for Field Officers')
+        
+        # Reporting Manager validation
+        if manager_value:
+            row_data['reporting_manager'] = manager_value.upper()
+        else:
+            row_errors.append(f'Row {row_number}: Reporting Manager is required for Field Officers')
+    
+    elif employee_id.startswith('MP'):  # Admin
+        if designation not in ['Manager', 'HR', 'Delivery Head']:
+            row_errors.append(f'Row {row_number}: Invalid designation for Admin user')
+    
+    preview_row = {
+        'row_number': row_number,
+        'employee_id': employee_id,
+        'name': f"{first_name} {last_name}",
+        'designation': designation,
+        'department': department,
+        'contact': contact,
+        'email': email,
+        'errors': row_errors
+    }
+    return row_data, preview_row, row_errors
+
+def validate_upload(excel_file):
+    """Validate an uploaded workbook in one streaming pass - same result shape as the old pandas validator"""
+    columns, rows = iter_sheet_rows(excel_file)
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_columns:
+        rows.close()
+        return {
+            'is_valid': False,
+            'errors': [f'Missing required columns: {", ".join(missing_columns)}'],
+            'data': []
+        }
+    
+    existing = load_existing_keys()
+    seen = {key: {} for key in existing}
+    errors = []
+    preview_data = []
+    validated_data = []
+    for row_number, row in rows:
+        try:
+            row_data, preview_row, row_errors = validate_row(row_number, row, columns, existing, seen)
+        except Exception as e:
+            error_msg = f'Row {row_number}: Error processing data - {str(e)}'
+            errors.append(error_msg)
+            preview_data.append({
+                'row_number': row_number,
+                'employee_id': 'Error',
+                'name': 'Error',
+                'designation': 'Error',
+                'department': 'Error',
+                'contact': 'Error',
+                'email': 'Error',
+                'errors': [error_msg]
+            })
+            continue
+        
+        preview_data.append(preview_row)
+        if row_errors:
+            errors.extend(row_errors)
+        else:
+            validated_data.append(row_data)
+    
+    return {
+        'is_valid': len(errors) == 0,
+        'errors': errors,
+        'data': validated_data,
+        'preview_data': preview_data
+    }
+
+def stage_upload(validation_results, uploaded_by, file_name):
+    """
+    Store a validated sheet as a BulkUploadBatch with one BulkUploadRow per sheet row.
+    Valid rows of a clean sheet get their passwords hashed (in the process pool) here,
+    so nothing sensitive is kept in plaintext and commit only has to insert.
+    """
+    valid_data = validation_results['data']
+    preview_data = validation_results.get('preview_data', [])
+    is_valid = validation_results['is_valid']
+    
+    password_hashes = iter(())
+    if is_valid and valid_data:
+        password_hashes = iter(hash_passwords(
+            [row_data['password'] for row_data in valid_data],
+            workers=getattr(settings, 'BULK_UPLOAD_HASH_WORKERS', None)
+        ))
+    
+    batch = BulkUploadBatch.objects.create(
+        uploaded_by=uploaded_by,
+        file_name=file_name[:255],
+        status='validated' if is_valid else 'invalid',
+        total_rows=len(preview_data),
+        valid_rows=len(valid_data),
+        error_rows=len(preview_data) - len(valid_data)
+    )
+    
+    staged_rows = []
+    valid_rows = iter(valid_data)
+    for preview_row in preview_data:
+        if preview_row['errors']:
+            first_name, _, last_name = preview_row['name'].partition(' ')
+            staged_rows.append(BulkUploadRow(
+                batch=batch,
+                row_number=preview_row['row_number'],
+                status='error',
+                employee_id=preview_row['employee_id'][:20],
+                first_name=first_name[:50],
+                last_name=last_name[:50],
+                designation=preview_row['designation'][:20],
+                department=preview_row['department'][:50],
+                contact_number=preview_row['contact'][:20],
+                email=preview_row['email'][:254],
+                errors=preview_row['errors']
+            ))
+            continue
+        
+        row_data = next(valid_rows)
+        staged_rows.append(BulkUploadRow(
+            batch=batch,
+            row_number=preview_row['row_number'],
+            status='valid',
+            employee_id=row_data['employee_id'],
+            first_name=row_data['first_name'],
+            last_name=row_data['last_name'],
+            designation=row_data['designation'],
+            department=row_data['department'],
+            contact_number=row_data['contact_number'],
+            email=row_data['email'],
+            dccb=row_data.get('dccb'),
+            multiple_dccb=row_data.get('multiple_dccb', []),
+            reporting_manager=row_data.get('reporting_manager'),
+            password_hash=next(password_hashes, '')
+        ))
+    
+    BulkUploadRow.objects.bulk_create(staged_rows, batch_size=getattr(settings, 'BULK_UPLOAD_CHUNK_SIZE', 500))
+    return batch
+
+def batches_for(user):
+    """Upload batches a user may open - their own; Django superusers can open any batch"""
+    batches = BulkUploadBatch.objects.all()
+    if not user.is_superuser:
+        batches = batches.filter(uploaded_by=user)
+    return batches
+
+def purge_stale_batches(hours=None):
+    """
+    Staged rows carry password hashes, so they are not kept once an upload is done with:
+    batches never completed are deleted after BULK_UPLOAD_BATCH_TTL_HOURS without activity,
+    completed batches lose their staged rows (the batch summary is kept).
+    Returns (batches deleted, completed-batch rows deleted).
+    """
+    hours = hours if hours is not None else getattr(settings, 'BULK_UPLOAD_BATCH_TTL_HOURS', 24)
+    cutoff = timezone.now() - timedelta(hours=hours)
+    stale = BulkUploadBatch.objects.exclude(status='completed').filter(updated_at__lt=cutoff)
+    _, deleted = stale.delete()
+    rows_deleted, _ = BulkUploadRow.objects.filter(
+        batch__status='completed', batch__completed_at__lt=cutoff
+    ).delete()
+    return deleted.get(BulkUploadBatch._meta.label, 0), rows_deleted
+
+def batch_summary(batch):
+    """Preview counters for a staged batch in one aggregate query"""
+    return batch.rows.filter(status__in=['valid', 'created']).aggregate(
+        total_count=Count('id'),
+        field_count=Count('id', filter=Q(employee_id__startswith='MGJ')),
+        admin_count=Count('id', filter=Q(employee_id__startswith='MP')),
+        department_count=Count('department', distinct=True),
+    )
+
+def build_user(staged_row):
+    """Unsaved CustomUser with the same normalization save() applies"""
+    user = CustomUser(
+        employee_id=staged_row.employee_id,
+        email=staged_row.email,
+        password=staged_row.password_hash,
+        first_name=staged_row.first_name,
+        last_name=staged_row.last_name,
+        designation=staged_row.designation,
+        department=staged_row.department,
+        contact_number=staged_row.contact_number,
+        dccb=staged_row.dccb,
+        multiple_dccb=staged_row.multiple_dccb,
+        reporting_manager=staged_row.reporting_manager
+    )
+    user.apply_defaults()
+    return user
+
+def reject_conflicts(staged_rows):
+    """
+    Re-check a chunk against users created since validation (three queries).
+    Conflicting rows are marked as errors; the remaining rows are returned.
+    """
+    taken = {
+        'employee_id': set(CustomUser.objects.filter(
+            employee_id__in=[row.employee_id for row in staged_rows]
+        ).values_list('employee_id', flat=True)),
+        'contact_number': set(CustomUser.objects.filter(
+            contact_number__in=[row.contact_number for row in staged_rows]
+        ).values_list('contact_number', flat=True)),
+        'email': set(CustomUser.objects.filter(
+            email__in=[row.email for row in staged_rows]
+        ).values_list('email', flat=True)),
+    }
+    labels = {'employee_id': 'Employee ID', 'contact_number': 'Contact number', 'email': 'Email'}
+    
+    accepted = []
+    rejected = []
+    for staged_row in staged_rows:
+        row_errors = [
+            f'Row {staged_row.row_number}: {label} already exists'
+            for key, label in labels.items() if getattr(staged_row, key) in taken[key]
+        ]
+        if row_errors:
+            staged_row.status = 'error'
+            staged_row.errors = row_errors
+            rejected.append(staged_row)
+        else:
+            accepted.append(staged_row)
+    if rejected:
+        BulkUploadRow.objects.bulk_update(rejected, ['status', 'errors'])
+    return accepted
+
+def after_bulk_create(users):
+    """bulk_create skips post_save - journal the new users and drop the caches the signals would"""
+    from .associate_directory import invalidate_associate_directory
+    from .kpi_service import invalidate_dashboard_kpis
+    from .middleware import invalidate_persistence_state
+    from .notification_service import invalidate_recipient_cache
+    from .user_journal import append_changes
+    
+    append_changes([('upsert', user) for user in users])
+    invalidate_dashboard_kpis()
+    invalidate_recipient_cache()
+    invalidate_persistence_state()
+    invalidate_associate_directory()
+
+def commit_batch_chunk(batch, chunk_size):
+    """
+    Create users for the next chunk of valid rows in one transaction.
+    Returns the number of rows processed (0 when the batch is finished).
+    """
+    with transaction.atomic():
+        staged_rows = list(
+            batch.rows.select_for_update().filter(status='valid').order_by('row_number')[:chunk_size]
+        )
+        if not staged_rows:
+            return 0
+        
+        accepted = reject_conflicts(staged_rows)
+        users = [build_user(staged_row) for staged_row in accepted]
+        CustomUser.objects.bulk_create(users)
+        BulkUploadRow.objects.filter(id__in=[row.id for row in accepted]).update(status='created', password_hash='')
+        BulkUploadBatch.objects.filter(id=batch.id).update(
+            created_rows=F('created_rows') + len(accepted),
+            valid_rows=F('valid_rows') - (len(staged_rows) - len(accepted)),
+            error_rows=F('error_rows') + (len(staged_rows) - len(accepted)),
+            updated_at=timezone.now()
+        )
+        transaction.on_commit(lambda: after_bulk_create(users))
+    return len(staged_rows)
+
+def commit_batch(batch, chunk_size=None):
+    """
+    Commit a staged batch chunk by chunk, recording progress on the batch after each chunk.
+    Chunks already committed stay committed, so an interrupted import resumes where it stopped.
+    """
+    chunk_size = chunk_size or getattr(settings, 'BULK_UPLOAD_CHUNK_SIZE', 500)
+    BulkUploadBatch.objects.filter(id=batch.id).update(status='committing', last_error='')
+    try:
+        while commit_batch_chunk(batch, chunk_size):
+            pass
+    except Exception as e:
+        BulkUploadBatch.objects.filter(id=batch.id).update(status='failed', last_error=str(e))
+        raise
+    
+    BulkUploadBatch.objects.filter(id=batch.id).update(status='completed', completed_at=timezone.now())
+    batch.refresh_from_db()
+    return batch
@@ -2,10 +2,14 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
+from django.core.paginator import Paginator
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from .forms import BulkUploadForm
+from django.utils import timezone
 from .models import CustomUser, AuditLog
+from .task_queue import enqueue
+from .bulk_upload import batch_summary, batches_for, commit_batch, purge_stale_batches, stage_upload, validate_upload
 import pandas as pd
 import re
 import json
@@ -22,12 +26,14 @@ def get_client_ip(request):
     return ip
 
 def create_audit_log(user, action, request, details=None):
-    """Create audit log entry"""
-    AuditLog.objects.create(
-        user=user,
-        action=action,
-        ip_address=get_client_ip(request),
-        details=details or ''
+    """Queue an audit log entry - written by the background worker once the request commits"""
+    enqueue(
+        'write_audit_log',
+        user.id,
+        action,
+        get_client_ip(request),
+        details or '',
+        occurred_at=timezone.now()
     )
 
 @login_required
@@ -43,24 +49,25 @@ def bulk_upload_view(request):
             try:
                 excel_file = request.FILES['excel_file']
                 
-                # Read Excel file
-                df = pd.read_excel(excel_file)
+                # Abandoned uploads still hold staged password hashes (also purged by cleanup_bulk_uploads)
+                purge_stale_batches()
                 
-                # Validate and process data
-                validation_results = validate_bulk_data(df)
+                # Stream and validate the sheet
+                validation_results = validate_upload(excel_file)
                 
-                if validation_results['is_valid']:
-                    # Store validated data in session for preview
-                    request.session['bulk_upload_data'] = validation_results['data']
-                    return redirect('bulk_upload_preview')
-                else:
-                    # Show validation errors
+                if not validation_results.get('preview_data'):
+                    # Sheet-level errors (missing columns) - there are no rows to stage
                     context = {
                         'form': form,
                         'validation_errors': validation_results['errors'],
-                        'preview_data': validation_results.get('preview_data', [])
                     }
                     return render(request, 'authe/bulk_upload.html', context)
+                
+                # Stage the rows server-side - a clean sheet goes to the preview, an invalid one to its error rows
+                batch = stage_upload(validation_results, request.user, excel_file.name)
+                if validation_results['is_valid']:
+                    return redirect('bulk_upload_preview', batch_id=batch.id)
+                return redirect('bulk_upload_errors', batch_id=batch.id)
                     
             except Exception as e:
                 messages.error(request, f'Error processing file: {str(e)}')
@@ -75,230 +82,92 @@ def bulk_upload_view(request):
     return render(request, 'authe/bulk_upload.html', {'form': form})
 
 @login_required
-def bulk_upload_preview(request):
-    """Preview bulk upload data before final submission"""
+def bulk_upload_preview(request, batch_id):
+    """Preview a staged upload and commit it in chunks"""
     if request.user.role_level < 10:
         messages.error(request, 'Access denied')
         return redirect('admin_employee_list')
     
-    bulk_data = request.session.get('bulk_upload_data')
-    if not bulk_data:
+    batch = batches_for(request.user).filter(id=batch_id, status__in=['validated', 'committing', 'failed']).first()
+    if not batch:
         messages.error(request, 'No upload data found. Please upload file again.')
         return redirect('bulk_upload')
     
     if request.method == 'POST':
-        # Process bulk creation
+        # Process bulk creation - chunks already committed are kept, so a retry resumes
         try:
-            with transaction.atomic():
-                created_count = 0
-                for row_data in bulk_data:
-                    user = CustomUser.objects.create_user(
-                        employee_id=row_data['employee_id'],
-                        email=row_data['email'],
-                        password=row_data['password'],
-                        first_name=row_data['first_name'],
-                        last_name=row_data['last_name'],
-                        designation=row_data['designation'],
-                        department=row_data['department'],
-                        contact_number=row_data['contact_number'],
-                        dccb=row_data.get('dccb'),
-                        multiple_dccb=row_data.get('multiple_dccb', []),
-                        reporting_manager=row_data.get('reporting_manager')
-                    )
-                    created_count += 1
-                
-                # Clear session data
-                del request.session['bulk_upload_data']
-                
-                # Create audit log
-                create_audit_log(
-                    request.user,
-                    'Bulk User Creation',
-                    request,
-                    f'Created {created_count} employees via bulk upload'
-                )
-                
-                messages.success(request, f'Successfully created {created_count} employee accounts')
-                return redirect('admin_employee_list')
-                
+            batch = commit_batch(batch)
+            
+            # Create audit log
+            create_audit_log(
+                request.user,
+                'Bulk User Creation',
+                request,
+                f'Created {batch.created_rows} employees via bulk upload (batch {batch.id})'
+            )
+            
+            if batch.error_rows:
+                messages.warning(request, f'{batch.error_rows} rows were skipped because the employee already exists')
+            messages.success(request, f'Successfully created {batch.created_rows} employee accounts')
+            return redirect('admin_employee_list')
+        
         except Exception as e:
-            messages.error(request, f'Error creating employees: {str(e)}')
+            batch.refresh_from_db()
+            messages.error(
+                request,
+                f'Error creating employees: {str(e)}. {batch.created_rows} of {batch.valid_rows} created - submit again to resume.'
+            )
+    
+    paginator = Paginator(batch.rows.filter(status__in=['valid', 'created']), 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
     
     return render(request, 'authe/bulk_upload_preview.html', {
-        'preview_data': bulk_data,
-        'total_count': len(bulk_data)
+        'batch': batch,
+        'page_obj': page_obj,
+        'pending_count': batch.valid_rows - batch.created_rows,
+        **batch_summary(batch)
     })
 
-def validate_bulk_data(df):
-    """Validate bulk upload Excel data"""
-    required_columns = [
-        'Employee ID', 'First Name', 'Last Name', 'Designation', 
-        'Department', 'Contact Number', 'Email ID', 'Password', 'Confirm Password'
-    ]
+@login_required
+def bulk_upload_errors(request, batch_id):
+    """Rows of an invalid upload with their validation errors, a page at a time"""
+    if request.user.role_level < 10:
+        messages.error(request, 'Access denied')
+        return redirect('admin_employee_list')
     
-    errors = []
-    preview_data = []
-    validated_data = []
+    batch = batches_for(request.user).filter(id=batch_id, status='invalid').first()
+    if not batch:
+        messages.error(request, 'No upload data found. Please upload file again.')
+        return redirect('bulk_upload')
     
-    # Check required columns
-    missing_columns = [col for col in required_columns if col not in df.columns]
-    if missing_columns:
-        return {
-            'is_valid': False,
-            'errors': [f'Missing required columns: {", ".join(missing_columns)}'],
-            'data': []
-        }
+    paginator = Paginator(batch.rows.filter(status='error'), 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
     
-    # Validate each row
-    for index, row in df.iterrows():
-        row_errors = []
-        row_data = {}
-        
-        try:
-            # Employee ID validation
-            employee_id = str(row['Employee ID']).upper().strip()
-            if not re.match(r'^(MGJ[0-9]{5}|MP[0-9]{4})$', employee_id):
-                row_errors.append(f'Row {index+2}: Invalid Employee ID format')
-            elif CustomUser.objects.filter(employee_id=employee_id).exists():
-                row_errors.append(f'Row {index+2}: Employee ID already exists')
-            else:
-                row_data['employee_id'] = employee_id
-            
-            # Name validation
-            first_name = str(row['First Name']).upper().strip()
-            last_name = str(row['Last Name']).upper().strip()
-            if not first_name or first_name == 'nan':
-                row_errors.append(f'Row {index+2}: First Name is required')
-            else:
-                row_data['first_name'] = first_name
-            
-            if not last_name or last_name == 'nan':
-                row_errors.append(f'Row {index+2}: Last Name is required')
-            else:
-                row_data['last_name'] = last_name
-            
-            # Designation validation
-            designation = str(row['Designation']).strip()
-            valid_designations = ['MT', 'DC', 'Support', 'Associate', 'Manager', 'HR', 'Delivery Head']
-            if designation not in valid_designations:
-                row_errors.append(f'Row {index+2}: Invalid designation')
-            else:
-                row_data['designation'] = designation
-            
-            # Department validation
-            department = str(row['Department']).strip()
-            valid_departments = [choice[0] for choice in CustomUser.DEPARTMENT_CHOICES]
-            if department not in valid_departments:
-                row_errors.append(f'Row {index+2}: Invalid department')
-            else:
-                row_data['department'] = department
-            
-            # Contact number validation
-            contact = re.sub(r'[^0-9]', '', str(row['Contact Number']))
-            if not re.match(r'^[0-9]{10}$', contact):
-                row_errors.append(f'Row {index+2}: Invalid contact number format')
-            elif CustomUser.objects.filter(contact_number=contact).exists():
-                row_errors.append(f'Row {index+2}: Contact number already exists')
-            else:
-                row_data['contact_number'] = contact
-            
-            # Email validation
-            email = str(row['Email ID']).lower().strip()
-            if not re.match(r'^[^\s@]+@[^\s@]+\.[^\s@]+$', email):
-                row_errors.append(f'Row {index+2}: Invalid email format')
-            elif CustomUser.objects.filter(email=email).exists():
-                row_errors.append(f'Row {index+2}: Email already exists')
-            else:
-                row_data['email'] = email
-            
-            # Password validation
-            password = str(row['Password'])
-            confirm_password = str(row['Confirm Password'])
-            if len(password) < 12 or len(password) > 16:
-                row_errors.append(f'Row {index+2}: Password must be 12-16 characters')
-            elif not re.match(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*[0-9])(?=.*[!@#$%^&*]).*$', password):
-                row_errors.append(f'Row {index+2}: Password must include uppercase, lowercase, number, and symbol')
-            elif password != confirm_password:
-                row_errors.append(f'Row {index+2}: Passwords do not match')
-            else:
-                row_data['password'] = password
-            
-            # Role-specific validation
-            if employee_id.startswith('MGJ'):  # Field Officer
-                if designation not in ['MT', 'DC', 'Support', 'Associate']:
-                    row_errors.append(f'Row {index+2}: Invalid designation for Field Officer')
-                
-                # DCCB validation
-                if designation == 'Associate':
-                    # Multiple DCCB for Associates (if provided in Excel)
-                    if 'DCCB' in df.columns and pd.notna(row['DCCB']):
-                        dccb_list = [d.strip() for d in str(row['DCCB']).split(',')]
-                        valid_dccbs = [choice[0] for choice in CustomUser.DCCB_CHOICES]
-                        invalid_dccbs = [d for d in dccb_list if d not in valid_dccbs]
-                        if invalid_dccbs:
-                            row_errors.append(f'Row {index+2}: Invalid DCCB(s): {", ".join(invalid_dccbs)}')
-                        else:
-                            row_data['multiple_dccb'] = dccb_list
-                else:
-                    # Single DCCB for other Field Officers
-                    if 'DCCB' in df.columns and pd.notna(row['DCCB']):
-                        dccb = str(row['DCCB']).strip()
-                        valid_dccbs = [choice[0] for choice in CustomUser.DCCB_CHOICES]
-                        if dccb not in valid_dccbs:
-                            row_errors.append(f'Row {index+2}: Invalid DCCB')
-                        else:
-                            row_data['dccb'] = dccb
-                    else:
-                        row_errors.append(f'Row {index+2}: DCCB is required for Field Officers')
-                
-                # Reporting Manager validation
-                if 'Reporting Manager' in df.columns and pd.notna(row['Reporting Manager']):
-                    row_data['reporting_manager'] = str(row['Reporting Manager']).upper().strip()
-                else:
-                    row_errors.append(f'Row {index+2}: Reporting Manager is required for Field Officers')
-            
-            elif employee_id.startswith('MP'):  # Admin
-                if designation not in ['Manager', 'HR', 'Delivery Head']:
-                    row_errors.append(f'Row {index+2}: Invalid designation for Admin user')
-            
-            # Add to preview data
-            preview_row = {
-                'row_number': index + 2,
-                'employee_id': employee_id,
-                'name': f"{first_name} {last_name}",
-                'designation': designation,
-                'department': department,
-                'contact': contact,
-                'email': email,
-                'errors': row_errors
-            }
-            preview_data.append(preview_row)
-            
-            if not row_errors:
-                validated_data.append(row_data)
-            else:
-                errors.extend(row_errors)
-        
-        except Exception as e:
-            error_msg = f'Row {index+2}: Error processing data - {str(e)}'
-            errors.append(error_msg)
-            preview_data.append({
-                'row_number': index + 2,
-                'employee_id': 'Error',
-                'name': 'Error',
-                'designation': 'Error',
-                'department': 'Error',
-                'contact': 'Error',
-                'email': 'Error',
-                'errors': [error_msg]
-            })
+    return render(request, 'authe/bulk_upload.html', {
+        'form': BulkUploadForm(),
+        'batch': batch,
+        'page_obj': page_obj,
+    })
+
+@login_required
+def bulk_upload_progress(request, batch_id):
+    """Commit progress for a staged upload"""
+    if request.user.role_level < 10:
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
     
-    return {
-        'is_valid': len(errors) == 0,
-        'errors': errors,
-        'data': validated_data,
-        'preview_data': preview_data
-    }
+    batch = batches_for(request.user).filter(id=batch_id).first()
+    if not batch:
+        return JsonResponse({'success': False, 'error': 'Upload not found'}, status=404)
+    
+    return JsonResponse({
+        'success': True,
+        'status': batch.status,
+        'total_rows': batch.total_rows,
+        'valid_rows': batch.valid_rows,
+        'error_rows': batch.error_rows,
+        'created_rows': batch.created_rows,
+        'progress_percent': batch.progress_percent
+    })
 
 @login_required
 def download_template(request):
@@ -0,0 +1,76 @@
+"""
+Streaming CSV Export - shared layer for the attendance, employee and travel exports
+Rows are pulled from values() projections in chunks and flushed to the client as they are written
+"""
+import csv
+from io import StringIO
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+def get_chunk_size():
+    """Rows fetched per database round trip"""
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+def get_flush_rows():
+    """Rows buffered before a chunk of CSV is sent to the client"""
+    return getattr(settings, 'EXPORT_FLUSH_ROWS', 500)
+
+def iter_values(queryset, *fields):
+    """Iterate a values() projection without caching the whole result set"""
+    return queryset.values(*fields).iterator(chunk_size=get_chunk_size())
+
+def iter_csv(header_rows, rows):
+    """
+    Encode rows as CSV text incrementally.
+    Header rows are flushed immediately so the download starts before the first query finishes.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for header in header_rows:
+        writer.writerow(header)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    
+    flush_rows = get_flush_rows()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= flush_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    
+    if pending:
+        yield buffer.getvalue()
+
+class ChunkedStreamingHttpResponse(StreamingHttpResponse):
+    """
+    StreamingHttpResponse that also streams under ASGI.
+    Django 4.2 serves a sync iterator to ASGI by reading it into a list first; here each chunk is
+    pulled separately in the request's thread (thread_sensitive), next to the view's database connection.
+    """
+    
+    async def __aiter__(self):
+        if self.is_async:
+            async for part in super().__aiter__():
+                yield part
+            return
+        
+        parts = self.streaming_content
+        next_part = sync_to_async(next, thread_sensitive=True)
+        while True:
+            # streaming_content yields bytes, so None only marks the end
+            part = await next_part(parts, None)
+            if part is None:
+                return
+            yield part
+
+def stream_csv(filename, header, rows):
+    """Streaming response for a CSV download - header first, then rows as they are produced"""
+    response = ChunkedStreamingHttpResponse(iter_csv([header], rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -10,6 +10,8 @@ from datetime import datetime, timedelta, time
 from .models import CustomUser, Attendance, LeaveRequest, AttendanceAuditLog, TravelRequest, SystemAuditLog
 from .views import create_audit_log
 from .enterprise_permissions import check_hierarchy_permission, log_enterprise_action
+from .team_confirmation import confirm_team_attendance_range
+from .geofence import geofence_fields
 import json
 import math
 
@@ -160,7 +162,6 @@ def mark_attendance(request):
                     'latitude': float(latitude),
                     'longitude': float(longitude),
                     'location_accuracy': float(accuracy) if accuracy else 999,
-                    'is_location_valid': True,
                 })
             
             # Add travel comment if travel not required
@@ -179,15 +180,22 @@ def mark_attendance(request):
                 # travel_approved reflects Associate's approval, not user's choice
                 attendance_data['travel_approved'] = approved_travel_exists
             
+            # Geofence against the DCCB office
+            if 'latitude' in attendance_data:
+                attendance_data.update(geofence_fields(
+                    attendance_data['latitude'], attendance_data['longitude'],
+                    request.user.dccb, attendance_data.get('travel_approved', False)
+                ))
+            
             attendance = Attendance.objects.create(**attendance_data)
             
             # Send notification to DC and Admin
-            from .notification_service import notify_attendance_marked, notify_attendance_late_arrival
-            notify_attendance_marked(attendance)
+            from .notification_service import queue_notification
+            queue_notification('notify_attendance_marked', attendance)
             
             # Check for late arrival and send additional notification
             if current_time and current_time > time(9, 30) and status != 'absent':
-                notify_attendance_late_arrival(attendance)
+                queue_notification('notify_attendance_late_arrival', attendance)
             
             # Create audit log
             create_audit_log(
@@ -393,8 +401,8 @@ def apply_leave(request):
             )
             
             # Send notification to admins
-            from .notification_service import notify_leave_request
-            notify_leave_request(leave_request)
+            from .notification_service import queue_notification
+            queue_notification('notify_leave_request', leave_request)
             
             messages.success(request, 'Leave application submitted successfully')
             return redirect('field_dashboard')
@@ -436,37 +444,9 @@ def confirm_team_attendance(request):
             designation__in=['MT', 'Support']
         ).exclude(id=request.user.id)
         
-        confirmed_count = 0
-        
-        # Process each team member's attendance
-        for member in team_members:
-            current_date = start_date
-            while current_date <= end_date:
-                # Get or create attendance record
-                attendance, created = Attendance.objects.get_or_create(
-                    user=member,
-                    date=current_date,
-                    defaults={
-                        'status': 'absent',  # Mark as absent if not marked
-                        'is_confirmed_by_dc': True,
-                        'confirmed_by_dc': request.user,
-                        'dc_confirmed_at': timezone.now(),
-                        'confirmation_source': 'DC'
-                    }
-                )
-                
-                # If record exists but not confirmed, confirm it
-                if not created and not attendance.is_confirmed_by_dc:
-                    attendance.is_confirmed_by_dc = True
-                    attendance.confirmed_by_dc = request.user
-                    attendance.dc_confirmed_at = timezone.now()
-                    attendance.confirmation_source = 'DC'
-                    attendance.save()
-                    confirmed_count += 1
-                elif created:
-                    confirmed_count += 1
-                
-                current_date += timedelta(days=1)
+        # Insert missing days and confirm unconfirmed rows in one transaction
+        counts = confirm_team_attendance_range(request.user, team_members, start_date, end_date)
+        confirmed_count = counts['total']
         
         # Create audit log
         AttendanceAuditLog.objects.create(
@@ -480,14 +460,16 @@ def confirm_team_attendance(request):
         )
         
         # Send notification to admins about DC confirmation
-        from .notification_service import notify_dc_confirmation
+        from .notification_service import queue_notification
         date_range = f"{start_date} to {end_date}"
-        notify_dc_confirmation(request.user, confirmed_count, date_range)
+        queue_notification('notify_dc_confirmation', request.user, confirmed_count, date_range)
         
         return JsonResponse({
             'success': True,
             'message': f'Successfully confirmed {confirmed_count} attendance records',
-            'confirmed_records': confirmed_count
+            'confirmed_records': confirmed_count,
+            'created_records': counts['created'],
+            'updated_records': counts['confirmed']
         })
         
     except Exception as e:
@@ -7,6 +7,7 @@ from django.views.decorators.csrf import csrf_exempt
 from datetime import datetime, time
 from .models import CustomUser, Attendance, TravelRequest
 from .enterprise_permissions import log_enterprise_action
+from .geofence import geofence_fields
 import json
 import math
 
@@ -108,9 +109,12 @@ def handle_check_in(request, data, today, current_time):
             'latitude': float(latitude),
             'longitude': float(longitude),
             'location_accuracy': float(accuracy) if accuracy else 999,
-            'is_location_valid': True,
             'location_address': f'GPS: {accuracy}m accuracy' if accuracy else 'GPS Location'
         }
+        # Geofence against the DCCB office
+        location_data.update(geofence_fields(
+            location_data['latitude'], location_data['longitude'], request.user.dccb, travel_approved
+        ))
     
     # Create attendance record
     attendance = Attendance.objects.create(
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -6,10 +7,14 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import update_session_auth_hash
 from django.utils import timezone
 from django.db import transaction
-from .models import CustomUser, Attendance, TravelRequest, LeaveRequest
+from django.db.models import Count
+from django.core.paginator import Paginator
+from .models import CustomUser, Attendance, TravelRequest, LeaveRequest, GPSAnomaly
 from .notification_service import create_notification
+from .leave_attendance import apply_leave, revert_leave
+from .middleware import get_query_stats, reset_query_stats
 import json
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 
 def super_admin_required(view_func):
     """Decorator to ensure only Super Admin (role_level >= 10) can access"""
@@ -129,7 +134,7 @@ def status_reversal_management(request):
     ).order_by('-date')
     
     travel_requests = TravelRequest.objects.all().order_by('-created_at')[:50]
-    leave_requests = LeaveRequest.objects.all().order_by('-created_at')[:50]
+    leave_requests = LeaveRequest.objects.select_related('user').order_by('-applied_at')[:50]
     
     context = {
         'attendance_records': attendance_records,
@@ -138,6 +143,62 @@ def status_reversal_management(request):
     }
     return render(request, 'authe/status_reversal_management.html', context)
 
+@login_required
+@super_admin_required
+def gps_anomalies(request):
+    """GPS anomalies stored by the nightly detect_gps_anomalies job"""
+    try:
+        to_date = datetime.strptime(request.GET.get('to_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        to_date = timezone.localdate()
+    try:
+        from_date = datetime.strptime(request.GET.get('from_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        from_date = to_date - timedelta(days=7)
+    kind = request.GET.get('kind', '')
+    dccb = request.GET.get('dccb', '')
+    
+    anomalies = GPSAnomaly.objects.filter(date__range=(from_date, to_date))
+    if dccb:
+        anomalies = anomalies.filter(user__dccb=dccb)
+    kind_counts = dict(anomalies.order_by().values_list('kind').annotate(total=Count('id')))
+    if kind:
+        anomalies = anomalies.filter(kind=kind)
+    
+    paginator = Paginator(anomalies.select_related('user', 'attendance'), 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_query = request.GET.copy()
+    page_query.pop('page', None)
+    
+    context = {
+        'page_obj': page_obj,
+        'page_query': page_query.urlencode(),
+        'kind_counts': [(value, label, kind_counts.get(value, 0)) for value, label in GPSAnomaly.KIND_CHOICES],
+        'kind_filter': kind,
+        'dccb_filter': dccb,
+        'dccb_choices': CustomUser.DCCB_CHOICES,
+        'from_date': from_date,
+        'to_date': to_date,
+    }
+    return render(request, 'authe/gps_anomalies.html', context)
+
+@login_required
+@super_admin_required
+def query_stats(request):
+    """Per-view query counts, DB time and likely N+1 queries recorded by QueryBudgetMiddleware in this worker"""
+    if request.method == 'POST' and request.POST.get('action') == 'reset':
+        reset_query_stats()
+        messages.success(request, 'Query statistics reset')
+        return redirect('query_stats')
+    
+    context = {
+        'enabled': getattr(settings, 'QUERY_BUDGET_ENABLED', False),
+        'stats': get_query_stats(),
+        'default_budget': getattr(settings, 'QUERY_BUDGET_DEFAULT', 50),
+        'repeat_threshold': getattr(settings, 'QUERY_REPEAT_THRESHOLD', 10),
+    }
+    return render(request, 'authe/query_stats.html', context)
+
 @csrf_exempt
 @login_required
 @super_admin_required
@@ -211,6 +272,48 @@ def reverse_travel_status(request):
     
     return JsonResponse({'success': False, 'message': 'Invalid request'})
 
+@csrf_exempt
+@login_required
+@super_admin_required
+def reverse_leave_status(request):
+    """Reverse leave request status - leave attendance is applied or undone to match"""
+    if request.method == 'POST':
+        data = json.loads(request.body)
+        leave_id = data.get('leave_id')
+        new_status = data.get('new_status')  # 'pending', 'approved', 'rejected'
+        
+        if new_status not in ['pending', 'approved', 'rejected']:
+            return JsonResponse({'success': False, 'message': 'Invalid status'})
+        
+        try:
+            with transaction.atomic():
+                leave_request = LeaveRequest.objects.select_for_update().select_related('user').get(id=leave_id)
+                old_status = leave_request.status
+                leave_request.status = new_status
+                leave_request.approved_by = request.user if new_status == 'approved' else None
+                leave_request.approved_at = timezone.now() if new_status == 'approved' else None
+                leave_request.save()
+                
+                if old_status == 'approved' and new_status != 'approved':
+                    revert_leave(leave_request)
+                elif new_status == 'approved' and old_status != 'approved':
+                    apply_leave(leave_request)
+            
+            # Create notification
+            create_notification(
+                recipient=leave_request.user,
+                notification_type='leave_approval',
+                title='Leave Request Status Changed',
+                message=f'Your leave request status changed from {old_status} to {new_status} by Super Admin.',
+                priority='high'
+            )
+            
+            return JsonResponse({'success': True, 'message': f'Leave status changed to {new_status}'})
+        except LeaveRequest.DoesNotExist:
+            return JsonResponse({'success': False, 'message': 'Leave request not found'})
+    
+    return JsonResponse({'success': False, 'message': 'Invalid request'})
+
 @csrf_exempt
 @login_required
 @super_admin_required
@@ -259,11 +362,14 @@ def bulk_status_operations(request):
                         approved_by=request.user,
                         approved_at=timezone.now()
                     )
+                    # .update() bypasses TravelRequest.save, so refresh attendance dependencies explicitly
+                    TravelRequest.update_attendance_dependencies(travels)
                     return JsonResponse({'success': True, 'message': f'{count} travel requests approved'})
                 
                 elif operation == 'bulk_reject_travel':
                     travels = TravelRequest.objects.filter(id__in=record_ids)
                     count = travels.update(status='rejected')
+                    TravelRequest.update_attendance_dependencies(travels)
                     return JsonResponse({'success': True, 'message': f'{count} travel requests rejected'})
                 
         except Exception as e:
@@ -63,18 +63,21 @@ def check_hierarchy_permission(user, target_user, action):
     return False
 
 def log_enterprise_action(user, action_type, target_table, target_id, old_value=None, new_value=None, ip_address=None):
-    """Enterprise audit logging for MMP"""
-    from .models import SystemAuditLog
+    """Enterprise audit logging for MMP - queued for the background worker"""
+    from django.utils import timezone
+    from .task_queue import enqueue
     
     try:
-        SystemAuditLog.objects.create(
-            actor=user,
-            action_type=action_type,
-            target_table=target_table,
-            target_id=str(target_id),
-            old_value=old_value,
-            new_value=new_value,
-            ip_address=ip_address or '127.0.0.1'
+        enqueue(
+            'write_enterprise_action',
+            user.id,
+            action_type,
+            target_table,
+            str(target_id),
+            old_value,
+            new_value,
+            ip_address or '127.0.0.1',
+            occurred_at=timezone.now()
         )
     except Exception as e:
         # Never fail the main operation due to audit logging
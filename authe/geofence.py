@@ -0,0 +1,83 @@
+"""
+Geofence Engine - distance from the DCCB office and location validity for attendance rows
+Distances are computed for whole batches at once with a NumPy haversine; office coordinates and radii
+come from the DCCB_OFFICE_LOCATIONS setting.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from .models import Attendance
+
+EARTH_RADIUS_M = 6371000.0
+
+def office_locations():
+    """DCCB -> (latitude, longitude, radius_m); the radius defaults to GEOFENCE_DEFAULT_RADIUS"""
+    default_radius = getattr(settings, 'GEOFENCE_DEFAULT_RADIUS', 200)
+    locations = {}
+    for dccb, office in getattr(settings, 'DCCB_OFFICE_LOCATIONS', {}).items():
+        latitude, longitude, *radius = office
+        locations[dccb] = (float(latitude), float(longitude), float(radius[0] if radius else default_radius))
+    return locations
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in meters between arrays of coordinates (degrees)"""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(values, dtype=float)) for values in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+def evaluate(latitudes, longitudes, dccbs, travel_approved):
+    """
+    Geofence a batch of positions.
+    Returns (distances, valid): distance to the DCCB office in meters (NaN where the DCCB has no configured office)
+    and validity - inside the radius, travel approved, or no office to check against.
+    """
+    locations = office_locations()
+    office = np.array([locations.get(dccb, (np.nan, np.nan, np.nan)) for dccb in dccbs], dtype=float).reshape(-1, 3)
+    distances = haversine_m(latitudes, longitudes, office[:, 0], office[:, 1])
+    valid = np.isnan(distances) | (distances <= office[:, 2]) | np.asarray(travel_approved, dtype=bool)
+    return distances, valid
+
+def geofence_fields(latitude, longitude, dccb, travel_approved=False):
+    """distance_from_office/is_location_valid for one check-in, as keyword arguments for Attendance.objects.create()"""
+    if latitude is None or longitude is None:
+        return {'distance_from_office': None, 'is_location_valid': False}
+    
+    distances, valid = evaluate([latitude], [longitude], [dccb], [travel_approved])
+    return {
+        'distance_from_office': None if np.isnan(distances[0]) else round(float(distances[0]), 1),
+        'is_location_valid': bool(valid[0])
+    }
+
+def backfill_geofence(queryset, batch_size=2000):
+    """
+    Recompute the geofence for every GPS row of an Attendance queryset, batch_size rows at a time.
+    Returns the number of rows written.
+    """
+    rows = queryset.filter(latitude__isnull=False, longitude__isnull=False).order_by().values_list(
+        'id', 'latitude', 'longitude', 'user__dccb', 'travel_approved'
+    )
+    written = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            written += _write_batch(batch)
+            batch = []
+    if batch:
+        written += _write_batch(batch)
+    return written
+
+def _write_batch(batch):
+    ids, latitudes, longitudes, dccbs, travel_approved = zip(*batch)
+    distances, valid = evaluate(latitudes, longitudes, dccbs, travel_approved)
+    updates = [
+        Attendance(
+            id=attendance_id,
+            distance_from_office=None if np.isnan(distance) else round(float(distance), 1),
+            is_location_valid=bool(is_valid)
+        )
+        for attendance_id, distance, is_valid in zip(ids, distances, valid)
+    ]
+    with transaction.atomic():
+        Attendance.objects.bulk_update(updates, ['distance_from_office', 'is_location_valid'], batch_size=500)
+    return len(updates)
@@ -0,0 +1,77 @@
+"""
+Geohash - base32 geohash encoding and prefix ranges for the Attendance spatial index
+Cells are plain strings, so prefix lookups become index range scans on SQLite and PostgreSQL alike
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+MAX_PRECISION = 12
+ATTENDANCE_PRECISION = 8  # ~38m x 19m cells stored on Attendance.geohash
+
+def encode(latitude, longitude, precision=8):
+    """Geohash of a position; precision is the number of base32 characters"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        span, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (span[0] + span[1]) / 2
+        if coordinate >= middle:
+            value = value * 2 + 1
+            span[0] = middle
+        else:
+            value = value * 2
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+def cell_dimensions(precision):
+    """(height, width) of a cell in degrees"""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lng_bits
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng, precision):
+    """Geohashes of every cell at this precision that intersects the box"""
+    height, width = cell_dimensions(precision)
+    
+    def steps(low, high, size, origin, limit):
+        first = math.floor((low - origin) / size)
+        last = min(math.floor((high - origin) / size), int(round(limit / size)) - 1)
+        return range(max(first, 0), last + 1)
+    
+    cells = []
+    for row in steps(min_lat, max_lat, height, -90.0, 180.0):
+        for column in steps(min_lng, max_lng, width, -180.0, 360.0):
+            cells.append(encode(-90.0 + (row + 0.5) * height, -180.0 + (column + 0.5) * width, precision))
+    return cells
+
+def cells_for_bbox(min_lat, min_lng, max_lat, max_lng, max_cells=16, max_precision=ATTENDANCE_PRECISION):
+    """
+    Finest covering of the box that needs at most max_cells prefixes.
+    Returns [] when even single-character cells would exceed max_cells.
+    """
+    best = []
+    for precision in range(1, max_precision + 1):
+        height, width = cell_dimensions(precision)
+        estimate = (math.floor(max_lat / height) - math.floor(min_lat / height) + 1) * \
+            (math.floor(max_lng / width) - math.floor(min_lng / width) + 1)
+        if estimate > max_cells:
+            break
+        best = covering_cells(min_lat, min_lng, max_lat, max_lng, precision)
+    return best
+
+def prefix_upper_bound(prefix):
+    """Smallest geohash string greater than every geohash starting with prefix, or None for 'zzz...'"""
+    prefix = prefix.rstrip(BASE32[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + BASE32[BASE32.index(prefix[-1]) + 1]
@@ -0,0 +1,169 @@
+"""
+GPS Anomalies - batch detection of suspicious check-in coordinates
+A date range of GPS attendance is loaded into NumPy arrays once; each check is a vectorized pass
+over those arrays and the findings replace the range's rows in GPSAnomaly.
+"""
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from .geofence import haversine_m
+from .models import Attendance, CustomUser, GPSAnomaly
+
+DEFAULT_CHECK_IN_SECONDS = 12 * 3600  # GPS rows without a check-in time are placed at noon
+
+def load_positions(from_date, to_date):
+    """GPS attendance in the range as parallel arrays, sorted by user and check-in time"""
+    rows = Attendance.objects.filter(
+        date__range=(from_date, to_date),
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).order_by().values_list('id', 'user_id', 'date', 'check_in_time', 'latitude', 'longitude', 'location_accuracy')
+    
+    ids, users, dates, timestamps, latitudes, longitudes, accuracies = [], [], [], [], [], [], []
+    for attendance_id, user_id, day, check_in_time, latitude, longitude, accuracy in rows.iterator(chunk_size=5000):
+        seconds = check_in_time.hour * 3600 + check_in_time.minute * 60 + check_in_time.second \
+            if check_in_time else DEFAULT_CHECK_IN_SECONDS
+        ids.append(attendance_id)
+        users.append(user_id)
+        dates.append(day)
+        timestamps.append(day.toordinal() * 86400 + seconds)
+        latitudes.append(latitude)
+        longitudes.append(longitude)
+        accuracies.append(np.nan if accuracy is None else accuracy)
+    
+    users = np.array(users, dtype=np.int64)
+    timestamps = np.array(timestamps, dtype=np.int64)
+    order = np.lexsort((timestamps, users))
+    return {
+        'ids': [ids[i] for i in order],
+        'dates': [dates[i] for i in order],
+        'users': users[order],
+        'timestamps': timestamps[order],
+        'latitudes': np.array(latitudes, dtype=float)[order],
+        'longitudes': np.array(longitudes, dtype=float)[order],
+        'accuracies': np.array(accuracies, dtype=float)[order],
+    }
+
+def coordinate_groups(latitudes, longitudes, days=None):
+    """
+    Group number per row - rows share a group when their coordinates match to GPS_SHARED_DECIMALS places
+    (and, when days are given, fall on the same day)
+    """
+    scale = 10 ** getattr(settings, 'GPS_SHARED_DECIMALS', 5)
+    lat_key = np.round(latitudes * scale).astype(np.int64)
+    lng_key = np.round(longitudes * scale).astype(np.int64)
+    keys = [lat_key, lng_key] if days is None else [days, lat_key, lng_key]
+    _, groups = np.unique(np.stack(keys, axis=1), axis=0, return_inverse=True)
+    return groups.reshape(-1)
+
+def shared_coordinate_flags(day_groups, point_groups, users):
+    """
+    Per row: how many distinct users checked in at exactly this point that day (shared_coordinates when >= 2)
+    and how many times this user reported the point in the range (stale_fix when >= 2 - a real fix always jitters).
+    """
+    group_users = np.unique(np.stack([day_groups, users], axis=1), axis=0)
+    users_per_group = np.bincount(group_users[:, 0], minlength=day_groups.max() + 1)
+    _, pair_index, pair_counts = np.unique(
+        np.stack([point_groups, users], axis=1), axis=0, return_inverse=True, return_counts=True
+    )
+    return users_per_group[day_groups], pair_counts[pair_index.reshape(-1)]
+
+def travel_speeds(users, timestamps, latitudes, longitudes):
+    """
+    Per row: distance (m) and speed (km/h) from the same user's previous check-in; NaN for a user's first row.
+    Check-ins closer than a minute apart are treated as one minute.
+    """
+    distances = np.full(len(users), np.nan)
+    speeds = np.full(len(users), np.nan)
+    if len(users) < 2:
+        return distances, speeds
+    same_user = users[1:] == users[:-1]
+    hops = haversine_m(latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:])
+    hours = np.maximum(timestamps[1:] - timestamps[:-1], 60) / 3600
+    distances[1:] = np.where(same_user, hops, np.nan)
+    speeds[1:] = np.where(same_user, hops / 1000 / hours, np.nan)
+    return distances, speeds
+
+def detect_anomalies(from_date, to_date):
+    """
+    Unsaved GPSAnomaly rows for check-ins dated from_date..to_date.
+    The day before from_date is loaded too so the first day's check-ins have a previous position.
+    """
+    positions = load_positions(from_date - timedelta(days=1), to_date)
+    if not positions['ids']:
+        return []
+    users = positions['users']
+    latitudes, longitudes = positions['latitudes'], positions['longitudes']
+    in_range = np.array([day >= from_date for day in positions['dates']], dtype=bool)
+    if not in_range.any():
+        return []
+    
+    # The context day only feeds travel_speeds - coordinate checks look at the range's own rows
+    rows = np.flatnonzero(in_range)
+    days = np.array([day.toordinal() for day in positions['dates']], dtype=np.int64)
+    groups = np.full(len(users), -1, dtype=np.int64)
+    users_at_point = np.zeros(len(users), dtype=np.int64)
+    user_repeats = np.zeros(len(users), dtype=np.int64)
+    groups[rows] = coordinate_groups(latitudes[rows], longitudes[rows], days[rows])
+    users_at_point[rows], user_repeats[rows] = shared_coordinate_flags(
+        groups[rows], coordinate_groups(latitudes[rows], longitudes[rows]), users[rows]
+    )
+    distances, speeds = travel_speeds(users, positions['timestamps'], latitudes, longitudes)
+    accuracies = positions['accuracies']
+    
+    with np.errstate(invalid='ignore'):
+        flags = {
+            'shared_coordinates': (users_at_point >= 2, users_at_point),
+            'stale_fix': (user_repeats >= 2, user_repeats),
+            'impossible_travel': (
+                (speeds > getattr(settings, 'GPS_MAX_SPEED_KMH', 200)) &
+                (distances >= getattr(settings, 'GPS_MIN_JUMP_M', 1000)),
+                speeds
+            ),
+            'poor_accuracy': (accuracies > getattr(settings, 'GPS_MAX_ACCURACY_M', 200), accuracies),
+        }
+    
+    # Employee IDs for the details - only the users that are actually involved
+    flagged_any = in_range & np.logical_or.reduce([mask for mask, _ in flags.values()])
+    shared_rows = np.flatnonzero(in_range & flags['shared_coordinates'][0])
+    involved = set(users[flagged_any].tolist()) | set(users[np.isin(groups, groups[shared_rows])].tolist())
+    employee_ids = dict(CustomUser.objects.filter(id__in=involved).values_list('id', 'employee_id'))
+    
+    sharers = {}
+    for row in np.flatnonzero(np.isin(groups, groups[shared_rows])):
+        sharers.setdefault(groups[row], set()).add(employee_ids.get(users[row]))
+    
+    anomalies = []
+    for kind, (mask, values) in flags.items():
+        for row in np.flatnonzero(in_range & mask):
+            if kind == 'shared_coordinates':
+                detail = {'employees': sorted(sharers[groups[row]] - {employee_ids.get(users[row])})[:10]}
+            elif kind == 'impossible_travel':
+                detail = {
+                    'distance_km': round(float(distances[row]) / 1000, 1),
+                    'previous_date': positions['dates'][row - 1].isoformat()
+                }
+            else:
+                detail = {}
+            anomalies.append(GPSAnomaly(
+                attendance_id=positions['ids'][row],
+                user_id=int(users[row]),
+                date=positions['dates'][row],
+                kind=kind,
+                value=round(float(values[row]), 1),
+                detail=detail
+            ))
+    return anomalies
+
+def refresh_anomalies(from_date, to_date):
+    """Replace the range's stored anomalies with a fresh detection pass. Returns {kind: count}."""
+    anomalies = detect_anomalies(from_date, to_date)
+    with transaction.atomic():
+        GPSAnomaly.objects.filter(date__range=(from_date, to_date)).delete()
+        GPSAnomaly.objects.bulk_create(anomalies, batch_size=2000)
+    
+    counts = {kind: 0 for kind, _ in GPSAnomaly.KIND_CHOICES}
+    for anomaly in anomalies:
+        counts[anomaly.kind] += 1
+    return counts
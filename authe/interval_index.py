@@ -0,0 +1,70 @@
+"""
+Interval Index - per-user date interval lookup for travel and leave enrichment
+Overlapping requests are flattened into disjoint day segments, so each lookup is one bisect
+"""
+import heapq
+from bisect import bisect_right
+
+class IntervalIndex:
+    """
+    Sorted, non-overlapping day segments for one user.
+    Where requests overlap, the one with the highest priority wins the segment.
+    """
+    
+    def __init__(self, intervals):
+        # intervals: iterable of (start_date, end_date, priority, payload)
+        self.starts = []
+        self.ends = []
+        self.payloads = []
+        
+        # Rank by priority once so the sweep heap only compares integers
+        ranked = sorted(
+            (item for item in intervals if item[0] <= item[1]),
+            key=lambda item: item[2]
+        )
+        intervals = sorted(
+            (start.toordinal(), end.toordinal(), rank, payload)
+            for rank, (start, end, priority, payload) in enumerate(ranked)
+        )
+        if not intervals:
+            return
+        
+        # Sweep the interval boundaries, keeping active intervals in a max-heap by rank
+        boundaries = sorted({item[0] for item in intervals} | {item[1] + 1 for item in intervals})
+        active = []
+        position = 0
+        for segment_start, next_boundary in zip(boundaries, boundaries[1:]):
+            while position < len(intervals) and intervals[position][0] <= segment_start:
+                start, end, rank, payload = intervals[position]
+                heapq.heappush(active, (-rank, end, payload))
+                position += 1
+            while active and active[0][1] < segment_start:
+                heapq.heappop(active)
+            if not active:
+                continue
+            
+            payload = active[0][2]
+            segment_end = next_boundary - 1
+            if self.payloads and self.payloads[-1] is payload and self.ends[-1] == segment_start - 1:
+                self.ends[-1] = segment_end
+            else:
+                self.starts.append(segment_start)
+                self.ends.append(segment_end)
+                self.payloads.append(payload)
+    
+    def find(self, day):
+        """Payload of the winning interval covering day, or None"""
+        ordinal = day.toordinal()
+        position = bisect_right(self.starts, ordinal) - 1
+        if position >= 0 and self.ends[position] >= ordinal:
+            return self.payloads[position]
+        return None
+
+def build_interval_indexes(rows, start_field, end_field, priority_field, user_field='user_id'):
+    """Group values() rows by user and build one IntervalIndex per user"""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[user_field], []).append(
+            (row[start_field], row[end_field], row[priority_field], row)
+        )
+    return {user_id: IntervalIndex(intervals) for user_id, intervals in grouped.items()}
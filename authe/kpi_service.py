@@ -0,0 +1,131 @@
+"""
+Dashboard KPI Service - single-pass counters for the admin dashboards
+Results are cached per date and dropped whenever attendance, travel or leave data changes
+"""
+from datetime import time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, Count, Q, Value
+from django.utils import timezone
+from .models import CustomUser, Attendance, LeaveRequest, TravelRequest
+
+LATE_CUTOFF = time(9, 30)
+KPI_CACHE_PREFIX = 'dashboard_kpis'
+KPI_VERSION_KEY = 'dashboard_kpis:version'
+
+def _cache_key(target_date):
+    """Versioned cache key so one bump invalidates every cached date"""
+    version = cache.get(KPI_VERSION_KEY, 0)
+    return f'{KPI_CACHE_PREFIX}:{version}:{target_date.isoformat()}'
+
+def invalidate_dashboard_kpis():
+    """Invalidate cached KPIs for all dates"""
+    try:
+        cache.incr(KPI_VERSION_KEY)
+    except ValueError:
+        cache.set(KPI_VERSION_KEY, 1, None)
+
+def compute_dashboard_kpis(target_date):
+    """
+    Compute every dashboard counter for target_date without caching.
+    Uses three queries: roster group-by, attendance aggregate, pending request counts.
+    """
+    # 1. Field officer roster - totals, designation and DCCB breakdowns in one group-by
+    roster = CustomUser.objects.filter(role='field_officer').order_by().values(
+        'designation', 'dccb', 'is_active'
+    ).annotate(count=Count('id'))
+    
+    total_employees = active_employees = 0
+    designation_counts = {}
+    dccb_counts = {}
+    for row in roster:
+        total_employees += row['count']
+        if row['is_active']:
+            active_employees += row['count']
+        designation_counts[row['designation']] = designation_counts.get(row['designation'], 0) + row['count']
+        if row['dccb'] is not None:
+            dccb_counts[row['dccb']] = dccb_counts.get(row['dccb'], 0) + row['count']
+    
+    # 2. Attendance - today's status mix and the cumulative approval backlogs
+    today = Q(date=target_date)
+    worked = Q(status__in=['present', 'half_day'])
+    attendance = Attendance.objects.filter(date__lte=target_date).aggregate(
+        present=Count('id', filter=today & Q(status='present')),
+        absent=Count('id', filter=today & (Q(status='absent') | Q(is_confirmed_by_dc=True, status='auto_not_marked'))),
+        absent_status=Count('id', filter=today & Q(status='absent')),
+        half_day=Count('id', filter=today & Q(status='half_day')),
+        late_arrivals=Count('id', filter=today & Q(status='present', check_in_time__gt=LATE_CUTOFF)),
+        late_time_status=Count('id', filter=today & Q(time_status='late')),
+        on_time=Count('id', filter=today & worked & Q(check_in_time__lte=LATE_CUTOFF)),
+        late=Count('id', filter=today & worked & Q(check_in_time__gt=LATE_CUTOFF)),
+        marked_today=Count('id', filter=today),
+        # DC Confirmation - ONLY MT and Support need DC confirmation
+        dc_pending=Count('id', filter=worked & Q(
+            user__designation__in=['MT', 'Support'],
+            is_confirmed_by_dc=False
+        )),
+        # Admin Approval - Associates, DCs (direct), and MT/Support (post-DC-confirmation)
+        admin_pending=Count('id', filter=worked & Q(is_approved_by_admin=False) & (
+            Q(user__designation__in=['Associate', 'DC']) |
+            Q(user__designation__in=['MT', 'Support'], is_confirmed_by_dc=True)
+        )),
+        # Super admin dashboard definitions - any unconfirmed row of the last 7 days, any
+        # DC-confirmed row not yet approved - kept alongside the workflow backlogs above
+        dc_unconfirmed_week=Count('id', filter=Q(
+            date__gte=target_date - timedelta(days=7),
+            is_confirmed_by_dc=False
+        )),
+        confirmed_unapproved=Count('id', filter=Q(is_confirmed_by_dc=True, is_approved_by_admin=False)),
+    )
+    
+    # 3. Pending travel and leave requests - UNION ALL of two counts
+    pending_travel = TravelRequest.objects.filter(status='pending').order_by().annotate(
+        kind=Value('travel', output_field=CharField())
+    ).values('kind').annotate(total=Count('id')).values_list('kind', 'total')
+    pending_leave = LeaveRequest.objects.filter(status='pending').order_by().annotate(
+        kind=Value('leave', output_field=CharField())
+    ).values('kind').annotate(total=Count('id')).values_list('kind', 'total')
+    pending = dict(pending_travel.union(pending_leave, all=True))
+    
+    return {
+        'date': target_date,
+        'total_employees': total_employees,
+        'active_employees': active_employees,
+        'designation_counts': [
+            {'designation': key, 'count': designation_counts[key]} for key in sorted(designation_counts)
+        ],
+        'dccb_counts': [
+            {'dccb': key, 'count': dccb_counts[key]} for key in sorted(dccb_counts)
+        ],
+        'attendance': {
+            'present': attendance['present'],
+            'absent': attendance['absent'],
+            'half_day': attendance['half_day'],
+            'late_arrivals': attendance['late_arrivals'],
+            'on_time': attendance['on_time'],
+            'late': attendance['late'],
+            'marked_today': attendance['marked_today'],
+            'not_marked': active_employees - attendance['marked_today'],
+            'absent_status': attendance['absent_status'],
+            'late_time_status': attendance['late_time_status'],
+        },
+        'approval_status': {
+            'dc_pending': attendance['dc_pending'],
+            'admin_pending': attendance['admin_pending'],
+            'travel_pending': pending.get('travel', 0),
+            'dc_unconfirmed_week': attendance['dc_unconfirmed_week'],
+            'confirmed_unapproved': attendance['confirmed_unapproved'],
+        },
+        'pending_leaves': pending.get('leave', 0),
+    }
+
+def get_dashboard_kpis(target_date=None):
+    """Get dashboard KPIs for target_date (default today), cached for KPI_CACHE_TTL seconds"""
+    target_date = target_date or timezone.localdate()
+    key = _cache_key(target_date)
+    
+    kpis = cache.get(key)
+    if kpis is None:
+        kpis = compute_dashboard_kpis(target_date)
+        cache.set(key, kpis, getattr(settings, 'KPI_CACHE_TTL', 30))
+    return kpis
@@ -0,0 +1,136 @@
+"""
+Leave Attendance - materializes approved leave as attendance rows and undoes it on reversal
+Missing days are inserted with one bulk_create and existing rows are updated with one bulk_update;
+every touched row keeps the leave id and what it overwrote in pre_leave_state so a reversal only
+puts back the days that leave holds.
+"""
+from datetime import timedelta
+from django.conf import settings
+from .attendance_grid import get_holiday_dates
+from .attendance_summary import summary_keys, refresh_summary
+from .kpi_service import invalidate_dashboard_kpis
+from .models import Attendance, LeaveRequest
+from .travel_resolver import TravelResolver
+
+def leave_remark(leave_request):
+    return f'On approved leave: {leave_request.leave_type}'
+
+def leave_days(leave_request):
+    """Dates covered by the leave - Sundays and holidays are skipped when LEAVE_SKIP_NON_WORKING_DAYS is set"""
+    days = []
+    current_date = leave_request.start_date
+    while current_date <= leave_request.end_date:
+        days.append(current_date)
+        current_date += timedelta(days=1)
+    
+    if getattr(settings, 'LEAVE_SKIP_NON_WORKING_DAYS', False):
+        holiday_dates = get_holiday_dates(leave_request.start_date, leave_request.end_date)
+        days = [day for day in days if day.weekday() != 6 and day not in holiday_dates]
+    return days
+
+def apply_leave(leave_request):
+    """
+    Mark every leave day absent with the leave remark - call inside the approval transaction.
+    Each row the leave takes over records the leave id and what it overwrote in pre_leave_state;
+    days already held by another approved leave stay with that leave.
+    Returns {'created': n, 'updated': n}.
+    """
+    user = leave_request.user
+    days = leave_days(leave_request)
+    remark = leave_remark(leave_request)
+    # Attendance.save rule: Associates and DCs never need DC confirmation
+    auto_confirmed = user.designation in ['Associate', 'DC']
+    
+    day_rows = list(Attendance.objects.filter(user=user, date__in=days).only(
+        'id', 'date', 'status', 'remarks', 'is_leave_day', 'pre_leave_state'
+    ))
+    existing = {attendance.date for attendance in day_rows}
+    leave_rows = [attendance for attendance in day_rows if attendance.pre_leave_state is None]
+    for attendance in leave_rows:
+        attendance.pre_leave_state = {
+            'leave': leave_request.id,
+            'status': attendance.status,
+            'remarks': attendance.remarks,
+            'is_leave_day': attendance.is_leave_day,
+        }
+        attendance.status = 'absent'
+        attendance.remarks = remark
+        attendance.is_leave_day = True
+    updated = Attendance.objects.bulk_update(leave_rows, ['status', 'remarks', 'is_leave_day', 'pre_leave_state'])
+    
+    missing = [
+        Attendance(user=user, date=day, status='absent', remarks=remark, is_leave_day=True,
+                   is_confirmed_by_dc=auto_confirmed, pre_leave_state={'leave': leave_request.id, 'created': True})
+        for day in days
+        if day not in existing
+    ]
+    # Travel flags as Attendance.save sets them on create
+    resolver = TravelResolver(missing)
+    for attendance in resolver:
+        if resolver.travel_for(attendance, 'pending') or resolver.travel_for(attendance, 'rejected'):
+            attendance.has_pending_travel = True
+            attendance.travel_dependency_status = 'Travel Approval Required'
+    Attendance.objects.bulk_create(missing, ignore_conflicts=True)
+    
+    # bulk_create and bulk_update bypass post_save, so refresh summaries and cached counters explicitly
+    refresh_summary({(day, user.dccb, user.designation) for day in days})
+    invalidate_dashboard_kpis()
+    return {'created': len(missing), 'updated': updated}
+
+def revert_leave(leave_request):
+    """
+    Undo apply_leave for a reversed leave using the state it recorded on the rows it holds.
+    Days another approved leave still covers are handed over to that leave and stay absent.
+    Otherwise rows the leave inserted are removed unless a check-in was added since (those get
+    their status back from the time status); rows it overwrote get their previous status and remarks back.
+    Rows marked before the state was recorded are left as they are.
+    Returns {'removed': n, 'restored': n, 'kept': n}.
+    """
+    leave_rows = Attendance.objects.filter(
+        user=leave_request.user,
+        date__range=(leave_request.start_date, leave_request.end_date),
+        pre_leave_state__leave=leave_request.id
+    )
+    touched_keys = summary_keys(leave_rows)
+    
+    # Later-approved leaves first, so a day covered by several goes to the latest approval
+    covering = {}
+    other_leaves = LeaveRequest.objects.filter(
+        user=leave_request.user, status='approved',
+        start_date__lte=leave_request.end_date, end_date__gte=leave_request.start_date
+    ).exclude(id=leave_request.id).order_by('approved_at', 'id')
+    for other_leave in other_leaves:
+        for day in leave_days(other_leave):
+            covering[day] = other_leave
+    
+    removable, restorable, kept = [], [], []
+    for attendance in leave_rows.only('id', 'date', 'check_in_time', 'time_status', 'pre_leave_state'):
+        previous = attendance.pre_leave_state
+        other_leave = covering.get(attendance.date)
+        if other_leave is not None:
+            attendance.pre_leave_state = dict(previous, leave=other_leave.id)
+            attendance.remarks = leave_remark(other_leave)
+            kept.append(attendance)
+            continue
+        if previous.get('created'):
+            if attendance.check_in_time is None:
+                removable.append(attendance.pk)
+                continue
+            attendance.status = 'half_day' if attendance.time_status == 'half_day_late' else 'present'
+            attendance.remarks = None
+            attendance.is_leave_day = False
+        else:
+            attendance.status = previous['status']
+            attendance.remarks = previous['remarks']
+            attendance.is_leave_day = previous['is_leave_day']
+        attendance.pre_leave_state = None
+        restorable.append(attendance)
+    
+    _, deleted = Attendance.objects.filter(pk__in=removable).delete()
+    removed = deleted.get(Attendance._meta.label, 0)
+    restored = Attendance.objects.bulk_update(restorable, ['status', 'remarks', 'is_leave_day', 'pre_leave_state'])
+    Attendance.objects.bulk_update(kept, ['remarks', 'pre_leave_state'])
+    
+    refresh_summary(touched_keys)
+    invalidate_dashboard_kpis()
+    return {'removed': removed, 'restored': restored, 'kept': len(kept)}
@@ -1,40 +1,95 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, Count, TextField, Value, When
+from django.db.models.functions import Concat
 from django.utils import timezone
-from datetime import time
+from datetime import datetime, time, timedelta
 from authe.models import Attendance
+from authe.attendance_summary import rebuild_summary
+from authe.kpi_service import invalidate_dashboard_kpis
+
+AUTO_CHECKOUT_TIME = time(18, 0)
+AUTO_REMARK = 'Auto-updated to Half Day (missed check-out)'
 
 class Command(BaseCommand):
-    help = 'Auto-update attendance to Half Day for missed check-outs'
+    help = 'Auto-update attendance to Half Day for missed check-outs (today after 6 PM, or any missed date range)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from-date', type=str, help='Start date (YYYY-MM-DD), defaults to --to-date')
+        parser.add_argument('--to-date', type=str, help='End date (YYYY-MM-DD), defaults to the latest closed day')
+        parser.add_argument('--catch-up', action='store_true',
+                          help='Start from the earliest day that still has open check-ins')
+        parser.add_argument('--include-reviewed', action='store_true',
+                          help='With a date range, also rewrite rows already approved by Admin or confirmed by a DC')
 
     def handle(self, *args, **options):
-        today = timezone.localdate()
-        current_time = timezone.localtime().time()
+        now = timezone.localtime()
+        today = now.date()
+        ranged = options['catch_up'] or options['from_date'] or options['to_date']
         
-        # Only run after 6 PM (18:00)
-        if current_time < time(18, 0):
-            self.stdout.write('Auto-update only runs after 6 PM')
-            return
+        # Find attendance records that are checked in but not checked out - only Present converts to Half Day
+        open_checkins = Attendance.objects.filter(status='present', check_out_time__isnull=True)
         
-        # Find attendance records that are checked in but not checked out
-        missed_checkouts = Attendance.objects.filter(
-            date=today,
-            status__in=['present'],  # Only convert Present to Half Day
-            check_out_time__isnull=True
-        )
+        if not ranged:
+            # Scheduled run - today only, after 6 PM (18:00)
+            if now.time() < AUTO_CHECKOUT_TIME:
+                self.stdout.write('Auto-update only runs after 6 PM')
+                return
+            from_date = to_date = today
+        else:
+            # Today only counts as closed after 6 PM (18:00)
+            last_closed_day = today if now.time() >= AUTO_CHECKOUT_TIME else today - timedelta(days=1)
+            
+            try:
+                to_date = datetime.strptime(options['to_date'], '%Y-%m-%d').date() if options['to_date'] else last_closed_day
+                from_date = datetime.strptime(options['from_date'], '%Y-%m-%d').date() if options['from_date'] else to_date
+            except ValueError:
+                raise CommandError('Dates must be in YYYY-MM-DD format')
+            
+            if to_date > last_closed_day:
+                self.stdout.write(f'Auto-update only runs after 6 PM - stopping at {last_closed_day}')
+                to_date = last_closed_day
+            
+            if not options['include_reviewed']:
+                # A reviewer already signed these off - confirmed_by_dc is only set by a DC, never by the auto-confirm rule
+                open_checkins = open_checkins.exclude(is_approved_by_admin=True).exclude(confirmed_by_dc__isnull=False)
+            if options['catch_up']:
+                earliest = open_checkins.filter(date__lte=to_date).order_by('date').values_list('date', flat=True).first()
+                if earliest:
+                    from_date = min(from_date, earliest)
+            
+            if from_date > to_date:
+                self.stdout.write('No closed days to update')
+                return
         
-        updated_count = 0
-        for attendance in missed_checkouts:
-            attendance.status = 'half_day'
-            attendance.check_out_time = time(18, 0)  # Set default check-out time
-            if attendance.remarks:
-                attendance.remarks += ' | Auto-updated to Half Day (missed check-out)'
-            else:
-                attendance.remarks = 'Auto-updated to Half Day (missed check-out)'
-            attendance.save()
-            updated_count += 1
+        missed_checkouts = open_checkins.filter(date__range=(from_date, to_date))
         
-        self.stdout.write(
-            self.style.SUCCESS(
-                f'Successfully updated {updated_count} attendance records to Half Day'
+        with transaction.atomic():
+            per_dccb = list(
+                missed_checkouts.order_by().values('user__dccb').annotate(count=Count('id')).order_by('user__dccb')
+            )
+            
+            # One UPDATE - the remark is appended in the database
+            updated_count = missed_checkouts.update(
+                status='half_day',
+                check_out_time=AUTO_CHECKOUT_TIME,
+                remarks=Case(
+                    When(remarks__isnull=True, then=Value(AUTO_REMARK)),
+                    When(remarks='', then=Value(AUTO_REMARK)),
+                    default=Concat('remarks', Value(f' | {AUTO_REMARK}')),
+                    output_field=TextField()
+                ),
+                updated_at=timezone.now()
             )
-        )
\ No newline at end of file
+            
+            # .update() bypasses post_save, so rebuild the range's summaries and drop cached counters
+            if updated_count:
+                rebuild_summary(from_date, to_date)
+                invalidate_dashboard_kpis()
+        
+        for row in per_dccb:
+            self.stdout.write(f"  {row['user__dccb'] or 'No DCCB'}: {row['count']}")
+        message = f'Successfully updated {updated_count} attendance records to Half Day'
+        if ranged:
+            message += f' for {from_date} to {to_date}'
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from datetime import datetime
+from authe.models import Attendance
+from authe.geofence import backfill_geofence, office_locations
+
+class Command(BaseCommand):
+    help = 'Recompute distance_from_office and is_location_valid for attendance with GPS data'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from-date', type=str, help='Start date (YYYY-MM-DD), defaults to the first record')
+        parser.add_argument('--to-date', type=str, help='End date (YYYY-MM-DD), defaults to the last record')
+        parser.add_argument('--dccb', type=str, help='Only rows of users in this DCCB')
+        parser.add_argument('--batch', type=int, default=2000, help='Rows evaluated and written per batch')
+    
+    def handle(self, *args, **options):
+        records = Attendance.objects.all()
+        try:
+            if options['from_date']:
+                records = records.filter(date__gte=datetime.strptime(options['from_date'], '%Y-%m-%d').date())
+            if options['to_date']:
+                records = records.filter(date__lte=datetime.strptime(options['to_date'], '%Y-%m-%d').date())
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        if options['dccb']:
+            records = records.filter(user__dccb=options['dccb'])
+        
+        configured = office_locations()
+        if not configured:
+            self.stdout.write(self.style.WARNING(
+                'DCCB_OFFICE_LOCATIONS is empty - rows will be marked valid with no distance'
+            ))
+        
+        written = backfill_geofence(records, batch_size=options['batch'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Geofenced {written} attendance records against {len(configured)} DCCB offices')
+        )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from datetime import datetime
+from authe.models import Attendance
+from authe.attendance_geo import backfill_geohash
+
+class Command(BaseCommand):
+    help = 'Populate the Attendance.geohash spatial index column for rows with GPS data'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from-date', type=str, help='Start date (YYYY-MM-DD), defaults to the first record')
+        parser.add_argument('--to-date', type=str, help='End date (YYYY-MM-DD), defaults to the last record')
+        parser.add_argument('--all', action='store_true', help='Recompute every row, not only rows without a geohash')
+        parser.add_argument('--batch', type=int, default=2000, help='Rows encoded and written per batch')
+    
+    def handle(self, *args, **options):
+        records = Attendance.objects.all()
+        try:
+            if options['from_date']:
+                records = records.filter(date__gte=datetime.strptime(options['from_date'], '%Y-%m-%d').date())
+            if options['to_date']:
+                records = records.filter(date__lte=datetime.strptime(options['to_date'], '%Y-%m-%d').date())
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        if not options['all']:
+            records = records.filter(geohash__isnull=True)
+        
+        written = backfill_geohash(records, batch_size=options['batch'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {written} attendance records by geohash'))
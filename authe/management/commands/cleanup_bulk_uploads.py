@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from authe.bulk_upload import purge_stale_batches
+
+class Command(BaseCommand):
+    help = 'Purge abandoned bulk upload batches and the staged rows of completed ones'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None,
+                          help='Idle hours before a batch is purged (default BULK_UPLOAD_BATCH_TTL_HOURS)')
+    
+    def handle(self, *args, **options):
+        batches, rows = purge_stale_batches(options['hours'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged {batches} stale upload batches and {rows} staged rows of completed uploads')
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import datetime, timedelta
+import time
+from authe.gps_anomalies import refresh_anomalies
+
+class Command(BaseCommand):
+    help = 'Flag shared coordinates, stale fixes, impossible travel and poor accuracy in GPS attendance (nightly)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from-date', type=str, help='Start date (YYYY-MM-DD), defaults to --to-date')
+        parser.add_argument('--to-date', type=str, help='End date (YYYY-MM-DD), defaults to yesterday')
+    
+    def handle(self, *args, **options):
+        try:
+            to_date = datetime.strptime(options['to_date'], '%Y-%m-%d').date() if options['to_date'] \
+                else timezone.localdate() - timedelta(days=1)
+            from_date = datetime.strptime(options['from_date'], '%Y-%m-%d').date() if options['from_date'] else to_date
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        if from_date > to_date:
+            raise CommandError('--from-date must not be after --to-date')
+        
+        started = time.monotonic()
+        counts = refresh_anomalies(from_date, to_date)
+        
+        for kind, count in counts.items():
+            self.stdout.write(f'  {kind}: {count}')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Stored {sum(counts.values())} GPS anomalies for {from_date} to {to_date} '
+                f'in {time.monotonic() - started:.1f}s'
+            )
+        )
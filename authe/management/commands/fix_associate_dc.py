@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from authe.models import Attendance
+from authe.attendance_summary import summary_keys, refresh_summary
 
 class Command(BaseCommand):
     help = 'Fix Associate/DC attendance records - remove from DC confirmation pipeline'
@@ -21,11 +22,13 @@ class Command(BaseCommand):
 
         if count > 0:
             with transaction.atomic():
+                touched_keys = summary_keys(corrupted_records)
                 updated = corrupted_records.update(
                     is_confirmed_by_dc=True,
                     confirmed_by_dc=None,
                     dc_confirmed_at=None
                 )
+                refresh_summary(touched_keys)
                 self.stdout.write(self.style.SUCCESS(f"\n✓ Updated {updated} records"))
                 self.stdout.write(self.style.SUCCESS("✓ Associates/DCs removed from DC confirmation pipeline"))
         else:
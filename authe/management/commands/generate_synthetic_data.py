@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import datetime, timedelta
+import time
+from authe.synthetic_data import generate_dataset
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible production-scale dataset (employees, attendance, travel, leave, notifications)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=200, help='Employees to create (Associates, DCs, MTs, Support)')
+        parser.add_argument('--days', type=int, default=30, help='Days of history ending on --end-date')
+        parser.add_argument('--end-date', type=str, help='Last generated day (YYYY-MM-DD), defaults to yesterday')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed - the same seed and dates give the same data')
+        parser.add_argument('--password', type=str, default='Synthetic@123', help='Password for every generated user')
+        parser.add_argument('--force', action='store_true', help='Allow running with DEBUG off')
+    
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Refusing to generate synthetic data with DEBUG off - pass --force if this is intended')
+        if options['employees'] < 1 or options['days'] < 1:
+            raise CommandError('--employees and --days must be positive')
+        try:
+            end_date = datetime.strptime(options['end_date'], '%Y-%m-%d').date() if options['end_date'] \
+                else timezone.localdate() - timedelta(days=1)
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        
+        started = time.monotonic()
+        try:
+            counts = generate_dataset(
+                options['employees'], options['days'], end_date,
+                seed=options['seed'], password=options['password'], log=self.stdout.write
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        for name, count in counts.items():
+            self.stdout.write(f'  {name}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Synthetic dataset generated in {time.monotonic() - started:.1f}s'))
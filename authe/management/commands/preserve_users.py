@@ -1,8 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-import json
-from pathlib import Path
-from datetime import datetime
+from authe.user_journal import compact, load_users, rebuild_from_database
 
 User = get_user_model()
 
@@ -10,7 +8,7 @@ class Command(BaseCommand):
     help = 'Preserve and restore user data automatically'
     
     def add_arguments(self, parser):
-        parser.add_argument('--action', type=str, choices=['backup', 'restore', 'ensure'], 
+        parser.add_argument('--action', type=str, choices=['backup', 'restore', 'ensure', 'compact'], 
                           default='ensure', help='Action to perform')
     
     def handle(self, *args, **options):
@@ -20,40 +18,18 @@ class Command(BaseCommand):
             self.backup_users()
         elif action == 'restore':
             self.restore_users()
+        elif action == 'compact':
+            self.compact_journal()
         else:
             self.ensure_users_exist()
     
     def backup_users(self):
-        """Backup all users to persistent storage"""
+        """Backup all users to persistent storage (fresh snapshot, clears the journal)"""
         try:
-            backup_dir = Path('persistent_data')
-            backup_dir.mkdir(exist_ok=True)
-            
-            users_data = []
-            for user in User.objects.all():
-                users_data.append({
-                    'employee_id': user.employee_id,
-                    'username': user.username,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'contact_number': user.contact_number,
-                    'role': user.role,
-                    'designation': user.designation,
-                    'dccb': user.dccb,
-                    'reporting_manager': user.reporting_manager,
-                    'is_active': user.is_active,
-                    'is_staff': user.is_staff,
-                    'is_superuser': user.is_superuser,
-                    'date_joined': user.date_joined.isoformat(),
-                    'password': user.password
-                })
-            
-            with open(backup_dir / 'users_persistent.json', 'w') as f:
-                json.dump(users_data, f, indent=2)
+            backed_up = rebuild_from_database(User.objects.all())
             
             self.stdout.write(
-                self.style.SUCCESS(f'Successfully backed up {len(users_data)} users')
+                self.style.SUCCESS(f'Successfully backed up {backed_up} users')
             )
             
         except Exception as e:
@@ -62,20 +38,17 @@ class Command(BaseCommand):
             )
     
     def restore_users(self):
-        """Restore users from backup"""
+        """Restore users from backup (snapshot plus replayed journal)"""
         try:
-            backup_file = Path('persistent_data/users_persistent.json')
-            if not backup_file.exists():
+            users_data = load_users()
+            if not users_data:
                 self.stdout.write(
                     self.style.WARNING('No backup file found')
                 )
                 return
             
-            with open(backup_file, 'r') as f:
-                users_data = json.load(f)
-            
             restored_count = 0
-            for user_data in users_data:
+            for user_data in users_data.values():
                 user, created = User.objects.get_or_create(
                     employee_id=user_data['employee_id'],
                     defaults=user_data
@@ -92,6 +65,18 @@ class Command(BaseCommand):
                 self.style.ERROR(f'Restore failed: {e}')
             )
     
+    def compact_journal(self):
+        """Fold the change journal into the snapshot"""
+        try:
+            user_count = compact()
+            self.stdout.write(
+                self.style.SUCCESS(f'Compacted user journal into snapshot of {user_count} users')
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Compaction failed: {e}')
+            )
+    
     def ensure_users_exist(self):
         """Ensure critical users exist, create if missing"""
         try:
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import datetime, timedelta
+from authe.models import Attendance
+from authe.attendance_summary import rebuild_summary
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyAttendanceSummary table for a date range'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from-date', type=str, help='Start date (YYYY-MM-DD), defaults to 30 days ago')
+        parser.add_argument('--to-date', type=str, help='End date (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--all', action='store_true', help='Rebuild every date that has attendance')
+    
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        
+        try:
+            to_date = datetime.strptime(options['to_date'], '%Y-%m-%d').date() if options['to_date'] else today
+            from_date = datetime.strptime(options['from_date'], '%Y-%m-%d').date() if options['from_date'] else to_date - timedelta(days=30)
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        
+        if options['all']:
+            first = Attendance.objects.order_by('date').values_list('date', flat=True).first()
+            last = Attendance.objects.order_by('-date').values_list('date', flat=True).first()
+            if first is None:
+                self.stdout.write('No attendance records found')
+                return
+            from_date, to_date = first, last
+        
+        if from_date > to_date:
+            raise CommandError('--from-date must not be after --to-date')
+        
+        rows = rebuild_summary(from_date, to_date)
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rows} summary rows for {from_date} to {to_date}')
+        )
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import timedelta
+from pathlib import Path
+from authe.benchmarks import (
+    BenchmarkError, baseline_path, compare, dataset_size, load_baseline, run_benchmarks, save_baseline
+)
+from authe.synthetic_data import generate_dataset
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot views and exports (wall time, queries, peak memory) against the stored baseline'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help='Scenarios to run (default: all)')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per scenario (the median is kept)')
+        parser.add_argument('--threshold', type=float,
+                          help='Allowed growth in percent before a metric counts as a regression')
+        parser.add_argument('--baseline', type=str, help='Baseline JSON (default: authe/benchmark_baselines/<vendor>.json)')
+        parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--generate', action='store_true',
+                          help='Generate a synthetic dataset ending yesterday before running (DEBUG only)')
+        parser.add_argument('--employees', type=int, default=500, help='Employees for --generate')
+        parser.add_argument('--days', type=int, default=90, help='Days of history for --generate')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for --generate')
+    
+    def handle(self, *args, **options):
+        if options['generate']:
+            if not settings.DEBUG:
+                raise CommandError('--generate only runs with DEBUG on')
+            counts = generate_dataset(
+                options['employees'], options['days'], timezone.localdate() - timedelta(days=1),
+                seed=options['seed'], log=self.stdout.write
+            )
+            self.stdout.write(f"Generated {counts['users']} users and {counts['attendance']} attendance records")
+        
+        path = Path(options['baseline']) if options['baseline'] else baseline_path()
+        threshold = options['threshold'] if options['threshold'] is not None \
+            else getattr(settings, 'BENCHMARK_REGRESSION_THRESHOLD', 25)
+        dataset = dataset_size()
+        
+        try:
+            results = run_benchmarks(options['scenarios'], repeat=options['repeat'], log=self.stdout.write)
+        except BenchmarkError as e:
+            raise CommandError(str(e))
+        
+        if options['save']:
+            save_baseline(path, results, dataset)
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {path}'))
+            return
+        
+        baseline = load_baseline(path)
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(f'No baseline at {path} - run with --save to record one'))
+            return
+        if baseline['dataset'] != dataset:
+            self.stdout.write(self.style.WARNING(
+                f"Dataset differs from the baseline's ({dataset} vs {baseline['dataset']}) - comparisons are approximate"
+            ))
+        
+        regressions = compare(results, baseline, threshold)
+        for name, metric, before, after in regressions:
+            self.stdout.write(self.style.ERROR(f'  {name} {metric}: {before} -> {after}'))
+        if regressions:
+            raise CommandError(f'{len(regressions)} benchmark regressions beyond {threshold:g}%')
+        self.stdout.write(self.style.SUCCESS(f'No regressions beyond {threshold:g}% against {path}'))
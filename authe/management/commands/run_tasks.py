@@ -0,0 +1,44 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from authe.bulk_upload import purge_stale_batches
+from authe.notification_service import cleanup_expired_notifications
+from authe.task_queue import purge_finished_tasks, run_pending_tasks
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks (notifications, audit logs, user backups) and hourly cleanup'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process due tasks once and exit')
+        parser.add_argument('--batch', type=int, default=50, help='Tasks claimed per batch')
+        parser.add_argument('--sleep', type=float, default=None,
+                          help='Seconds to wait when the queue is empty (default TASK_QUEUE_POLL_SECONDS)')
+    
+    def handle(self, *args, **options):
+        sleep = options['sleep'] if options['sleep'] is not None else getattr(settings, 'TASK_QUEUE_POLL_SECONDS', 2)
+        last_purge = 0
+        
+        while True:
+            succeeded, failed = run_pending_tasks(options['batch'])
+            if succeeded or failed:
+                self.stdout.write(f'Ran {succeeded + failed} tasks ({succeeded} succeeded, {failed} failed)')
+            
+            # Purge completed tasks, expired notifications and stale upload staging once an hour
+            if time.monotonic() - last_purge > 3600:
+                purged = purge_finished_tasks()
+                if purged:
+                    self.stdout.write(f'Purged {purged} completed tasks')
+                expired = cleanup_expired_notifications()
+                if expired:
+                    self.stdout.write(f'Removed {expired} expired notifications')
+                batches, rows = purge_stale_batches()
+                if batches or rows:
+                    self.stdout.write(f'Purged {batches} stale upload batches and {rows} staged rows')
+                last_purge = time.monotonic()
+            
+            if options['once']:
+                if not (succeeded or failed):
+                    break
+                continue
+            if not (succeeded or failed):
+                time.sleep(sleep)
@@ -1,30 +1,81 @@
 from django.utils.deprecation import MiddlewareMixin
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
 from django.core.management import call_command
+from django.db import connections
+from django.db.models import Count, Q
 from django.http import JsonResponse
+from collections import Counter
+from contextlib import ExitStack
 import logging
-from pathlib import Path
+import re
+import threading
+import time
+from .user_journal import snapshot_path
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Per-worker persistence state - refreshed after PERSISTENCE_CHECK_TTL seconds or on user create/delete
+_state_lock = threading.Lock()
+_persistence_state = {
+    'users_ok': None,
+    'users_checked_at': 0.0,
+    'backup_exists': None,
+    'backup_checked_at': 0.0,
+}
+_persistence_stats = {
+    'integrity_hits': 0,
+    'integrity_misses': 0,
+    'backup_file_hits': 0,
+    'backup_file_misses': 0,
+    'invalidations': 0,
+}
+
+def _is_fresh(checked_at):
+    return time.monotonic() - checked_at < getattr(settings, 'PERSISTENCE_CHECK_TTL', 300)
+
+def _count(stat):
+    with _state_lock:
+        _persistence_stats[stat] += 1
+
+def invalidate_persistence_state():
+    """Force the next request in this worker to re-check users and the backup file"""
+    with _state_lock:
+        _persistence_state['users_ok'] = None
+        _persistence_state['backup_exists'] = None
+        _persistence_stats['invalidations'] += 1
+
+def get_persistence_stats():
+    """Hit/miss counters and cached state for this worker"""
+    with _state_lock:
+        return dict(_persistence_stats, users_ok=_persistence_state['users_ok'],
+                    backup_exists=_persistence_state['backup_exists'])
+
+def count_critical_users():
+    """Admin and field officer counts in one query"""
+    counts = User.objects.aggregate(
+        admins=Count('id', filter=Q(role='admin')),
+        field_officers=Count('id', filter=Q(role='field_officer')),
+    )
+    return counts['admins'], counts['field_officers']
+
 class DataPersistenceMiddleware(MiddlewareMixin):
     """Middleware to ensure data persistence and handle missing users"""
     
-    def __init__(self, get_response):
-        self.get_response = get_response
-        self.last_check = None
-        super().__init__(get_response)
-    
     def process_request(self, request):
         """Check data integrity on admin requests"""
         try:
             # Only check on admin dashboard requests to avoid performance impact
             if request.path.startswith('/admin/') and request.user.is_authenticated:
+                if _persistence_state['users_ok'] and _is_fresh(_persistence_state['users_checked_at']):
+                    _count('integrity_hits')
+                    return None
+                _count('integrity_misses')
                 
                 # Check if we have critical users
-                admin_count = User.objects.filter(role='admin').count()
-                field_count = User.objects.filter(role='field_officer').count()
+                admin_count, field_count = count_critical_users()
                 
                 # If missing critical users, restore immediately
                 if admin_count == 0 or field_count == 0:
@@ -34,10 +85,13 @@ class DataPersistenceMiddleware(MiddlewareMixin):
                     call_command('preserve_users', '--action=ensure', verbosity=0)
                     
                     # Recheck
-                    admin_count = User.objects.filter(role='admin').count()
-                    field_count = User.objects.filter(role='field_officer').count()
+                    admin_count, field_count = count_critical_users()
                     
                     logger.info(f"After restore: {admin_count} admins, {field_count} field officers")
+                
+                with _state_lock:
+                    _persistence_state['users_ok'] = admin_count > 0 and field_count > 0
+                    _persistence_state['users_checked_at'] = time.monotonic()
         
         except Exception as e:
             logger.error(f"Data persistence check failed: {e}")
@@ -47,15 +101,149 @@ class DataPersistenceMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
         """Ensure backup exists after successful operations"""
         try:
+            if _persistence_state['backup_exists'] and _is_fresh(_persistence_state['backup_checked_at']):
+                _count('backup_file_hits')
+                return response
+            _count('backup_file_misses')
+            
             # Check if backup file exists
-            backup_file = Path('persistent_data/users_persistent.json')
+            backup_exists = snapshot_path().exists()
             
             # If no backup exists and we have users, create one
-            if not backup_file.exists() and User.objects.exists():
+            if not backup_exists and User.objects.exists():
                 logger.info("No backup found, creating one...")
                 call_command('preserve_users', '--action=backup', verbosity=0)
+                backup_exists = snapshot_path().exists()
+            
+            with _state_lock:
+                _persistence_state['backup_exists'] = backup_exists
+                _persistence_state['backup_checked_at'] = time.monotonic()
         
         except Exception as e:
             logger.error(f"Backup check failed: {e}")
         
-        return response
\ No newline at end of file
+        return response
+
+# Query budgets - per-worker statistics per view, filled in by QueryBudgetMiddleware
+_IN_LIST = re.compile(r'IN \((?:%s,\s*)*%s\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_SPACES = re.compile(r'\s+')
+_query_stats_lock = threading.Lock()
+_query_stats = {}
+_END_OF_STREAM = object()
+
+def query_fingerprint(sql):
+    """SQL shape - IN lists and inlined numbers are collapsed so per-row variants share a fingerprint"""
+    sql = _SPACES.sub(' ', sql).strip()
+    return _NUMBER.sub('N', _IN_LIST.sub('IN (...)', sql))
+
+def query_budget_for(view_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', 50))
+
+def get_query_stats():
+    """Per-view query statistics for this worker, slowest average DB time first"""
+    with _query_stats_lock:
+        stats = [dict(stat, view=view, repeated=stat['repeated'].most_common(5)) for view, stat in _query_stats.items()]
+    for stat in stats:
+        stat['avg_queries'] = round(stat['queries'] / stat['requests'], 1)
+        stat['avg_db_ms'] = round(stat['db_ms'] / stat['requests'], 1)
+        stat['avg_total_ms'] = round(stat['total_ms'] / stat['requests'], 1)
+        stat['budget'] = query_budget_for(stat['view'])
+    return sorted(stats, key=lambda stat: stat['avg_db_ms'], reverse=True)
+
+def reset_query_stats():
+    with _query_stats_lock:
+        _query_stats.clear()
+
+class QueryRecorder:
+    """execute_wrapper that counts queries, DB time and SQL fingerprints"""
+    
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+    
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[query_fingerprint(sql)] += 1
+
+class QueryBudgetMiddleware:
+    """
+    Opt-in (QUERY_BUDGET_ENABLED) per-request query accounting.
+    Logs a warning when a view runs more queries than its budget (QUERY_BUDGETS, else QUERY_BUDGET_DEFAULT)
+    or repeats one SQL shape more than QUERY_REPEAT_THRESHOLD times - the usual sign of an N+1 loop.
+    """
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        
+        match = request.resolver_match
+        if match is None:
+            return response
+        view_name = match.view_name or match._func_path
+        if response.streaming and not response.is_async:
+            # Streamed exports run their queries while the body is sent, after the view has returned
+            response.streaming_content = self.recorded_stream(response.streaming_content, recorder, started, view_name)
+        else:
+            self.record(view_name, recorder, time.perf_counter() - started)
+        return response
+    
+    def recording(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+    
+    def recorded_stream(self, chunks, recorder, started, view_name):
+        """Yield the body with the recorder installed around each chunk; record once the body is done or closed"""
+        chunks = iter(chunks)
+        try:
+            while True:
+                with self.recording(recorder):
+                    chunk = next(chunks, _END_OF_STREAM)
+                if chunk is _END_OF_STREAM:
+                    return
+                yield chunk
+        finally:
+            self.record(view_name, recorder, time.perf_counter() - started)
+    
+    def record(self, view_name, recorder, total):
+        budget = query_budget_for(view_name)
+        threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 10)
+        repeated = {sql: times for sql, times in recorder.fingerprints.items() if times > threshold}
+        
+        if recorder.count > budget:
+            logger.warning(
+                f"Query budget exceeded: {view_name} ran {recorder.count} queries (budget {budget}) "
+                f"in {recorder.duration * 1000:.0f}ms of DB time"
+            )
+        for sql, times in repeated.items():
+            logger.warning(f"Possible N+1 in {view_name}: query ran {times} times: {sql[:300]}")
+        
+        with _query_stats_lock:
+            stat = _query_stats.setdefault(view_name, {
+                'requests': 0, 'queries': 0, 'max_queries': 0, 'db_ms': 0.0, 'total_ms': 0.0,
+                'over_budget': 0, 'n_plus_one': 0, 'repeated': Counter(),
+            })
+            stat['requests'] += 1
+            stat['queries'] += recorder.count
+            stat['max_queries'] = max(stat['max_queries'], recorder.count)
+            stat['db_ms'] += recorder.duration * 1000
+            stat['total_ms'] += total * 1000
+            stat['over_budget'] += recorder.count > budget
+            stat['n_plus_one'] += bool(repeated)
+            stat['repeated'].update(repeated)
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:10
+
+from datetime import time
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_summary(apps, schema_editor):
+    Attendance = apps.get_model('authe', 'Attendance')
+    DailyAttendanceSummary = apps.get_model('authe', 'DailyAttendanceSummary')
+    cutoff = time(9, 30)
+    rows = Attendance.objects.filter(user__role='field_officer', user__is_active=True).order_by().values(
+        'date', 'user__dccb', 'user__designation'
+    ).annotate(
+        present=Count('id', filter=Q(status='present')),
+        half_day=Count('id', filter=Q(status='half_day')),
+        absent=Count('id', filter=Q(status='absent')),
+        not_marked=Count('id', filter=Q(status='auto_not_marked')),
+        on_time=Count('id', filter=Q(check_in_time__lte=cutoff)),
+        late=Count('id', filter=Q(check_in_time__gt=cutoff)),
+        travelling=Count('id', filter=Q(travel_required=True)),
+        travel_approved=Count('id', filter=Q(travel_approved=True)),
+        on_leave=Count('id', filter=Q(is_leave_day=True)),
+        dc_confirmed=Count('id', filter=Q(is_confirmed_by_dc=True)),
+        admin_approved=Count('id', filter=Q(is_approved_by_admin=True)),
+        admin_pending=Count('id', filter=Q(is_confirmed_by_dc=True, is_approved_by_admin=False)),
+    )
+    DailyAttendanceSummary.objects.bulk_create([
+        DailyAttendanceSummary(
+            dccb=row.pop('user__dccb'), designation=row.pop('user__designation'), **row
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authe', '0028_attendance_has_pending_travel_attendance_is_archived_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('dccb', models.CharField(blank=True, choices=[('AHMEDABAD', 'AHMEDABAD'), ('BANASKANTHA', 'BANASKANTHA'), ('BARODA', 'BARODA'), ('MAHESANA', 'MAHESANA'), ('SABARKANTHA', 'SABARKANTHA'), ('BHARUCH', 'BHARUCH'), ('KHEDA', 'KHEDA'), ('PANCHMAHAL', 'PANCHMAHAL'), ('SURENDRANAGAR', 'SURENDRANAGAR'), ('JAMNAGAR', 'JAMNAGAR'), ('JUNAGADH', 'JUNAGADH'), ('KODINAR', 'KODINAR'), ('KUTCH', 'KUTCH'), ('VALSAD', 'VALSAD'), ('AMRELI', 'AMRELI'), ('BHAVNAGAR', 'BHAVNAGAR'), ('RAJKOT', 'RAJKOT'), ('SURAT', 'SURAT')], max_length=20, null=True)),
+                ('designation', models.CharField(choices=[('MT', 'MT'), ('DC', 'DC'), ('Support', 'Support'), ('Associate', 'Associate'), ('Manager', 'Manager'), ('HR', 'HR'), ('Delivery Head', 'Delivery Head')], max_length=20)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('half_day', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('not_marked', models.PositiveIntegerField(default=0)),
+                ('on_time', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('travelling', models.PositiveIntegerField(default=0)),
+                ('travel_approved', models.PositiveIntegerField(default=0)),
+                ('on_leave', models.PositiveIntegerField(default=0)),
+                ('dc_confirmed', models.PositiveIntegerField(default=0)),
+                ('admin_approved', models.PositiveIntegerField(default=0)),
+                ('admin_pending', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date', 'dccb', 'designation'],
+                'indexes': [models.Index(fields=['date', 'dccb'], name='authe_daily_date_da9bd9_idx')],
+                'unique_together': {('date', 'dccb', 'designation')},
+            },
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authe', '0030_background_task'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='BulkUploadBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('invalid', 'Invalid'), ('validated', 'Validated'), ('committing', 'Committing'), ('completed', 'Completed'), ('failed', 'Failed')], default='validated', max_length=12)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('valid_rows', models.PositiveIntegerField(default=0)),
+                ('error_rows', models.PositiveIntegerField(default=0)),
+                ('created_rows', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bulk_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BulkUploadRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('valid', 'Valid'), ('error', 'Error'), ('created', 'Created')], max_length=10)),
+                ('employee_id', models.CharField(blank=True, default='', max_length=20)),
+                ('first_name', models.CharField(blank=True, default='', max_length=50)),
+                ('last_name', models.CharField(blank=True, default='', max_length=50)),
+                ('designation', models.CharField(blank=True, default='', max_length=20)),
+                ('department', models.CharField(blank=True, default='', max_length=50)),
+                ('contact_number', models.CharField(blank=True, default='', max_length=20)),
+                ('email', models.CharField(blank=True, default='', max_length=254)),
+                ('dccb', models.CharField(blank=True, max_length=20, null=True)),
+                ('multiple_dccb', models.JSONField(blank=True, default=list)),
+                ('reporting_manager', models.CharField(blank=True, max_length=100, null=True)),
+                ('password_hash', models.CharField(blank=True, default='', max_length=128)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='authe.bulkuploadbatch')),
+            ],
+            options={
+                'ordering': ['row_number'],
+                'indexes': [models.Index(fields=['batch', 'status'], name='authe_bulku_batch_i_b59930_idx')],
+                'unique_together': {('batch', 'row_number')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authe', '0031_bulk_upload_staging'),
+    ]
+    
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'is_location_valid'], name='authe_atten_date_fd3fb5_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authe', '0032_attendance_geofence_index'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['geohash', 'date'], name='authe_atten_geohash_12549a_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authe', '0033_attendance_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GPSAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('kind', models.CharField(choices=[('shared_coordinates', 'Shared Coordinates'), ('stale_fix', 'Stale Fix'), ('impossible_travel', 'Impossible Travel'), ('poor_accuracy', 'Poor Accuracy')], max_length=20)),
+                ('value', models.FloatField()),
+                ('detail', models.JSONField(blank=True, default=dict)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('attendance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gps_anomalies', to='authe.attendance')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gps_anomalies', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date', 'kind'],
+                'indexes': [models.Index(fields=['date', 'kind'], name='authe_gpsan_date_a48a46_idx'), models.Index(fields=['user', 'date'], name='authe_gpsan_user_id_5968ef_idx')],
+                'unique_together': {('attendance', 'kind')},
+            },
+        ),
+    ]
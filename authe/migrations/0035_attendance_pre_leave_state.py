@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authe', '0034_gps_anomaly'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='pre_leave_state',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
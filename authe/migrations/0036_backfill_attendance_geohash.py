@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:20
+
+from django.db import migrations
+from authe.geohash import ATTENDANCE_PRECISION, encode
+
+
+def populate_geohash(apps, schema_editor):
+    Attendance = apps.get_model('authe', 'Attendance')
+    rows = Attendance.objects.filter(
+        geohash__isnull=True, latitude__isnull=False, longitude__isnull=False
+    ).order_by().values_list('id', 'latitude', 'longitude')
+    batch = []
+    for attendance_id, latitude, longitude in rows.iterator(chunk_size=2000):
+        batch.append(Attendance(id=attendance_id, geohash=encode(latitude, longitude, ATTENDANCE_PRECISION)))
+        if len(batch) >= 2000:
+            Attendance.objects.bulk_update(batch, ['geohash'], batch_size=500)
+            batch = []
+    if batch:
+        Attendance.objects.bulk_update(batch, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authe', '0035_attendance_pre_leave_state'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
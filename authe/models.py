@@ -6,6 +6,7 @@ from datetime import time
 import re
 import uuid
 import json
+from .geohash import ATTENDANCE_PRECISION, encode as encode_geohash
 
 class CustomUser(AbstractUser):
     ROLE_CHOICES = [
@@ -103,6 +104,11 @@ class CustomUser(AbstractUser):
     REQUIRED_FIELDS = ['email', 'first_name', 'last_name']
     
     def save(self, *args, **kwargs):
+        self.apply_defaults()
+        super().save(*args, **kwargs)
+    
+    def apply_defaults(self):
+        """Normalize IDs/names and derive role, level and permissions - also used before bulk_create"""
         # Auto-normalize Employee ID
         if self.employee_id:
             self.employee_id = self.employee_id.upper().strip()
@@ -151,8 +157,6 @@ class CustomUser(AbstractUser):
         
         # Set username to employee_id
         self.username = self.employee_id
-        
-        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.employee_id} - {self.first_name} {self.last_name}"
@@ -212,6 +216,7 @@ class Attendance(models.Model):
     location_address = models.CharField(max_length=300, null=True, blank=True)
     is_location_valid = models.BooleanField(default=False)
     distance_from_office = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)  # Spatial index cell, set in save()
     
     # Approval workflow - PERMANENT AUDIT TRAIL
     is_confirmed_by_dc = models.BooleanField(default=False)
@@ -227,6 +232,7 @@ class Attendance(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     confirmation_source = models.CharField(max_length=20, choices=CONFIRMATION_SOURCE_CHOICES, default='DC')
     is_leave_day = models.BooleanField(default=False)
+    pre_leave_state = models.JSONField(null=True, blank=True)  # Leave holding the row and what apply_leave overwrote - {'leave': id, 'created': True} for rows it inserted
     is_archived = models.BooleanField(default=False)  # For controlled archival only
     
     # TRAVEL DEPENDENCY VALIDATION FIELDS
@@ -240,6 +246,8 @@ class Attendance(models.Model):
             models.Index(fields=['user', 'date']),
             models.Index(fields=['date']),
             models.Index(fields=['is_archived']),
+            models.Index(fields=['date', 'is_location_valid']),
+            models.Index(fields=['geohash', 'date']),
         ]
     
     def save(self, *args, **kwargs):
@@ -254,6 +262,15 @@ class Attendance(models.Model):
             self.confirmed_by_dc = None
             self.dc_confirmed_at = None
         
+        # Keep the spatial index cell in step with the coordinates
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude, ATTENDANCE_PRECISION)
+        else:
+            self.geohash = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        
         super().save(*args, **kwargs)
     
     def check_travel_dependency(self):
@@ -282,6 +299,44 @@ class Attendance(models.Model):
     def __str__(self):
         return f"{self.user.employee_id} - {self.date} - {self.status}"
 
+class DailyAttendanceSummary(models.Model):
+    """Materialized attendance counters per (date, DCCB, designation) for reports and charts"""
+    date = models.DateField()
+    dccb = models.CharField(max_length=20, choices=CustomUser.DCCB_CHOICES, null=True, blank=True)
+    designation = models.CharField(max_length=20, choices=CustomUser.DESIGNATION_CHOICES)
+    
+    # Status counters
+    present = models.PositiveIntegerField(default=0)
+    half_day = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    not_marked = models.PositiveIntegerField(default=0)  # auto_not_marked rows
+    
+    # Punctuality, travel, leave and approval counters
+    on_time = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    travelling = models.PositiveIntegerField(default=0)
+    travel_approved = models.PositiveIntegerField(default=0)
+    on_leave = models.PositiveIntegerField(default=0)
+    dc_confirmed = models.PositiveIntegerField(default=0)
+    admin_approved = models.PositiveIntegerField(default=0)
+    admin_pending = models.PositiveIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['date', 'dccb', 'designation']
+        ordering = ['-date', 'dccb', 'designation']
+        indexes = [
+            models.Index(fields=['date', 'dccb']),
+        ]
+    
+    @property
+    def marked(self):
+        return self.present + self.half_day + self.absent + self.not_marked
+    
+    def __str__(self):
+        return f"{self.date} - {self.dccb} - {self.designation}"
+
 class LeaveRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -403,17 +458,39 @@ class TravelRequest(models.Model):
     
     def update_attendance_dependency(self):
         """Update attendance records with travel dependency status"""
-        from datetime import timedelta
-        current_date = self.from_date
+        TravelRequest.update_attendance_dependencies([self])
+    
+    @classmethod
+    def update_attendance_dependencies(cls, travel_requests, chunk_size=200):
+        """
+        Recompute has_pending_travel/travel_dependency_status for every attendance row
+        covered by the given travel requests (instances or a queryset) - one UPDATE per chunk.
+        Same rule as Attendance.check_travel_dependency: any pending or rejected travel blocks.
+        """
+        if isinstance(travel_requests, models.QuerySet):
+            spans = list(travel_requests.order_by().values_list('user_id', 'from_date', 'to_date'))
+        else:
+            spans = [(travel.user_id, travel.from_date, travel.to_date) for travel in travel_requests]
         
-        while current_date <= self.to_date:
-            try:
-                attendance = Attendance.objects.get(user=self.user, date=current_date)
-                attendance.check_travel_dependency()
-                attendance.save()
-            except Attendance.DoesNotExist:
-                pass
-            current_date += timedelta(days=1)
+        blocking = models.Exists(cls.objects.filter(
+            user_id=models.OuterRef('user_id'),
+            from_date__lte=models.OuterRef('date'),
+            to_date__gte=models.OuterRef('date'),
+            status__in=['pending', 'rejected']
+        ))
+        updated = 0
+        for start in range(0, len(spans), chunk_size):
+            covered = models.Q()
+            for user_id, from_date, to_date in spans[start:start + chunk_size]:
+                covered |= models.Q(user_id=user_id, date__range=(from_date, to_date))
+            updated += Attendance.objects.filter(covered).update(
+                has_pending_travel=blocking,
+                travel_dependency_status=models.Case(
+                    models.When(blocking, then=models.Value('Travel Approval Required')),
+                    default=None
+                )
+            )
+        return updated
     
     def __str__(self):
         return f"{self.user.employee_id} - {self.from_date} to {self.to_date}"
@@ -478,4 +555,129 @@ class Notification(models.Model):
         """Check if notification has expired"""
         if self.expires_at:
             return timezone.now() > self.expires_at
-        return False
\ No newline at end of file
+        return False
+
+class BackgroundTask(models.Model):
+    """Queued side work (notifications, audit logs, backups) run by the run_tasks worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} - {self.status} ({self.attempts}/{self.max_attempts})"
+
+class BulkUploadBatch(models.Model):
+    """One uploaded employee sheet, staged for preview and chunked commit"""
+    STATUS_CHOICES = [
+        ('invalid', 'Invalid'),
+        ('validated', 'Validated'),
+        ('committing', 'Committing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    uploaded_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='bulk_uploads')
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='validated')
+    total_rows = models.PositiveIntegerField(default=0)
+    valid_rows = models.PositiveIntegerField(default=0)
+    error_rows = models.PositiveIntegerField(default=0)
+    created_rows = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.file_name} - {self.status} ({self.created_rows}/{self.valid_rows})"
+    
+    @property
+    def progress_percent(self):
+        if not self.valid_rows:
+            return 0
+        return round(self.created_rows * 100 / self.valid_rows)
+
+class BulkUploadRow(models.Model):
+    """A validated sheet row - passwords are staged as hashes, never in plaintext"""
+    STATUS_CHOICES = [
+        ('valid', 'Valid'),
+        ('error', 'Error'),
+        ('created', 'Created'),
+    ]
+    
+    batch = models.ForeignKey(BulkUploadBatch, on_delete=models.CASCADE, related_name='rows')
+    row_number = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    employee_id = models.CharField(max_length=20, blank=True, default='')
+    first_name = models.CharField(max_length=50, blank=True, default='')
+    last_name = models.CharField(max_length=50, blank=True, default='')
+    designation = models.CharField(max_length=20, blank=True, default='')
+    department = models.CharField(max_length=50, blank=True, default='')
+    contact_number = models.CharField(max_length=20, blank=True, default='')
+    email = models.CharField(max_length=254, blank=True, default='')
+    dccb = models.CharField(max_length=20, blank=True, null=True)
+    multiple_dccb = models.JSONField(default=list, blank=True)
+    reporting_manager = models.CharField(max_length=100, blank=True, null=True)
+    password_hash = models.CharField(max_length=128, blank=True, default='')
+    errors = models.JSONField(default=list, blank=True)
+    
+    class Meta:
+        ordering = ['row_number']
+        unique_together = ['batch', 'row_number']
+        indexes = [
+            models.Index(fields=['batch', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"Row {self.row_number} - {self.employee_id} ({self.status})"
+
+class GPSAnomaly(models.Model):
+    """A suspicious GPS check-in flagged by the detect_gps_anomalies job"""
+    KIND_CHOICES = [
+        ('shared_coordinates', 'Shared Coordinates'),
+        ('stale_fix', 'Stale Fix'),
+        ('impossible_travel', 'Impossible Travel'),
+        ('poor_accuracy', 'Poor Accuracy'),
+    ]
+    
+    attendance = models.ForeignKey(Attendance, on_delete=models.CASCADE, related_name='gps_anomalies')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='gps_anomalies')
+    date = models.DateField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    value = models.FloatField()  # Users sharing the point, repeat count, km/h or accuracy in meters
+    detail = models.JSONField(default=dict, blank=True)
+    detected_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-date', 'kind']
+        unique_together = ['attendance', 'kind']
+        indexes = [
+            models.Index(fields=['date', 'kind']),
+            models.Index(fields=['user', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.employee_id} - {self.date} - {self.kind}"
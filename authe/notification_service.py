@@ -1,6 +1,23 @@
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
+import time
 from .models import Notification, CustomUser
+from .shared_cache import cache_ttl
+from .task_queue import enqueue
+
+RECIPIENT_CACHE_VERSION_KEY = 'notification_recipients:version'
+NOTIFICATION_VERSION_KEY = 'notifications:version:{}'
+
+# Recipient groups used by the fan-out notifications
+RECIPIENT_GROUPS = {
+    'admins': lambda dccb: CustomUser.objects.filter(role_level__gte=10, is_active=True),
+    'associates': lambda dccb: CustomUser.objects.filter(designation='Associate', is_active=True),
+    'dccb_dcs': lambda dccb: CustomUser.objects.filter(designation='DC', dccb=dccb, is_active=True),
+    'check_in_reminder': lambda dccb: CustomUser.objects.filter(
+        role='field_officer', is_active=True, designation__in=['MT', 'DC', 'Support']
+    ),
+}
 
 def create_notification(recipient, notification_type, title, message, priority='medium', expires_hours=4, related_object_id=None):
     """Create a new notification with auto-expiry"""
@@ -16,13 +33,76 @@ def create_notification(recipient, notification_type, title, message, priority='
         related_object_id=related_object_id
     )
 
+def notify_many(recipient_ids, notification_type, title, message, priority='medium', expires_hours=4, related_object_id=None):
+    """
+    Create the same notification for every recipient id with a single bulk INSERT.
+    Cached recipient sets can be stale in the worker process, so ids are re-checked against
+    active users first - deleted or deactivated users are dropped instead of failing the INSERT.
+    """
+    if not recipient_ids:
+        return []
+    recipient_ids = list(CustomUser.objects.filter(
+        id__in=recipient_ids, is_active=True
+    ).order_by('id').values_list('id', flat=True))
+    expires_at = timezone.now() + timedelta(hours=expires_hours)
+    notifications = [
+        Notification(
+            recipient_id=recipient_id,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            priority=priority,
+            expires_at=expires_at,
+            related_object_id=related_object_id
+        )
+        for recipient_id in recipient_ids
+    ]
+    if not notifications:
+        return []
+    created = Notification.objects.bulk_create(notifications)
+    # bulk_create sends no post_save, so mark the recipients' lists changed here
+    bump_notification_version(recipient_ids)
+    return created
+
+def get_recipient_ids(group, dccb=None):
+    """Cached ids of an active recipient group (admins, associates, DCs of a DCCB, reminder list)"""
+    version = cache.get(RECIPIENT_CACHE_VERSION_KEY, 0)
+    key = f'notification_recipients:{version}:{group}:{dccb or ""}'
+    recipient_ids = cache.get(key)
+    if recipient_ids is None:
+        recipient_ids = list(RECIPIENT_GROUPS[group](dccb).order_by('id').values_list('id', flat=True))
+        cache.set(key, recipient_ids, cache_ttl('NOTIFICATION_RECIPIENT_CACHE_TTL', 300))
+    return recipient_ids
+
+def invalidate_recipient_cache():
+    """Drop every cached recipient group - called when users change"""
+    try:
+        cache.incr(RECIPIENT_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(RECIPIENT_CACHE_VERSION_KEY, 1, None)
+
+def get_notification_version(user_id):
+    """Token that changes whenever one of the user's notifications is added, read or removed"""
+    return cache.get(NOTIFICATION_VERSION_KEY.format(user_id))
+
+def bump_notification_version(user_ids):
+    """Mark users' notification lists as changed - open notification streams re-send on their next check"""
+    token = time.time_ns()
+    cache.set_many({NOTIFICATION_VERSION_KEY.format(user_id): token for user_id in set(user_ids)}, None)
+
+def queue_notification(function_name, *args, **kwargs):
+    """Run a notify_* function in the background task worker after the current transaction commits"""
+    enqueue('send_notification', function_name, *args, **kwargs)
+
 def clear_related_notifications(related_object_id, notification_type=None):
     """Clear notifications related to a specific object/action"""
     query = Notification.objects.filter(related_object_id=related_object_id)
     if notification_type:
         query = query.filter(notification_type=notification_type)
     
+    recipient_ids = set(query.values_list('recipient_id', flat=True))
     query.delete()
+    bump_notification_version(recipient_ids)
 
 def cleanup_expired_notifications():
     """Remove expired notifications"""
@@ -33,38 +113,25 @@ def cleanup_expired_notifications():
 
 def send_check_in_reminder():
     """Send check-in reminder to all active field officers"""
-    field_officers = CustomUser.objects.filter(
-        role='field_officer',
-        is_active=True,
-        designation__in=['MT', 'DC', 'Support']
+    return notify_many(
+        get_recipient_ids('check_in_reminder'),
+        notification_type='check_in_reminder',
+        title='Check-in Reminder',
+        message='Please check in on time. Remember to mark your attendance before 9:30 AM.',
+        priority='medium'
     )
-    
-    for officer in field_officers:
-        create_notification(
-            recipient=officer,
-            notification_type='check_in_reminder',
-            title='Check-in Reminder',
-            message='Please check in on time. Remember to mark your attendance before 9:30 AM.',
-            priority='medium'
-        )
 
 def notify_travel_request(travel_request):
     """Notify ALL Associates about new travel request"""
     # Notify ALL Associates since any can approve
-    associates = CustomUser.objects.filter(
-        designation='Associate',
-        is_active=True
+    notify_many(
+        get_recipient_ids('associates'),
+        notification_type='travel_request',
+        title='New Travel Request',
+        message=f'Travel request from {travel_request.user.employee_id} ({travel_request.user.dccb}) for {travel_request.from_date} requires approval.',
+        priority='high',
+        related_object_id=f'travel_{travel_request.id}'
     )
-    
-    for associate in associates:
-        create_notification(
-            recipient=associate,
-            notification_type='travel_request',
-            title='New Travel Request',
-            message=f'Travel request from {travel_request.user.employee_id} ({travel_request.user.dccb}) for {travel_request.from_date} requires approval.',
-            priority='high',
-            related_object_id=f'travel_{travel_request.id}'
-        )
 
 def notify_travel_approval(travel_request, approved=True):
     """Notify user about travel request approval/rejection"""
@@ -83,16 +150,14 @@ def notify_travel_approval(travel_request, approved=True):
 
 def notify_leave_request(leave_request):
     """Notify admin about new leave request"""
-    admins = CustomUser.objects.filter(role_level__gte=10, is_active=True)
-    for admin in admins:
-        create_notification(
-            recipient=admin,
-            notification_type='leave_request',
-            title='New Leave Request',
-            message=f'Leave request from {leave_request.user.employee_id} for {leave_request.start_date} requires approval.',
-            priority='medium',
-            related_object_id=f'leave_{leave_request.id}'
-        )
+    notify_many(
+        get_recipient_ids('admins'),
+        notification_type='leave_request',
+        title='New Leave Request',
+        message=f'Leave request from {leave_request.user.employee_id} for {leave_request.start_date} requires approval.',
+        priority='medium',
+        related_object_id=f'leave_{leave_request.id}'
+    )
 
 def notify_leave_approval(leave_request, approved=True):
     """Notify user about leave approval/rejection"""
@@ -112,43 +177,32 @@ def notify_leave_approval(leave_request, approved=True):
 def notify_attendance_marked(attendance):
     """Notify DC and Admin when user marks attendance"""
     # Notify DC of same DCCB
-    dcs = CustomUser.objects.filter(
-        designation='DC',
-        dccb=attendance.user.dccb,
-        is_active=True
+    notify_many(
+        get_recipient_ids('dccb_dcs', attendance.user.dccb),
+        notification_type='system_alert',
+        title='Attendance Marked',
+        message=f'{attendance.user.employee_id} marked attendance as {attendance.status} at {attendance.check_in_time or "N/A"}',
+        priority='low'
     )
     
-    for dc in dcs:
-        create_notification(
-            recipient=dc,
-            notification_type='system_alert',
-            title='Attendance Marked',
-            message=f'{attendance.user.employee_id} marked attendance as {attendance.status} at {attendance.check_in_time or "N/A"}',
-            priority='low'
-        )
-    
     # Notify Admins
-    admins = CustomUser.objects.filter(role_level__gte=10, is_active=True)
-    for admin in admins:
-        create_notification(
-            recipient=admin,
-            notification_type='system_alert',
-            title='Daily Attendance Update',
-            message=f'{attendance.user.employee_id} ({attendance.user.dccb}) marked {attendance.status}',
-            priority='low'
-        )
+    notify_many(
+        get_recipient_ids('admins'),
+        notification_type='system_alert',
+        title='Daily Attendance Update',
+        message=f'{attendance.user.employee_id} ({attendance.user.dccb}) marked {attendance.status}',
+        priority='low'
+    )
 
 def notify_dc_confirmation(dc_user, confirmed_count, date_range):
     """Notify Admin when DC confirms attendance"""
-    admins = CustomUser.objects.filter(role_level__gte=10, is_active=True)
-    for admin in admins:
-        create_notification(
-            recipient=admin,
-            notification_type='system_alert',
-            title='DC Confirmation Completed',
-            message=f'DC {dc_user.employee_id} confirmed {confirmed_count} attendance records for {date_range}',
-            priority='medium'
-        )
+    notify_many(
+        get_recipient_ids('admins'),
+        notification_type='system_alert',
+        title='DC Confirmation Completed',
+        message=f'DC {dc_user.employee_id} confirmed {confirmed_count} attendance records for {date_range}',
+        priority='medium'
+    )
 
 def notify_dc_confirmation_to_user(user, dc_user):
     """Notify MT/Support when their attendance is confirmed by DC"""
@@ -172,44 +226,46 @@ def notify_admin_approval_to_user(user, admin_user):
             priority='medium'
         )
 
+def notify_admin_approval_to_users(user_ids, admin_user):
+    """Bulk variant of notify_admin_approval_to_user - one notification per approved record"""
+    designations = dict(
+        CustomUser.objects.filter(id__in=set(user_ids)).values_list('id', 'designation')
+    )
+    return notify_many(
+        [user_id for user_id in user_ids if designations.get(user_id) in ['MT', 'Support']],
+        notification_type='system_alert',
+        title='Attendance Approved by Admin',
+        message=f'Your attendance has been approved by Admin {admin_user.employee_id}',
+        priority='medium'
+    )
+
 def notify_new_user_registration(new_user):
     """Notify Admins about new user registration"""
-    admins = CustomUser.objects.filter(role_level__gte=10, is_active=True)
-    for admin in admins:
-        create_notification(
-            recipient=admin,
-            notification_type='system_alert',
-            title='New User Registration',
-            message=f'New user {new_user.employee_id} ({new_user.designation}) has registered and needs activation.',
-            priority='high'
-        )
+    notify_many(
+        get_recipient_ids('admins'),
+        notification_type='system_alert',
+        title='New User Registration',
+        message=f'New user {new_user.employee_id} ({new_user.designation}) has registered and needs activation.',
+        priority='high'
+    )
 
 def notify_attendance_late_arrival(attendance):
     """Notify DC and Admin about late arrivals"""
     if attendance.check_in_time and attendance.check_in_time > timezone.now().time().replace(hour=9, minute=30):
         # Notify DC
-        dcs = CustomUser.objects.filter(
-            designation='DC',
-            dccb=attendance.user.dccb,
-            is_active=True
+        notify_many(
+            get_recipient_ids('dccb_dcs', attendance.user.dccb),
+            notification_type='system_alert',
+            title='Late Arrival Alert',
+            message=f'{attendance.user.employee_id} arrived late at {attendance.check_in_time.strftime("%H:%M")}',
+            priority='medium'
         )
         
-        for dc in dcs:
-            create_notification(
-                recipient=dc,
-                notification_type='system_alert',
-                title='Late Arrival Alert',
-                message=f'{attendance.user.employee_id} arrived late at {attendance.check_in_time.strftime("%H:%M")}',
-                priority='medium'
-            )
-        
         # Notify Admins
-        admins = CustomUser.objects.filter(role_level__gte=10, is_active=True)
-        for admin in admins:
-            create_notification(
-                recipient=admin,
-                notification_type='system_alert',
-                title='Late Arrival Alert',
-                message=f'{attendance.user.employee_id} ({attendance.user.dccb}) arrived late at {attendance.check_in_time.strftime("%H:%M")}',
-                priority='low'
-            )
\ No newline at end of file
+        notify_many(
+            get_recipient_ids('admins'),
+            notification_type='system_alert',
+            title='Late Arrival Alert',
+            message=f'{attendance.user.employee_id} ({attendance.user.dccb}) arrived late at {attendance.check_in_time.strftime("%H:%M")}',
+            priority='low'
+        )
\ No newline at end of file
@@ -1,45 +1,118 @@
 from django.shortcuts import render
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.db.models import Count, Max, Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
+from asgiref.sync import sync_to_async
 from .models import Notification
+from .notification_service import bump_notification_version, get_notification_version
+from .shared_cache import cache_is_shared
+import asyncio
 import json
+import time
 
-@login_required
-def get_notifications(request):
-    """Get notifications for current user (excluding expired)"""
-    # Clean up expired notifications first
-    from .notification_service import cleanup_expired_notifications
-    cleanup_expired_notifications()
-    
+def notification_payload(user_id):
+    """Latest 15 unexpired notifications and the unread count for one user"""
+    # Expired rows are filtered here and purged by the cleanup_notifications command
     notifications = Notification.objects.filter(
-        recipient=request.user
-    ).order_by('-created_at')[:15]
+        recipient_id=user_id
+    ).exclude(expires_at__lt=timezone.now()).order_by('-created_at')[:15]
     
     notification_data = []
     for notif in notifications:
-        if not notif.is_expired:  # Skip expired notifications
-            notification_data.append({
-                'id': notif.id,
-                'title': notif.title,
-                'message': notif.message,
-                'type': notif.notification_type,
-                'priority': notif.priority,
-                'is_read': notif.is_read,
-                'created_at': notif.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'time_ago': get_time_ago(notif.created_at)
-            })
+        notification_data.append({
+            'id': notif.id,
+            'title': notif.title,
+            'message': notif.message,
+            'type': notif.notification_type,
+            'priority': notif.priority,
+            'is_read': notif.is_read,
+            'created_at': notif.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'time_ago': get_time_ago(notif.created_at)
+        })
     
     unread_count = Notification.objects.filter(
-        recipient=request.user,
+        recipient_id=user_id,
         is_read=False
     ).exclude(expires_at__lt=timezone.now()).count()
     
-    return JsonResponse({
+    return {
         'notifications': notification_data,
         'unread_count': unread_count
-    })
+    }
+
+def notification_state(user_id):
+    """Cheap fingerprint of a user's notifications - changes when one arrives, is read or expires"""
+    live = Q(expires_at__isnull=True) | Q(expires_at__gte=timezone.now())
+    state = Notification.objects.filter(recipient_id=user_id).aggregate(
+        latest=Max('id'),
+        visible=Count('id', filter=live),
+        unread=Count('id', filter=live & Q(is_read=False)),
+    )
+    return (state['latest'], state['visible'], state['unread'])
+
+@login_required
+def get_notifications(request):
+    """Get notifications for current user (excluding expired)"""
+    return JsonResponse(notification_payload(request.user.id))
+
+async def notification_events(user_id):
+    """
+    Server-sent event stream for one user.
+    Every NOTIFICATION_STREAM_INTERVAL seconds the user's cache version is compared (no query);
+    the database fingerprint is only read when the version moved, or every
+    NOTIFICATION_STREAM_RESYNC seconds to catch expiries. Without a shared cache the run_tasks
+    worker's version bumps never reach this process, so the fingerprint is read on every check.
+    The full payload is sent when the fingerprint changes; the stream closes after
+    NOTIFICATION_STREAM_TIMEOUT and the browser reconnects.
+    """
+    interval = getattr(settings, 'NOTIFICATION_STREAM_INTERVAL', 5)
+    resync = getattr(settings, 'NOTIFICATION_STREAM_RESYNC', 60)
+    deadline = time.monotonic() + getattr(settings, 'NOTIFICATION_STREAM_TIMEOUT', 300)
+    yield f'retry: {interval * 1000}\n\n'
+    
+    last_version = last_state = object()
+    resync_at = 0
+    shared = cache_is_shared()
+    while True:
+        version = await sync_to_async(get_notification_version)(user_id)
+        if not shared or version != last_version or time.monotonic() >= resync_at:
+            last_version = version
+            resync_at = time.monotonic() + resync
+            state = await sync_to_async(notification_state)(user_id)
+        else:
+            state = last_state
+        
+        if state != last_state:
+            payload = await sync_to_async(notification_payload)(user_id)
+            yield f'event: notifications\ndata: {json.dumps(payload)}\n\n'
+            last_state = state
+        else:
+            yield ': keepalive\n\n'
+        
+        if time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(interval)
+
+async def notification_stream(request):
+    """Push notifications and the unread count to the browser (Server-Sent Events)"""
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI an open stream would hold a sync worker for its whole lifetime;
+        # 204 closes the EventSource and the page falls back to polling
+        return HttpResponse(status=204)
+    
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        # 204 tells EventSource not to reconnect
+        return HttpResponse(status=204)
+    
+    response = StreamingHttpResponse(notification_events(request.user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @login_required
 @require_http_methods(["POST"])
@@ -69,6 +142,7 @@ def mark_all_notifications_read(request):
         is_read=True,
         read_at=timezone.now()
     )
+    bump_notification_version([request.user.id])
     
     return JsonResponse({'success': True})
 
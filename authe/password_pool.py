@@ -0,0 +1,33 @@
+"""
+Password hashing pool - spreads make_password over worker processes for bulk user creation
+Kept free of model imports so spawned workers can load it before Django is set up
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+def _hash_chunk(passwords):
+    """Worker body - set up Django if this process was spawned rather than forked"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from django.contrib.auth.hashers import make_password
+    return [make_password(password) for password in passwords]
+
+def hash_passwords(passwords, workers=None, inline_below=20):
+    """
+    Hash passwords in order. Small batches are hashed in-process;
+    larger ones are split across up to `workers` processes (default: CPU count).
+    """
+    passwords = list(passwords)
+    workers = workers or os.cpu_count() or 1
+    if len(passwords) < inline_below or workers < 2:
+        return _hash_chunk(passwords)
+    
+    chunk_size = -(-len(passwords) // (workers * 4))
+    chunks = [passwords[start:start + chunk_size] for start in range(0, len(passwords), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        hashed = []
+        for chunk_hashes in pool.map(_hash_chunk, chunks):
+            hashed.extend(chunk_hashes)
+    return hashed
@@ -6,6 +6,9 @@ from django.db.models import Q, Count, Case, When, IntegerField, F, Avg
 from datetime import datetime, timedelta, time
 from .models import CustomUser, Attendance, LeaveRequest, TravelRequest
 from .admin_views import admin_required
+from .attendance_summary import aggregate_attendance, summary_totals
+from .csv_export import iter_values, stream_csv
+from .interval_index import build_interval_indexes
 import csv
 import json
 from math import radians, cos, sin, asin, sqrt
@@ -38,31 +41,36 @@ def reports_analytics_dashboard(request):
     
     total_employees = employees.count()
     
-    # Attendance Analytics for selected date
-    attendance_today = Attendance.objects.filter(date=selected_date, user__in=employees)
+    # Attendance Analytics for selected date - read from the daily summary table
+    if department_filter:
+        # Department is not part of the summary key, count live
+        counters = aggregate_attendance(Attendance.objects.filter(date=selected_date, user__in=employees))
+    else:
+        counters = summary_totals(selected_date, dccb=dccb_filter, designation=designation_filter)
+    marked = counters['present'] + counters['half_day'] + counters['absent'] + counters['not_marked']
     
     attendance_stats = {
-        'present': attendance_today.filter(status='present').count(),
-        'half_day': attendance_today.filter(status='half_day').count(),
-        'absent': attendance_today.filter(status='absent').count(),
-        'not_marked': total_employees - attendance_today.count(),
-        'on_time': attendance_today.filter(check_in_time__lte=time(9, 30)).count(),
-        'late': attendance_today.filter(check_in_time__gt=time(9, 30)).count(),
+        'present': counters['present'],
+        'half_day': counters['half_day'],
+        'absent': counters['absent'],
+        'not_marked': total_employees - marked,
+        'on_time': counters['on_time'],
+        'late': counters['late'],
     }
     
     # Travel Analytics
     travel_stats = {
-        'traveling': attendance_today.filter(travel_required=True).count(),
-        'not_traveling': attendance_today.filter(travel_required=False).count(),
-        'travel_approved': attendance_today.filter(travel_approved=True).count(),
+        'traveling': counters['travelling'],
+        'not_traveling': marked - counters['travelling'],
+        'travel_approved': counters['travel_approved'],
     }
     
     # Approval Analytics
     approval_stats = {
-        'dc_pending': attendance_today.filter(is_confirmed_by_dc=False).count(),
-        'dc_confirmed': attendance_today.filter(is_confirmed_by_dc=True).count(),
-        'admin_pending': attendance_today.filter(is_confirmed_by_dc=True, is_approved_by_admin=False).count(),
-        'admin_approved': attendance_today.filter(is_approved_by_admin=True).count(),
+        'dc_pending': marked - counters['dc_confirmed'],
+        'dc_confirmed': counters['dc_confirmed'],
+        'admin_pending': counters['admin_pending'],
+        'admin_approved': counters['admin_approved'],
     }
     
     # Leave Analytics - Enhanced
@@ -73,7 +81,7 @@ def reports_analytics_dashboard(request):
             start_date__lte=selected_date,
             end_date__gte=selected_date
         ).count(),
-        'on_leave_today': attendance_today.filter(is_leave_day=True).count(),
+        'on_leave_today': counters['on_leave'],
     }
     
     # Calculate percentages for better visualization
@@ -129,14 +137,15 @@ def attendance_analytics_api(request):
     if dccb_filter:
         employees = employees.filter(dccb=dccb_filter)
     
-    attendance_records = Attendance.objects.filter(date=selected_date, user__in=employees)
+    counters = summary_totals(selected_date, dccb=dccb_filter)
     
     # Attendance Progress Data
     total_employees = employees.count()
-    present_count = attendance_records.filter(status='present').count()
-    half_day_count = attendance_records.filter(status='half_day').count()
-    absent_count = attendance_records.filter(status='absent').count()
-    not_marked_count = total_employees - attendance_records.count()
+    present_count = counters['present']
+    half_day_count = counters['half_day']
+    absent_count = counters['absent']
+    marked_count = present_count + half_day_count + absent_count + counters['not_marked']
+    not_marked_count = total_employees - marked_count
     
     attendance_progress = {
         'labels': ['Present', 'Half Day', 'Absent', 'Not Marked'],
@@ -145,8 +154,8 @@ def attendance_analytics_api(request):
     }
     
     # Travel Participation Data
-    traveling_count = attendance_records.filter(travel_required=True).count()
-    not_traveling_count = attendance_records.filter(travel_required=False).count()
+    traveling_count = counters['travelling']
+    not_traveling_count = marked_count - traveling_count
     
     travel_participation = {
         'labels': ['Traveling', 'Not Traveling'],
@@ -155,8 +164,8 @@ def attendance_analytics_api(request):
     }
     
     # Punctuality Data
-    on_time_count = attendance_records.filter(check_in_time__lte=time(9, 30)).count()
-    late_count = attendance_records.filter(check_in_time__gt=time(9, 30)).count()
+    on_time_count = counters['on_time']
+    late_count = counters['late']
     
     punctuality_data = {
         'labels': ['On Time', 'Late'],
@@ -188,24 +197,25 @@ def attendance_trend_api(request):
     
     dccb_filter = request.GET.get('dccb', '')
     
-    # Base query
-    employees = CustomUser.objects.filter(role='field_officer', is_active=True)
-    if dccb_filter:
-        employees = employees.filter(dccb=dccb_filter)
+    # One grouped read of the daily summary table for the whole window
+    daily = {
+        row['date']: row
+        for row in summary_totals(start_date, end_date, dccb=dccb_filter, group_by=('date',))
+    }
     
     trend_data = []
     labels = []
     
     current_date = start_date
     while current_date <= end_date:
-        attendance_day = Attendance.objects.filter(date=current_date, user__in=employees)
+        day = daily.get(current_date, {})
         
         day_stats = {
-            'present': attendance_day.filter(status='present').count(),
-            'half_day': attendance_day.filter(status='half_day').count(),
-            'absent': attendance_day.filter(status='absent').count(),
-            'on_time': attendance_day.filter(check_in_time__lte=time(9, 30)).count(),
-            'late': attendance_day.filter(check_in_time__gt=time(9, 30)).count(),
+            'present': day.get('present') or 0,
+            'half_day': day.get('half_day') or 0,
+            'absent': day.get('absent') or 0,
+            'on_time': day.get('on_time') or 0,
+            'late': day.get('late') or 0,
         }
         
         trend_data.append(day_stats)
@@ -278,33 +288,32 @@ def export_master_employee_report(request):
     
     employees = employees.order_by('employee_id')
     
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="master_employee_report_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    
     # Enhanced Header
-    writer.writerow([
+    header = [
         'EMP ID', 'Name', 'Designation', 'Department', 'Contact Number',
         'DCCB', 'Reporting Manager', 'Email ID', 'Date Joined', 'Status'
-    ])
+    ]
     
     # Data rows
-    for employee in employees:
-        writer.writerow([
-            employee.employee_id,
-            employee.get_full_name(),
-            employee.designation,
-            employee.department or 'N/A',
-            employee.contact_number,
-            employee.dccb,
-            'N/A',  # Reporting Manager - to be implemented
-            employee.email,
-            employee.date_joined.strftime('%Y-%m-%d'),
-            'Active' if employee.is_active else 'Inactive'
-        ])
-    
-    return response
+    def rows():
+        for employee in iter_values(
+            employees, 'employee_id', 'first_name', 'last_name', 'designation', 'department',
+            'contact_number', 'dccb', 'email', 'date_joined', 'is_active'
+        ):
+            yield [
+                employee['employee_id'],
+                f"{employee['first_name']} {employee['last_name']}".strip(),
+                employee['designation'],
+                employee['department'] or 'N/A',
+                employee['contact_number'],
+                employee['dccb'],
+                'N/A',  # Reporting Manager - to be implemented
+                employee['email'],
+                employee['date_joined'].strftime('%Y-%m-%d'),
+                'Active' if employee['is_active'] else 'Inactive'
+            ]
+    
+    return stream_csv(f'master_employee_report_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv', header, rows())
 
 @login_required
 @admin_required
@@ -327,7 +336,7 @@ def export_master_attendance_report(request):
     # Get ALL attendance records in date range
     attendance_records = Attendance.objects.filter(
         date__range=[start_date, end_date]
-    ).select_related('user', 'confirmed_by_dc', 'approved_by_admin').order_by('date', 'user__employee_id')
+    ).order_by('date', 'user__employee_id')
     
     # Apply filters
     if dccb_filter:
@@ -335,13 +344,8 @@ def export_master_attendance_report(request):
     if employee_filter:
         attendance_records = attendance_records.filter(user__employee_id__icontains=employee_filter)
     
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="MPMT_Master_Attendance_Report_{start_date}_{end_date}.csv"'
-    
-    writer = csv.writer(response)
-    
     # COMPREHENSIVE Header with ALL data fields
-    writer.writerow([
+    header = [
         'Employee ID', 'Employee Name', 'Contact Number', 'Email', 'Designation', 
         'Department', 'DCCB', 'Reporting Manager', 'Date', 'Day of Week',
         'Check-In Time', 'Check-Out Time', 'Attendance Status', 'Time Status (On Time/Late)',
@@ -353,111 +357,137 @@ def export_master_attendance_report(request):
         'Leave Status', 'Leave Type', 'Leave Reason', 'Leave Approved By',
         'Marked At (Date)', 'Marked At (Time)', 'Last Updated', 'Record Status',
         'GPS Accuracy', 'Device Info', 'IP Address', 'Remarks/Notes'
-    ])
+    ]
+    
+    # Bulk-load every travel and leave interval overlapping the range for the exported users
+    export_users = attendance_records.values('user_id')
+    travel_indexes = build_interval_indexes(
+        TravelRequest.objects.filter(
+            user_id__in=export_users, from_date__lte=end_date, to_date__gte=start_date
+        ).order_by().values(
+            'user_id', 'from_date', 'to_date', 'created_at',
+            'distance_km', 'purpose', 'er_id', 'contact_person'
+        ),
+        'from_date', 'to_date', 'created_at'
+    )
+    leave_indexes = build_interval_indexes(
+        LeaveRequest.objects.filter(
+            user_id__in=export_users, start_date__lte=end_date, end_date__gte=start_date
+        ).order_by().values(
+            'user_id', 'start_date', 'end_date', 'applied_at',
+            'leave_type', 'reason', 'approved_by__employee_id'
+        ),
+        'start_date', 'end_date', 'applied_at'
+    )
     
     # Process each attendance record
-    for record in attendance_records:
-        # Calculate working hours
-        working_hours = 0
-        break_hours = 0
-        overtime_hours = 0
-        
-        if record.check_in_time and record.check_out_time:
-            check_in_datetime = datetime.combine(record.date, record.check_in_time)
-            check_out_datetime = datetime.combine(record.date, record.check_out_time)
-            total_hours = (check_out_datetime - check_in_datetime).total_seconds() / 3600
+    def rows():
+        for record in iter_values(
+            attendance_records,
+            'user_id', 'user__employee_id', 'user__first_name', 'user__last_name', 'user__contact_number',
+            'user__email', 'user__designation', 'user__department', 'user__dccb', 'user__reporting_manager',
+            'user__is_active', 'date', 'check_in_time', 'check_out_time', 'status', 'latitude', 'longitude',
+            'workplace', 'task', 'travel_required', 'travel_approved', 'is_confirmed_by_dc',
+            'confirmed_by_dc__employee_id', 'dc_confirmed_at', 'is_approved_by_admin',
+            'approved_by_admin__employee_id', 'admin_approved_at', 'marked_at', 'updated_at', 'remarks'
+        ):
+            # Calculate working hours
+            working_hours = 0
+            break_hours = 0
+            overtime_hours = 0
             
-            # Standard working hours calculation
-            if total_hours > 8:
-                working_hours = 8
-                overtime_hours = round(total_hours - 8, 2)
-            else:
-                working_hours = round(total_hours, 2)
+            if record['check_in_time'] and record['check_out_time']:
+                check_in_datetime = datetime.combine(record['date'], record['check_in_time'])
+                check_out_datetime = datetime.combine(record['date'], record['check_out_time'])
+                total_hours = (check_out_datetime - check_in_datetime).total_seconds() / 3600
+                
+                # Standard working hours calculation
+                if total_hours > 8:
+                    working_hours = 8
+                    overtime_hours = round(total_hours - 8, 2)
+                else:
+                    working_hours = round(total_hours, 2)
+                
+                # Assume 1 hour break for full day
+                if total_hours > 4:
+                    break_hours = 1
             
-            # Assume 1 hour break for full day
-            if total_hours > 4:
-                break_hours = 1
-        
-        # Time status
-        time_status = 'On Time'
-        if record.check_in_time and record.check_in_time > time(9, 30):
-            time_status = 'Late'
-        elif not record.check_in_time:
-            time_status = 'Not Marked'
-        
-        # Get travel request info for this date
-        travel_request = TravelRequest.objects.filter(
-            user=record.user,
-            from_date__lte=record.date,
-            to_date__gte=record.date
-        ).first()
-        
-        # Get leave request info for this date
-        leave_request = LeaveRequest.objects.filter(
-            user=record.user,
-            start_date__lte=record.date,
-            end_date__gte=record.date
-        ).first()
-        
-        # Day of week
-        day_of_week = record.date.strftime('%A')
-        
-        # Record status
-        record_status = 'Active'
-        if not record.user.is_active:
-            record_status = 'Inactive Employee'
-        
-        writer.writerow([
-            record.user.employee_id,
-            record.user.get_full_name(),
-            record.user.contact_number or 'N/A',
-            record.user.email or 'N/A',
-            record.user.designation or 'N/A',
-            record.user.department or 'N/A',
-            record.user.dccb or 'N/A',
-            record.user.reporting_manager or 'N/A',
-            record.date.strftime('%Y-%m-%d'),
-            day_of_week,
-            record.check_in_time.strftime('%H:%M:%S') if record.check_in_time else 'Not Marked',
-            record.check_out_time.strftime('%H:%M:%S') if record.check_out_time else 'Not Marked',
-            record.status.title(),
-            time_status,
-            working_hours,
-            break_hours,
-            overtime_hours,
-            record.latitude or 'N/A',
-            record.longitude or 'N/A',
-            record.workplace or 'N/A',
-            record.task or 'N/A',
-            'Y' if record.travel_required else 'N',
-            'Y' if record.travel_approved else 'N',
-            travel_request.distance_km if travel_request else 'N/A',
-            travel_request.purpose if travel_request else 'N/A',
-            travel_request.er_id if travel_request else 'N/A',
-            travel_request.contact_person if travel_request else 'N/A',
-            'Confirmed' if record.is_confirmed_by_dc else 'Pending',
-            record.confirmed_by_dc.employee_id if record.confirmed_by_dc else 'N/A',
-            record.dc_confirmed_at.strftime('%Y-%m-%d') if record.dc_confirmed_at else 'N/A',
-            record.dc_confirmed_at.strftime('%H:%M:%S') if record.dc_confirmed_at else 'N/A',
-            'Approved' if record.is_approved_by_admin else 'Pending',
-            record.approved_by_admin.employee_id if record.approved_by_admin else 'N/A',
-            record.admin_approved_at.strftime('%Y-%m-%d') if record.admin_approved_at else 'N/A',
-            record.admin_approved_at.strftime('%H:%M:%S') if record.admin_approved_at else 'N/A',
-            'On Leave' if leave_request else 'Working',
-            leave_request.leave_type if leave_request else 'N/A',
-            leave_request.reason if leave_request else 'N/A',
-            leave_request.approved_by.employee_id if leave_request and leave_request.approved_by else 'N/A',
-            record.marked_at.strftime('%Y-%m-%d') if record.marked_at else 'N/A',
-            record.marked_at.strftime('%H:%M:%S') if record.marked_at else 'N/A',
-            record.updated_at.strftime('%Y-%m-%d %H:%M:%S') if hasattr(record, 'updated_at') and record.updated_at else 'N/A',
-            record_status,
-            'High' if record.latitude and record.longitude else 'N/A',  # GPS Accuracy placeholder
-            'Mobile App',  # Device Info placeholder
-            'N/A',  # IP Address placeholder
-            record.remarks if hasattr(record, 'remarks') and record.remarks else 'N/A'
-        ])
-    
-    return response
+            # Time status
+            time_status = 'On Time'
+            if record['check_in_time'] and record['check_in_time'] > time(9, 30):
+                time_status = 'Late'
+            elif not record['check_in_time']:
+                time_status = 'Not Marked'
+            
+            # Travel and leave request covering this date (latest request wins, as before)
+            travel_index = travel_indexes.get(record['user_id'])
+            travel_request = travel_index.find(record['date']) if travel_index else None
+            leave_index = leave_indexes.get(record['user_id'])
+            leave_request = leave_index.find(record['date']) if leave_index else None
+            
+            # Day of week
+            day_of_week = record['date'].strftime('%A')
+            
+            # Record status
+            record_status = 'Active'
+            if not record['user__is_active']:
+                record_status = 'Inactive Employee'
+            
+            dc_confirmed_at = record['dc_confirmed_at']
+            admin_approved_at = record['admin_approved_at']
+            marked_at = record['marked_at']
+            
+            yield [
+                record['user__employee_id'],
+                f"{record['user__first_name']} {record['user__last_name']}".strip(),
+                record['user__contact_number'] or 'N/A',
+                record['user__email'] or 'N/A',
+                record['user__designation'] or 'N/A',
+                record['user__department'] or 'N/A',
+                record['user__dccb'] or 'N/A',
+                record['user__reporting_manager'] or 'N/A',
+                record['date'].strftime('%Y-%m-%d'),
+                day_of_week,
+                record['check_in_time'].strftime('%H:%M:%S') if record['check_in_time'] else 'Not Marked',
+                record['check_out_time'].strftime('%H:%M:%S') if record['check_out_time'] else 'Not Marked',
+                record['status'].title(),
+                time_status,
+                working_hours,
+                break_hours,
+                overtime_hours,
+                record['latitude'] or 'N/A',
+                record['longitude'] or 'N/A',
+                record['workplace'] or 'N/A',
+                record['task'] or 'N/A',
+                'Y' if record['travel_required'] else 'N',
+                'Y' if record['travel_approved'] else 'N',
+                travel_request['distance_km'] if travel_request else 'N/A',
+                travel_request['purpose'] if travel_request else 'N/A',
+                travel_request['er_id'] if travel_request else 'N/A',
+                travel_request['contact_person'] if travel_request else 'N/A',
+                'Confirmed' if record['is_confirmed_by_dc'] else 'Pending',
+                record['confirmed_by_dc__employee_id'] or 'N/A',
+                dc_confirmed_at.strftime('%Y-%m-%d') if dc_confirmed_at else 'N/A',
+                dc_confirmed_at.strftime('%H:%M:%S') if dc_confirmed_at else 'N/A',
+                'Approved' if record['is_approved_by_admin'] else 'Pending',
+                record['approved_by_admin__employee_id'] or 'N/A',
+                admin_approved_at.strftime('%Y-%m-%d') if admin_approved_at else 'N/A',
+                admin_approved_at.strftime('%H:%M:%S') if admin_approved_at else 'N/A',
+                'On Leave' if leave_request else 'Working',
+                leave_request['leave_type'] if leave_request else 'N/A',
+                leave_request['reason'] if leave_request else 'N/A',
+                (leave_request['approved_by__employee_id'] or 'N/A') if leave_request else 'N/A',
+                marked_at.strftime('%Y-%m-%d') if marked_at else 'N/A',
+                marked_at.strftime('%H:%M:%S') if marked_at else 'N/A',
+                record['updated_at'].strftime('%Y-%m-%d %H:%M:%S') if record['updated_at'] else 'N/A',
+                record_status,
+                'High' if record['latitude'] and record['longitude'] else 'N/A',  # GPS Accuracy placeholder
+                'Mobile App',  # Device Info placeholder
+                'N/A',  # IP Address placeholder
+                record['remarks'] or 'N/A'
+            ]
+    
+    return stream_csv(f'MPMT_Master_Attendance_Report_{start_date}_{end_date}.csv', header, rows())
 
 @login_required
 @admin_required
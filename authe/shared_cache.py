@@ -0,0 +1,20 @@
+"""
+Shared Cache - whether cache invalidations reach every process
+The web workers and the run_tasks worker only see each other's invalidations through a shared
+backend (Redis); with the per-process memory cache, cached lookups are kept to a few seconds instead.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+def cache_is_shared():
+    """True when the default cache is visible to every process (not the local memory or dummy backend)"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+def cache_ttl(setting_name, default):
+    """TTL from the named setting, capped at PROCESS_LOCAL_CACHE_TTL when the cache is per process"""
+    ttl = getattr(settings, setting_name, default)
+    if cache_is_shared():
+        return ttl
+    return min(ttl, getattr(settings, 'PROCESS_LOCAL_CACHE_TTL', 5))
@@ -1,23 +1,33 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from django.core.management import call_command
 import logging
+from .models import Attendance, LeaveRequest, Notification, TravelRequest
+from .kpi_service import invalidate_dashboard_kpis
+from .attendance_summary import refresh_summary, refresh_summary_for_user
+from .notification_service import bump_notification_version, invalidate_recipient_cache
+from .associate_directory import invalidate_associate_directory
+from .user_journal import record_user_change
+from .middleware import invalidate_persistence_state
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=User)
-def backup_on_user_save(sender, instance, created, **kwargs):
+def backup_on_user_save(sender, instance, created, update_fields=None, **kwargs):
     """Automatically backup users when any user is created or updated"""
+    # last_login-only saves (every login) do not touch backed-up fields
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    
     try:
         if created:
             logger.info(f"New user created: {instance.employee_id}, triggering backup")
         else:
             logger.info(f"User updated: {instance.employee_id}, triggering backup")
         
-        # Run backup in background
-        call_command('preserve_users', '--action=backup', verbosity=0)
+        # Append this user's change to the backup journal
+        record_user_change(instance)
         
     except Exception as e:
         logger.error(f"Auto-backup failed: {e}")
@@ -27,7 +37,83 @@ def backup_on_user_delete(sender, instance, **kwargs):
     """Automatically backup users when any user is deleted"""
     try:
         logger.info(f"User deleted: {instance.employee_id}, triggering backup")
-        call_command('preserve_users', '--action=backup', verbosity=0)
+        record_user_change(instance, deleted=True)
         
     except Exception as e:
-        logger.error(f"Auto-backup on delete failed: {e}")
\ No newline at end of file
+        logger.error(f"Auto-backup on delete failed: {e}")
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_delete, sender=LeaveRequest)
+@receiver(post_save, sender=TravelRequest)
+@receiver(post_delete, sender=TravelRequest)
+def invalidate_kpis_on_change(sender, **kwargs):
+    """Drop cached dashboard KPIs whenever the underlying data changes"""
+    invalidate_dashboard_kpis()
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refresh_attendance_summary(sender, instance, **kwargs):
+    """Keep the DailyAttendanceSummary row for this record's (date, dccb, designation) current"""
+    try:
+        user = instance.user
+        if user.role == 'field_officer':
+            refresh_summary([(instance.date, user.dccb, user.designation)])
+    except Exception as e:
+        logger.error(f"Attendance summary refresh failed: {e}")
+
+@receiver(pre_save, sender=User)
+def remember_summary_key(sender, instance, update_fields=None, **kwargs):
+    """Remember the user's previous DCCB/designation/role/active flag so summaries can be moved on change"""
+    instance._summary_key = None
+    if not instance.pk:
+        return
+    if update_fields is not None and not {'dccb', 'designation', 'role', 'is_active'} & set(update_fields):
+        return
+    instance._summary_key = sender.objects.filter(pk=instance.pk).values_list(
+        'dccb', 'designation', 'role', 'is_active'
+    ).first()
+
+@receiver(post_save, sender=User)
+def move_attendance_summary(sender, instance, created, **kwargs):
+    """Recount summaries when a field officer's DCCB, designation, role or active flag changes"""
+    previous = getattr(instance, '_summary_key', None)
+    current = (instance.dccb, instance.designation, instance.role, instance.is_active)
+    if created or previous is None or previous == current:
+        return
+    try:
+        refresh_summary_for_user(instance, dccb=previous[0], designation=previous[1])
+    except Exception as e:
+        logger.error(f"Attendance summary move failed: {e}")
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_notification_recipients(sender, update_fields=None, **kwargs):
+    """Drop cached notification recipient sets when users are added, changed or removed"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_recipient_cache()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_associate_lookup(sender, update_fields=None, **kwargs):
+    """Rebuild the DCCB -> Associate mapping on the next lookup after users change"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_associate_directory()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_persistence_check(sender, created=True, **kwargs):
+    """Re-run the middleware's user/backup checks after users are added or removed"""
+    if created:
+        invalidate_persistence_state()
+
+@receiver(post_save, sender=Notification)
+def bump_notification_stream(sender, instance, **kwargs):
+    """Let the recipient's open notification stream know their list changed (new or read)"""
+    bump_notification_version([instance.recipient_id])
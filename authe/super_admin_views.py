@@ -9,6 +9,7 @@ from django.db.models import Count, Q
 from django.views.decorators.csrf import csrf_exempt
 from datetime import datetime, timedelta
 from .models import CustomUser, Attendance, LeaveRequest, TravelRequest, SystemAuditLog
+from .kpi_service import get_dashboard_kpis
 import csv
 import json
 
@@ -66,32 +67,33 @@ def admin_dashboard(request):
     
     today = timezone.localdate()
     
-    # Enhanced KPI calculations
-    total_employees = CustomUser.objects.filter(is_active=True, role='field_officer').count()
-    today_attendance = Attendance.objects.filter(date=today)
+    # Enhanced KPI calculations - shared cached aggregate
+    dashboard_kpis = get_dashboard_kpis(today)
+    attendance = dashboard_kpis['attendance']
     
     kpis = {
-        'total_employees': total_employees,
-        'present_today': today_attendance.filter(status='present').count(),
-        'absent_today': today_attendance.filter(status='absent').count(),
-        'half_day_today': today_attendance.filter(status='half_day').count(),
-        'late_arrivals': today_attendance.filter(time_status='late').count(),
-        'not_marked': total_employees - today_attendance.count(),
-        'dc_confirmations_pending': Attendance.objects.filter(
-            date__gte=today - timedelta(days=7),
-            is_confirmed_by_dc=False
-        ).count(),
-        'admin_approvals_pending': Attendance.objects.filter(
-            is_confirmed_by_dc=True,
-            is_approved_by_admin=False
-        ).count(),
-        'pending_leaves': LeaveRequest.objects.filter(status='pending').count(),
-        'pending_travels': TravelRequest.objects.filter(status='pending').count()
+        'total_employees': dashboard_kpis['active_employees'],
+        'present_today': attendance['present'],
+        'absent_today': attendance['absent_status'],
+        'half_day_today': attendance['half_day'],
+        'late_arrivals': attendance['late_time_status'],
+        'not_marked': attendance['not_marked'],
+        'dc_confirmations_pending': dashboard_kpis['approval_status']['dc_unconfirmed_week'],
+        'admin_approvals_pending': dashboard_kpis['approval_status']['confirmed_unapproved'],
+        'pending_leaves': dashboard_kpis['pending_leaves'],
+        'pending_travels': dashboard_kpis['approval_status']['travel_pending']
     }
     
     context = {
         'user': request.user,
         'kpis': kpis,
+        'total_employees': dashboard_kpis['total_employees'],
+        'active_employees': dashboard_kpis['active_employees'],
+        'designation_counts': dashboard_kpis['designation_counts'],
+        'dccb_counts': dashboard_kpis['dccb_counts'],
+        'attendance_kpis': attendance,
+        'approval_status': dashboard_kpis['approval_status'],
+        'pending_leaves': dashboard_kpis['pending_leaves'],
         'today': today,
         'current_time': timezone.now()
     }
@@ -0,0 +1,399 @@
+"""
+Synthetic Data - seedable production-scale dataset for load and performance testing
+Employees across every DCCB with the real designation mix, then per-day attendance with GPS,
+travel requests, leaves, approvals and notifications, all written with bulk_create.
+"""
+import math
+import random
+import uuid
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from .attendance_grid import get_holiday_dates
+from .attendance_summary import rebuild_summary
+from .bulk_upload import after_bulk_create
+from .geofence import evaluate
+from .geohash import ATTENDANCE_PRECISION, encode
+from .kpi_service import invalidate_dashboard_kpis
+from .leave_attendance import leave_remark
+from .models import Attendance, CustomUser, LeaveRequest, Notification, TravelRequest
+from .user_journal import scratch_backup_dir
+
+# Approximate district headquarters of each DCCB
+DCCB_CENTERS = {
+    'AHMEDABAD': (23.0225, 72.5714),
+    'BANASKANTHA': (24.1724, 72.4346),
+    'BARODA': (22.3072, 73.1812),
+    'MAHESANA': (23.5880, 72.3693),
+    'SABARKANTHA': (23.5984, 72.9662),
+    'BHARUCH': (21.7051, 72.9959),
+    'KHEDA': (22.6916, 72.8634),
+    'PANCHMAHAL': (22.7788, 73.6143),
+    'SURENDRANAGAR': (22.7271, 71.6486),
+    'JAMNAGAR': (22.4707, 70.0577),
+    'JUNAGADH': (21.5222, 70.4579),
+    'KODINAR': (20.7903, 70.7031),
+    'KUTCH': (23.2420, 69.6669),
+    'VALSAD': (20.5992, 72.9342),
+    'AMRELI': (21.6032, 71.2221),
+    'BHAVNAGAR': (21.7645, 72.1519),
+    'RAJKOT': (22.3039, 70.8022),
+    'SURAT': (21.1702, 72.8311),
+}
+
+FIRST_NAMES = [
+    'AARAV', 'ANJALI', 'BHAVIN', 'CHIRAG', 'DHRUV', 'DIPIKA', 'HARSH', 'HETAL', 'JAY', 'JIGNESH', 'KAJAL',
+    'KAUSHAL', 'KINJAL', 'MEHUL', 'MITALI', 'NIRAV', 'NISHA', 'PARTH', 'POOJA', 'PRIYANK', 'RAHUL', 'RIDDHI',
+    'RONAK', 'SAGAR', 'SNEHA', 'TEJAS', 'URVI', 'VIRAL', 'VIDHI', 'YASH',
+]
+LAST_NAMES = [
+    'PATEL', 'SHAH', 'DESAI', 'MEHTA', 'JOSHI', 'PANDYA', 'TRIVEDI', 'BHATT', 'PARMAR', 'CHAUHAN', 'SOLANKI',
+    'RATHOD', 'VAGHELA', 'MAKWANA', 'PRAJAPATI', 'THAKKAR', 'DAVE', 'VYAS', 'ZALA', 'GOHIL',
+]
+TASKS = [
+    'PACS visit and data verification', 'Branch training session', 'Loan document audit',
+    'Field survey', 'Member KYC update', 'Software support at PACS', 'Monthly review meeting',
+]
+FIELD_WORKPLACES = ['DCCB', 'PACS', 'Branch', 'Cluster', 'APMC']
+TRAVEL_WORKPLACES = ['PACS', 'Branch', 'Training Centre', 'DR office', 'DDM office']
+
+BATCH_SIZE = 2000
+ASSOCIATE_SPAN = 300  # Field employees per Associate
+DC_SPAN = 50  # Field employees per DC within a DCCB
+
+class SyntheticDataset:
+    """One generation run - every random choice comes from a single seeded Random"""
+    
+    def __init__(self, employees, days, end_date, seed=42, password='Synthetic@123', log=None):
+        self.employee_count = employees
+        self.end_date = end_date
+        self.start_date = end_date - timedelta(days=days - 1)
+        self.rng = random.Random(seed)
+        self.password_hash = make_password(password, salt=f'synthetic{seed}')
+        self.log = log or (lambda message: None)
+        self.counts = {'users': 0, 'attendance': 0, 'travel_requests': 0, 'leave_requests': 0, 'notifications': 0}
+        self.pending = {Attendance: [], TravelRequest: [], LeaveRequest: [], Notification: []}
+        self.admin = CustomUser.objects.filter(role_level__gte=10).order_by('id').first()
+        
+        holidays = get_holiday_dates(self.start_date, self.end_date)
+        self.working_days = []
+        day = self.start_date
+        while day <= self.end_date:
+            if day.weekday() != 6 and day not in holidays:
+                self.working_days.append(day)
+            day += timedelta(days=1)
+    
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+    
+    def aware(self, day, clock):
+        moment = datetime.combine(day, clock)
+        return timezone.make_aware(moment) if settings.USE_TZ else moment
+    
+    def clock(self, mean_minutes, spread, low, high):
+        """Normally distributed time of day, clamped to [low, high] minutes after midnight"""
+        minutes = int(min(max(self.rng.gauss(mean_minutes, spread), low), high))
+        return time(minutes // 60, minutes % 60, self.rng.randrange(60))
+    
+    # Users
+    
+    def build_users(self):
+        """Associates covering groups of DCCBs, and DCs, MTs and Support staff spread across all DCCBs"""
+        start = (CustomUser.objects.filter(employee_id__startswith='MGJ').aggregate(
+            last=Max('employee_id'))['last'] or 'MGJ00000')
+        next_number = int(start[3:]) + 1
+        if next_number + self.employee_count > 100000:
+            raise ValueError('Not enough MGJ employee IDs left for this many employees')
+        taken_contacts = set(CustomUser.objects.values_list('contact_number', flat=True))
+        contact = 7000000000
+        
+        dccbs = [value for value, _ in CustomUser.DCCB_CHOICES]
+        associate_count = max(1, min(len(dccbs), round(self.employee_count / ASSOCIATE_SPAN)))
+        field_count = self.employee_count - associate_count
+        plan = []
+        for index in range(associate_count):
+            plan.append(('Associate', None, dccbs[index::associate_count]))
+        for position, dccb in enumerate(dccbs):
+            staff = field_count // len(dccbs) + (position < field_count % len(dccbs))
+            dc_count = min(staff, max(1, staff // DC_SPAN))
+            for index in range(staff):
+                if index < dc_count:
+                    designation = 'DC'
+                else:
+                    designation = 'MT' if self.rng.random() < 0.65 else 'Support'
+                plan.append((designation, dccb, []))
+        
+        users = []
+        for designation, dccb, covered in plan:
+            while str(contact) in taken_contacts:
+                contact += 1
+            user = CustomUser(
+                employee_id=f'MGJ{next_number:05d}',
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+                email=f'mgj{next_number:05d}@synthetic.satshine.in',
+                contact_number=str(contact),
+                password=self.password_hash,
+                designation=designation,
+                department='Field Support',
+                dccb=dccb,
+                multiple_dccb=covered,
+                reporting_manager='SYNTHETIC MANAGER',
+                date_of_joining=self.start_date - timedelta(days=self.rng.randrange(30, 1100))
+            )
+            user.apply_defaults()
+            users.append(user)
+            next_number += 1
+            contact += 1
+        
+        CustomUser.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        users = list(CustomUser.objects.filter(employee_id__in=[user.employee_id for user in users]).order_by('id'))
+        self.counts['users'] = len(users)
+        
+        self.associate_for = {}
+        self.dcs_for = {}
+        for user in users:
+            if user.designation == 'Associate':
+                for dccb in user.multiple_dccb:
+                    self.associate_for.setdefault(dccb, user)
+            elif user.designation == 'DC':
+                self.dcs_for.setdefault(user.dccb, []).append(user)
+        return users
+    
+    # Per-employee records
+    
+    def queue(self, record):
+        records = self.pending[type(record)]
+        records.append(record)
+        if len(records) >= BATCH_SIZE:
+            self.flush(type(record))
+    
+    def flush(self, model=None):
+        for record_model in ([model] if model else list(self.pending)):
+            records = self.pending[record_model]
+            if not records:
+                continue
+            if record_model is Attendance:
+                self.geofence(records)
+            record_model.objects.bulk_create(records, batch_size=BATCH_SIZE)
+            key = {Attendance: 'attendance', TravelRequest: 'travel_requests',
+                   LeaveRequest: 'leave_requests', Notification: 'notifications'}[record_model]
+            self.counts[key] += len(records)
+            self.pending[record_model] = []
+    
+    def geofence(self, records):
+        """distance_from_office/is_location_valid for a batch with the vectorized geofence"""
+        located = [record for record in records if record.latitude is not None]
+        if not located:
+            return
+        distances, valid = evaluate(
+            [record.latitude for record in located],
+            [record.longitude for record in located],
+            [record._dccb for record in located],
+            [record.travel_approved for record in located]
+        )
+        for record, distance, is_valid in zip(located, distances, valid):
+            record.distance_from_office = None if math.isnan(distance) else round(float(distance), 1)
+            record.is_location_valid = bool(is_valid)
+    
+    def notify(self, recipient, notification_type, title, message, day, related_object_id):
+        self.queue(Notification(
+            recipient=recipient,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            priority='medium',
+            is_read=day < self.end_date - timedelta(days=2),
+            related_object_id=related_object_id
+        ))
+    
+    def decide(self, approved_share, rejected_share):
+        roll = self.rng.random()
+        if roll < approved_share:
+            return 'approved'
+        if roll < approved_share + rejected_share:
+            return 'rejected'
+        return 'pending'
+    
+    def build_leaves(self, user):
+        """About one leave a month; returns {date: LeaveRequest} for approved leave days"""
+        leave_days = {}
+        expected = len(self.working_days) / 30 * 0.8
+        for _ in range(int(expected) + (self.rng.random() < expected % 1)):
+            start = self.rng.choice(self.working_days)
+            length = self.rng.choices([1, 2, 3], weights=[70, 20, 10])[0]
+            end = min(start + timedelta(days=length - 1), self.end_date)
+            if any(start <= day <= end for day in leave_days):
+                continue
+            status = self.decide(0.75, 0.1)
+            leave = LeaveRequest(
+                user=user,
+                leave_type=self.rng.choice(['planned', 'unplanned']),
+                duration='full_day',
+                start_date=start,
+                end_date=end,
+                days_requested=(end - start).days + 1,
+                reason='Personal work' if self.rng.random() < 0.6 else 'Medical',
+                status=status,
+                approved_by=self.admin if status != 'pending' else None,
+                approved_at=self.aware(start - timedelta(days=1), time(17, 0)) if status != 'pending' else None
+            )
+            self.queue(leave)
+            if status == 'approved':
+                day = start
+                while day <= end:
+                    leave_days[day] = leave
+                    day += timedelta(days=1)
+        return leave_days
+    
+    def build_travel(self, user):
+        """Trips of 1-2 days on about 3% of working days; returns {date: TravelRequest}"""
+        trips = {}
+        if user.designation == 'Associate':
+            return trips
+        approver = self.associate_for.get(user.dccb)
+        for day in self.working_days:
+            if day in trips or self.rng.random() >= 0.03:
+                continue
+            length = 1 if self.rng.random() < 0.7 else 2
+            end = min(day + timedelta(days=length - 1), self.end_date)
+            status = self.decide(0.75, 0.15)
+            decided_by = approver or self.admin
+            trip = TravelRequest(
+                id=self.uuid(),
+                user=user,
+                from_date=day,
+                to_date=end,
+                duration='full_day',
+                days_count=(end - day).days + 1,
+                request_to=approver,
+                er_id=''.join(self.rng.choices('ABCDEFGHJKLMNPQRSTUVWXYZ0123456789', k=17)),
+                distance_km=self.rng.randrange(10, 120),
+                address=f'{self.rng.choice(TRAVEL_WORKPLACES)} near {user.dccb}',
+                contact_person=f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}',
+                purpose=self.rng.choice(TASKS),
+                status=status,
+                approved_by=decided_by if status != 'pending' else None,
+                approved_at=self.aware(day - timedelta(days=1), time(16, 0)) if status != 'pending' else None
+            )
+            self.queue(trip)
+            if approver:
+                self.notify(approver, 'travel_request', 'New Travel Request',
+                            f'{user.employee_id} requested travel for {day}', day, str(trip.id))
+            if status != 'pending':
+                self.notify(user, 'travel_approval', f'Travel {status.title()}',
+                            f'Your travel request for {day} was {status}', day, str(trip.id))
+            current = day
+            while current <= end:
+                trips[current] = trip
+                current += timedelta(days=1)
+        return trips
+    
+    def build_attendance(self, user, leave_days, trips):
+        home_dccb = user.dccb or (user.multiple_dccb[0] if user.multiple_dccb else 'AHMEDABAD')
+        center_lat, center_lng = DCCB_CENTERS[home_dccb]
+        # Each employee's usual workplace sits a few km from the DCCB office
+        base_lat = center_lat + self.rng.uniform(-0.03, 0.03)
+        base_lng = center_lng + self.rng.uniform(-0.03, 0.03)
+        auto_confirmed = user.designation in ['Associate', 'DC']
+        dcs = self.dcs_for.get(user.dccb) or [None]
+        
+        for day in self.working_days:
+            attendance = Attendance(id=self.uuid(), user=user, date=day, is_confirmed_by_dc=auto_confirmed)
+            attendance._dccb = user.dccb
+            
+            if day in leave_days:
+                attendance.status = 'absent'
+                attendance.remarks = leave_remark(leave_days[day])
+                attendance.is_leave_day = True
+            else:
+                roll = self.rng.random()
+                if roll < 0.06:
+                    continue  # Not marked
+                if roll < 0.09:
+                    attendance.status = 'absent'
+                else:
+                    self.check_in(attendance, base_lat, base_lng, trips.get(day), roll < 0.14)
+            
+            trip = trips.get(day)
+            if trip:
+                attendance.travel_required = True
+                attendance.travel_approved = trip.status == 'approved'
+                if trip.status != 'approved':
+                    attendance.has_pending_travel = True
+                    attendance.travel_dependency_status = 'Travel Approval Required'
+            
+            # DC confirmation for MT/Support and admin approval lag a couple of days behind
+            age = (self.end_date - day).days
+            if not auto_confirmed and age >= 2 and self.rng.random() < 0.92:
+                attendance.is_confirmed_by_dc = True
+                attendance.confirmed_by_dc = self.rng.choice(dcs)
+                attendance.dc_confirmed_at = self.aware(day, time(19, 0))
+            if attendance.is_confirmed_by_dc and age >= 3 and self.admin and self.rng.random() < 0.85:
+                attendance.is_approved_by_admin = True
+                attendance.approved_by_admin = self.admin
+                attendance.admin_approved_at = self.aware(day + timedelta(days=2), time(11, 0))
+            self.queue(attendance)
+    
+    def check_in(self, attendance, base_lat, base_lng, trip, half_day):
+        attendance.check_in_time = self.clock(9 * 60 + 20, 25, 8 * 60, 11 * 60 + 30)
+        if half_day and self.rng.random() < 0.4:
+            attendance.check_in_time = self.clock(14 * 60 + 50, 15, 14 * 60 + 31, 16 * 60)
+        if attendance.check_in_time > time(14, 30):
+            attendance.status = 'half_day'
+            attendance.time_status = 'half_day_late'
+        else:
+            attendance.status = 'half_day' if half_day else 'present'
+            attendance.time_status = 'late' if attendance.check_in_time > time(10, 0) else 'on_time'
+            attendance.check_out_time = self.clock(
+                13 * 60 + 45 if half_day else 18 * 60 + 15, 20, attendance.check_in_time.hour * 60 + 240, 21 * 60
+            )
+        
+        latitude, longitude = base_lat, base_lng
+        if trip:
+            # Travel days check in away from the usual workplace
+            bearing = self.rng.uniform(0, 2 * math.pi)
+            reach = trip.distance_km / 111.2
+            latitude += reach * math.cos(bearing)
+            longitude += reach * math.sin(bearing) / math.cos(math.radians(latitude))
+            attendance.workplace = self.rng.choice(TRAVEL_WORKPLACES)
+        else:
+            attendance.workplace = self.rng.choice(FIELD_WORKPLACES)
+        attendance.latitude = latitude + self.rng.gauss(0, 0.0002)
+        attendance.longitude = longitude + self.rng.gauss(0, 0.0002)
+        attendance.location_accuracy = round(min(max(self.rng.lognormvariate(math.log(15), 0.6), 3), 2000), 1)
+        attendance.location_address = f'GPS: {attendance.location_accuracy}m accuracy'
+        attendance.geohash = encode(attendance.latitude, attendance.longitude, ATTENDANCE_PRECISION)
+        attendance.task = self.rng.choice(TASKS)
+    
+    def build_employee(self, user):
+        leave_days = self.build_leaves(user)
+        trips = self.build_travel(user)
+        self.build_attendance(user, leave_days, trips)
+    
+    def generate(self):
+        # Synthetic users are not journaled into the real user backup
+        with scratch_backup_dir(), transaction.atomic():
+            users = self.build_users()
+            self.log(f'Created {len(users)} users')
+            for position, user in enumerate(users, 1):
+                self.build_employee(user)
+                if position % 250 == 0:
+                    self.log(f'Generated records for {position}/{len(users)} employees')
+            self.flush(LeaveRequest)
+            self.flush(TravelRequest)
+            self.flush(Attendance)
+            self.flush(Notification)
+            
+            # bulk_create bypasses post_save - rebuild summaries and drop caches explicitly
+            rebuild_summary(self.start_date, self.end_date)
+            transaction.on_commit(lambda: after_bulk_create(users))
+            transaction.on_commit(invalidate_dashboard_kpis)
+        return self.counts
+
+def generate_dataset(employees, days, end_date, seed=42, password='Synthetic@123', log=None):
+    """Generate a synthetic dataset ending on end_date. Returns counts of created rows per model."""
+    return SyntheticDataset(employees, days, end_date, seed, password, log).generate()
@@ -0,0 +1,153 @@
+"""
+Background Task Queue - database-backed queue for side work kept off the request path
+Tasks are written on transaction commit and executed by `manage.py run_tasks`; no external broker is needed
+"""
+import logging
+import traceback
+import uuid
+from datetime import date, datetime, timedelta
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+def task(func):
+    """Register a function as a background task under its own name"""
+    TASKS[func.__name__] = func
+    return func
+
+def get_task(name):
+    """Registered task function, loading the task module on first use"""
+    from . import tasks  # noqa: F401 - registers the task functions
+    return TASKS[name]
+
+def serialize_value(value):
+    """JSON-safe form of a task argument - model instances travel as (label, pk) references"""
+    if isinstance(value, models.Model):
+        return {'__model__': value._meta.label_lower, 'pk': str(value.pk)}
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, (list, tuple)):
+        return [serialize_value(item) for item in value]
+    return value
+
+def deserialize_value(value):
+    """Inverse of serialize_value - model references are re-fetched from the database"""
+    if isinstance(value, dict):
+        if '__model__' in value:
+            return apps.get_model(value['__model__']).objects.get(pk=value['pk'])
+        if '__datetime__' in value:
+            return datetime.fromisoformat(value['__datetime__'])
+        if '__date__' in value:
+            return date.fromisoformat(value['__date__'])
+    if isinstance(value, list):
+        return [deserialize_value(item) for item in value]
+    return value
+
+def enqueue(name, *args, coalesce=False, **kwargs):
+    """
+    Queue a task once the current transaction commits (immediately in autocommit mode).
+    With coalesce, the task is skipped while an identical pending one is already queued.
+    """
+    payload = {
+        'args': serialize_value(list(args)),
+        'kwargs': {key: serialize_value(value) for key, value in kwargs.items()},
+    }
+    
+    def write_task():
+        if getattr(settings, 'TASK_QUEUE_EAGER', False):
+            run_inline(name, payload)
+            return
+        if coalesce and BackgroundTask.objects.filter(name=name, payload=payload, status='pending').exists():
+            return
+        BackgroundTask.objects.create(
+            name=name,
+            payload=payload,
+            max_attempts=getattr(settings, 'TASK_QUEUE_MAX_ATTEMPTS', 5)
+        )
+    
+    transaction.on_commit(write_task)
+
+def execute(name, payload):
+    """Run one task body with its arguments rebuilt"""
+    args = deserialize_value(payload.get('args', []))
+    kwargs = {key: deserialize_value(value) for key, value in payload.get('kwargs', {}).items()}
+    return get_task(name)(*args, **kwargs)
+
+def run_inline(name, payload):
+    """Eager mode (TASK_QUEUE_EAGER) - run in-process, never failing the request"""
+    try:
+        execute(name, payload)
+    except Exception as e:
+        logger.error(f"Task {name} failed: {e}")
+
+def requeue_stale_tasks():
+    """Return tasks left running by a worker that died back to the queue"""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'TASK_QUEUE_STALE_SECONDS', 600))
+    return BackgroundTask.objects.filter(status='running', started_at__lt=cutoff).update(status='pending')
+
+def claim_tasks(limit):
+    """Lock up to limit due tasks and mark them running (SKIP LOCKED lets several workers share the queue)"""
+    now = timezone.now()
+    with transaction.atomic():
+        task_ids = list(
+            BackgroundTask.objects.select_for_update(skip_locked=True).filter(
+                status='pending', run_after__lte=now
+            ).order_by('run_after', 'id').values_list('id', flat=True)[:limit]
+        )
+        if not task_ids:
+            return []
+        BackgroundTask.objects.filter(id__in=task_ids, status='pending').update(
+            status='running', started_at=now, attempts=F('attempts') + 1
+        )
+    return list(BackgroundTask.objects.filter(id__in=task_ids, status='running', started_at=now))
+
+def run_task(background_task):
+    """Execute a claimed task, scheduling a retry with exponential backoff on failure"""
+    try:
+        execute(background_task.name, background_task.payload)
+    except Exception as e:
+        logger.error(f"Task {background_task.name} #{background_task.id} failed: {e}")
+        background_task.last_error = traceback.format_exc()[-2000:]
+        if background_task.attempts >= background_task.max_attempts:
+            background_task.status = 'failed'
+            background_task.finished_at = timezone.now()
+        else:
+            delay = getattr(settings, 'TASK_QUEUE_RETRY_DELAY', 30) * 2 ** (background_task.attempts - 1)
+            background_task.status = 'pending'
+            background_task.run_after = timezone.now() + timedelta(seconds=delay)
+        background_task.save(update_fields=['status', 'last_error', 'run_after', 'finished_at'])
+        return False
+    
+    background_task.status = 'done'
+    background_task.finished_at = timezone.now()
+    background_task.save(update_fields=['status', 'finished_at'])
+    return True
+
+def run_pending_tasks(limit=50):
+    """Claim and run one batch of due tasks - returns (succeeded, failed)"""
+    requeue_stale_tasks()
+    succeeded = failed = 0
+    for background_task in claim_tasks(limit):
+        if run_task(background_task):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
+
+def purge_finished_tasks(days=None):
+    """Delete completed tasks older than TASK_QUEUE_KEEP_DAYS (failed tasks are kept for inspection)"""
+    days = days if days is not None else getattr(settings, 'TASK_QUEUE_KEEP_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = BackgroundTask.objects.filter(status='done', finished_at__lt=cutoff).delete()
+    return deleted
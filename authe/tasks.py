@@ -0,0 +1,44 @@
+"""
+Background tasks - side effects queued from views and signals via task_queue.enqueue
+"""
+from . import notification_service
+from .models import AuditLog, SystemAuditLog
+from .task_queue import task
+from .user_journal import compact
+
+@task
+def send_notification(function_name, *args, **kwargs):
+    """Run a notification_service fan-out function"""
+    return getattr(notification_service, function_name)(*args, **kwargs)
+
+@task
+def write_audit_log(user_id, action, ip_address, details, occurred_at=None):
+    """AuditLog entry, keeping the time of the original action"""
+    log = AuditLog.objects.create(
+        user_id=user_id,
+        action=action,
+        ip_address=ip_address,
+        details=details
+    )
+    if occurred_at:
+        AuditLog.objects.filter(pk=log.pk).update(timestamp=occurred_at)
+
+@task
+def write_enterprise_action(actor_id, action_type, target_table, target_id, old_value, new_value, ip_address, occurred_at=None):
+    """SystemAuditLog entry, keeping the time of the original action"""
+    log = SystemAuditLog.objects.create(
+        actor_id=actor_id,
+        action_type=action_type,
+        target_table=target_table,
+        target_id=target_id,
+        old_value=old_value,
+        new_value=new_value,
+        ip_address=ip_address
+    )
+    if occurred_at:
+        SystemAuditLog.objects.filter(pk=log.pk).update(timestamp=occurred_at)
+
+@task
+def compact_user_journal():
+    """Fold the user change journal into the backup snapshot"""
+    compact()
@@ -0,0 +1,65 @@
+"""
+Team Confirmation - set-based DC confirmation of a team's attendance over a date range
+Missing (user, date) pairs are inserted with one bulk_create and unconfirmed rows are confirmed with one UPDATE
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .attendance_summary import summary_keys, refresh_summary
+from .kpi_service import invalidate_dashboard_kpis
+from .models import Attendance
+from .travel_resolver import TravelResolver
+
+def confirm_team_attendance_range(dc_user, team_members, start_date, end_date):
+    """
+    Confirm every team member's attendance from start_date to end_date.
+    Days without a record are created as absent and confirmed.
+    Returns {'created': n, 'confirmed': n, 'total': n} where total = created + confirmed.
+    """
+    members = {user_id: (dccb, designation) for user_id, dccb, designation in team_members.values_list('id', 'dccb', 'designation')}
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    now = timezone.now()
+    
+    with transaction.atomic():
+        team_range = Attendance.objects.filter(user_id__in=members, date__range=(start_date, end_date))
+        existing = set(team_range.values_list('user_id', 'date'))
+        
+        # Unsaved rows for the missing pairs; travel flags set as Attendance.save would on create
+        missing = [
+            Attendance(
+                user_id=user_id,
+                date=day,
+                status='absent',
+                is_confirmed_by_dc=True,
+                confirmed_by_dc=dc_user,
+                dc_confirmed_at=now,
+                confirmation_source='DC'
+            )
+            for user_id in members
+            for day in days
+            if (user_id, day) not in existing
+        ]
+        resolver = TravelResolver(missing)
+        for attendance in resolver:
+            if resolver.travel_for(attendance, 'pending') or resolver.travel_for(attendance, 'rejected'):
+                attendance.has_pending_travel = True
+                attendance.travel_dependency_status = 'Travel Approval Required'
+        
+        # Rows inserted concurrently are skipped by the conflict clause and confirmed by the UPDATE instead
+        Attendance.objects.bulk_create(missing, ignore_conflicts=True)
+        created = team_range.count() - len(existing)
+        
+        unconfirmed = team_range.filter(is_confirmed_by_dc=False)
+        touched_keys = summary_keys(unconfirmed) | {(attendance.date, *members[attendance.user_id]) for attendance in missing}
+        confirmed = unconfirmed.update(
+            is_confirmed_by_dc=True,
+            confirmed_by_dc=dc_user,
+            dc_confirmed_at=now,
+            confirmation_source='DC'
+        )
+        
+        # bulk_create and .update() bypass post_save, so refresh summaries and cached counters explicitly
+        refresh_summary(touched_keys)
+        invalidate_dashboard_kpis()
+    
+    return {'created': created, 'confirmed': confirmed, 'total': created + confirmed}
@@ -1,3 +1,552 @@
-from django.test import TestCase
+import random
+from contextlib import ExitStack
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .attendance_summary import SUMMARY_COUNTERS, aggregate_attendance, summary_keys, summary_source
+from .csv_export import stream_csv
+from .geohash import BASE32, cell_dimensions, cells_for_bbox, covering_cells, encode, prefix_upper_bound
+from .interval_index import IntervalIndex
+from .leave_attendance import apply_leave, revert_leave
+from .models import Attendance, CustomUser, DailyAttendanceSummary, LeaveRequest, TravelRequest
+from .team_confirmation import confirm_team_attendance_range
+from .travel_resolver import TravelResolver
+from .user_journal import scratch_backup_dir
 
-# Create your tests here.
+# User saves are journaled - keep test users out of the real backup directory
+_module_context = ExitStack()
+
+def setUpModule():
+    _module_context.enter_context(scratch_backup_dir())
+
+def tearDownModule():
+    _module_context.close()
+
+def create_user(number, designation, dccb='AHMEDABAD'):
+    user = CustomUser(
+        employee_id=f'MGJ8{number:04d}', first_name='TEST', last_name='USER',
+        email=f'user{number}@example.com', contact_number=f'97000{number:05d}',
+        designation=designation, dccb=dccb
+    )
+    user.set_unusable_password()
+    user.save()
+    return user
+
+class IntervalIndexTests(SimpleTestCase):
+    """IntervalIndex.find must agree with a scan of every interval covering the day"""
+
+    def brute_force(self, intervals, day):
+        covering = [item for item in intervals if item[0] <= day <= item[1]]
+        return max(covering, key=lambda item: item[2])[3] if covering else None
+
+    def test_matches_brute_force_on_random_overlaps(self):
+        rng = random.Random(7)
+        start = date(2026, 1, 1)
+        for _ in range(50):
+            intervals = []
+            for priority in rng.sample(range(1000), rng.randint(0, 12)):
+                first = start + timedelta(days=rng.randint(0, 40))
+                intervals.append((first, first + timedelta(days=rng.randint(-1, 10)), priority, f'p{priority}'))
+            index = IntervalIndex(intervals)
+            for offset in range(-2, 55):
+                day = start + timedelta(days=offset)
+                self.assertEqual(index.find(day), self.brute_force(intervals, day), (intervals, day))
+
+    def test_empty_and_inverted_intervals(self):
+        self.assertIsNone(IntervalIndex([]).find(date(2026, 1, 1)))
+        inverted = IntervalIndex([(date(2026, 1, 5), date(2026, 1, 1), 1, 'x')])
+        self.assertIsNone(inverted.find(date(2026, 1, 3)))
+
+class GeohashTests(SimpleTestCase):
+
+    def test_encode_reference_value(self):
+        self.assertEqual(encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(encode(23.0225, 72.5714, 5), encode(23.0225, 72.5714, 8)[:5])
+
+    def test_cell_dimensions_shrink_with_precision(self):
+        self.assertEqual(cell_dimensions(1), (45.0, 45.0))
+        self.assertEqual(cell_dimensions(2), (45.0 / 8, 45.0 / 4))
+
+    def test_covering_cells_contain_every_point_in_the_box(self):
+        rng = random.Random(11)
+        for _ in range(100):
+            min_lat, min_lng = rng.uniform(20, 24), rng.uniform(68, 74)
+            max_lat, max_lng = min_lat + rng.uniform(0, 0.3), min_lng + rng.uniform(0, 0.3)
+            precision = rng.randint(3, 6)
+            cells = set(covering_cells(min_lat, min_lng, max_lat, max_lng, precision))
+            for _ in range(50):
+                latitude, longitude = rng.uniform(min_lat, max_lat), rng.uniform(min_lng, max_lng)
+                self.assertIn(encode(latitude, longitude, precision), cells)
+
+    def test_cells_for_bbox_respects_max_cells(self):
+        rng = random.Random(13)
+        for _ in range(100):
+            min_lat, min_lng = rng.uniform(20, 24), rng.uniform(68, 74)
+            max_lat, max_lng = min_lat + rng.uniform(0, 2), min_lng + rng.uniform(0, 2)
+            max_cells = rng.choice([1, 4, 16])
+            cells = cells_for_bbox(min_lat, min_lng, max_lat, max_lng, max_cells)
+            self.assertLessEqual(len(cells), max_cells)
+        self.assertEqual(cells_for_bbox(-80, -170, 80, 170, max_cells=4), [])
+
+    def test_prefix_upper_bound_brackets_every_geohash_with_the_prefix(self):
+        self.assertEqual(prefix_upper_bound('tsq'), 'tsr')
+        self.assertEqual(prefix_upper_bound('tsz'), 'tt')
+        self.assertIsNone(prefix_upper_bound('zzz'))
+        rng = random.Random(17)
+        for _ in range(500):
+            geohash = ''.join(rng.choice(BASE32) for _ in range(8))
+            other = ''.join(rng.choice(BASE32) for _ in range(8))
+            prefix = geohash[:rng.randint(1, 7)]
+            upper = prefix_upper_bound(prefix)
+            self.assertTrue(prefix <= geohash and (upper is None or geohash < upper))
+            in_range = prefix <= other and (upper is None or other < upper)
+            self.assertEqual(in_range, other.startswith(prefix))
+
+def reference_attendance_approval(attendance):
+    """Per-record rule as travel_dependency_validator implemented it before TravelResolver"""
+    covering = TravelRequest.objects.filter(
+        user=attendance.user, from_date__lte=attendance.date, to_date__gte=attendance.date
+    )
+    conflicting = covering.filter(status__in=['pending', 'rejected']).first()
+    if conflicting:
+        if conflicting.status == 'pending':
+            return False, "Travel Approval Pending - Cannot approve attendance", "Travel Approval Pending"
+        return False, "Travel Request Rejected - Cannot approve attendance", "Travel Not Approved"
+    if covering.filter(status='approved').exists():
+        return True, "", "Travel Approved"
+    return True, "", ""
+
+def reference_dc_confirmation(attendance):
+    """Per-record rule as travel_approval_validator implemented it before TravelResolver"""
+    if attendance.user.designation not in ['MT', 'Support']:
+        return (True, None)
+    if attendance.status not in ['present', 'half_day']:
+        return (True, None)
+    travel_requests = TravelRequest.objects.filter(
+        user=attendance.user, from_date__lte=attendance.date, to_date__gte=attendance.date
+    )
+    if not travel_requests.exists():
+        return (True, None)
+    if travel_requests.count() > 1:
+        return (False, "Multiple travel requests found for this date. Please contact Admin.")
+    if travel_requests.first().status == 'pending':
+        return (False, "Travel Request is pending")
+    return (True, None)
+
+def reference_admin_approval(attendance):
+    """Per-record rule as travel_approval_validator implemented it before TravelResolver"""
+    if attendance.user.designation != 'DC':
+        return (True, None, None)
+    travel_request = TravelRequest.objects.filter(
+        user=attendance.user, from_date__lte=attendance.date, to_date__gte=attendance.date
+    ).first()
+    if travel_request and travel_request.status == 'pending':
+        return (False, "Cannot approve DC attendance - Travel approval pending with Associate", "Travel Approval Pending")
+    return (True, None, None)
+
+class TravelResolverTests(TestCase):
+    """TravelResolver must give the same answers as the per-record validators it replaced"""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(23)
+        cls.start = date(2026, 3, 2)
+        designations = ['MT', 'Support', 'DC', 'Associate', 'MT', 'DC', 'Support', 'MT']
+        users = []
+        for number, designation in enumerate(designations, start=1):
+            user = CustomUser(
+                employee_id=f'MGJ9{number:04d}', first_name='TEST', last_name='USER',
+                email=f'resolver{number}@example.com', contact_number=f'98000{number:05d}',
+                designation=designation, dccb='AHMEDABAD'
+            )
+            user.set_unusable_password()
+            user.save()
+            users.append(user)
+
+        # Overlapping requests of every status, each with a distinct creation time
+        created = timezone.make_aware(datetime(2026, 2, 1, 9, 0))
+        for user in users:
+            for _ in range(rng.randint(0, 5)):
+                from_date = cls.start + timedelta(days=rng.randint(0, 20))
+                travel = TravelRequest.objects.create(
+                    user=user, from_date=from_date, to_date=from_date + timedelta(days=rng.randint(0, 4)),
+                    er_id='ER0000000000000AB', distance_km=10, address='PACS OFFICE', contact_person='MANAGER',
+                    purpose='FIELD VISIT', status=rng.choice(['pending', 'approved', 'rejected'])
+                )
+                created += timedelta(minutes=rng.randint(1, 600))
+                TravelRequest.objects.filter(pk=travel.pk).update(created_at=created)
+
+        for user in users:
+            for offset in range(25):
+                Attendance.objects.create(
+                    user=user, date=cls.start + timedelta(days=offset),
+                    status=rng.choice(['present', 'present', 'half_day', 'absent'])
+                )
+
+    def test_matches_previous_validators(self):
+        records = list(Attendance.objects.select_related('user').order_by('user_id', 'date'))
+        self.assertTrue(TravelRequest.objects.exists())
+        with self.assertNumQueries(1):
+            resolver = TravelResolver(records)
+        checked = 0
+        for attendance in resolver:
+            self.assertEqual(resolver.attendance_approval(attendance), reference_attendance_approval(attendance), attendance)
+            self.assertEqual(resolver.dc_confirmation(attendance), reference_dc_confirmation(attendance), attendance)
+            self.assertEqual(resolver.admin_approval(attendance), reference_admin_approval(attendance), attendance)
+            checked += 1
+        self.assertEqual(checked, len(records))
+
+    def test_blocking_cases_are_exercised(self):
+        resolver = TravelResolver(Attendance.objects.select_related('user'))
+        remarks = {resolver.attendance_approval(attendance)[2] for attendance in resolver}
+        dc_results = {resolver.dc_confirmation(attendance)[1] for attendance in resolver}
+        self.assertTrue({'Travel Approval Pending', 'Travel Not Approved', 'Travel Approved', ''} <= remarks)
+        self.assertIn("Multiple travel requests found for this date. Please contact Admin.", dc_results)
+
+    def test_empty_batch(self):
+        with self.assertNumQueries(0):
+            resolver = TravelResolver([])
+        self.assertEqual(list(resolver), [])
+
+class TravelDependencyTests(TestCase):
+    """Travel status changes recompute the dependency flags of every attendance row they cover"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.start = date(2026, 5, 4)
+        cls.users = [create_user(31, 'MT'), create_user(32, 'Support')]
+        for user in cls.users:
+            for offset in range(20):
+                Attendance.objects.create(user=user, date=cls.start + timedelta(days=offset), status='present')
+    
+    def travel(self, user, start_offset, end_offset, status='pending'):
+        return TravelRequest.objects.create(
+            user=user, from_date=self.start + timedelta(days=start_offset), to_date=self.start + timedelta(days=end_offset),
+            er_id='ER0000000000000AB', distance_km=10, address='PACS OFFICE', contact_person='MANAGER',
+            purpose='FIELD VISIT', status=status
+        )
+    
+    def blocked_days(self, user):
+        rows = Attendance.objects.filter(user=user).order_by('date')
+        for has_pending_travel, travel_dependency_status in rows.values_list('has_pending_travel', 'travel_dependency_status'):
+            self.assertEqual(travel_dependency_status, 'Travel Approval Required' if has_pending_travel else None)
+        return [(attendance_date - self.start).days for attendance_date in rows.filter(has_pending_travel=True).values_list('date', flat=True)]
+    
+    def assertMatchesCheckTravelDependency(self):
+        for attendance in Attendance.objects.select_related('user'):
+            expected = (attendance.has_pending_travel, attendance.travel_dependency_status)
+            attendance.check_travel_dependency()
+            self.assertEqual((attendance.has_pending_travel, attendance.travel_dependency_status), expected, attendance.date)
+    
+    def test_status_changes_update_covered_rows(self):
+        user = self.users[0]
+        long_trip = self.travel(user, 0, 14)
+        self.travel(user, 10, 12)
+        TravelRequest.update_attendance_dependencies(TravelRequest.objects.all())
+        self.assertEqual(self.blocked_days(user), list(range(15)))
+        
+        long_trip.status = 'approved'
+        long_trip.save()
+        # The overlapping pending trip still blocks its days
+        self.assertEqual(self.blocked_days(user), [10, 11, 12])
+        
+        long_trip.status = 'rejected'
+        long_trip.save()
+        self.assertEqual(self.blocked_days(user), list(range(15)))
+        self.assertEqual(self.blocked_days(self.users[1]), [])
+        self.assertMatchesCheckTravelDependency()
+    
+    def test_one_update_per_trip_whatever_its_length(self):
+        short_trip = self.travel(self.users[0], 0, 1)
+        long_trip = self.travel(self.users[1], 0, 19)
+        with self.assertNumQueries(1):
+            short_trip.update_attendance_dependency()
+        with self.assertNumQueries(1):
+            long_trip.update_attendance_dependency()
+        self.assertEqual(self.blocked_days(self.users[1]), list(range(20)))
+    
+    def test_bulk_update_across_users(self):
+        for user in self.users:
+            self.travel(user, 2, 4, status='rejected')
+            self.travel(user, 3, 8, status='approved')
+        # The spans query, then one UPDATE per chunk of two requests
+        with self.assertNumQueries(3):
+            updated = TravelRequest.update_attendance_dependencies(TravelRequest.objects.all(), chunk_size=2)
+        self.assertEqual(updated, 2 * 7)
+        self.assertMatchesCheckTravelDependency()
+        self.assertEqual(self.blocked_days(self.users[1]), [2, 3, 4])
+
+class AttendanceSummaryTests(TestCase):
+    """DailyAttendanceSummary must equal a live count of the attendance rows after every write path"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = date(2026, 4, 6)
+        cls.dc = create_user(1, 'DC', 'BARODA')
+        cls.members = [
+            create_user(2, 'MT', 'BARODA'), create_user(3, 'MT', 'BARODA'),
+            create_user(4, 'Support', 'BARODA'), create_user(5, 'MT', 'AHMEDABAD'),
+        ]
+    
+    def assertSummaryMatches(self):
+        keys = summary_keys(summary_source()) | set(
+            DailyAttendanceSummary.objects.values_list('date', 'dccb', 'designation')
+        )
+        self.assertTrue(keys)
+        for day, dccb, designation in keys:
+            rows = summary_source().filter(date=day, user__dccb=dccb, user__designation=designation)
+            stored = list(DailyAttendanceSummary.objects.filter(
+                date=day, dccb=dccb, designation=designation
+            ).values(*SUMMARY_COUNTERS))
+            self.assertEqual(stored, [aggregate_attendance(rows)] if rows.exists() else [], (day, dccb, designation))
+    
+    def test_save_paths(self):
+        for offset, user in enumerate(self.members):
+            Attendance.objects.create(
+                user=user, date=self.day, status='present', check_in_time=time(9, 0 if offset % 2 else 45)
+            )
+        self.assertSummaryMatches()
+        
+        attendance = Attendance.objects.get(user=self.members[0], date=self.day)
+        attendance.status = 'half_day'
+        attendance.is_confirmed_by_dc = True
+        attendance.save()
+        self.assertSummaryMatches()
+        
+        Attendance.objects.filter(user=self.members[3], date=self.day).delete()
+        self.assertSummaryMatches()
+    
+    def test_update_and_bulk_paths(self):
+        Attendance.objects.create(user=self.members[0], date=self.day, status='present', check_in_time=time(9, 10))
+        
+        # bulk_create of the missing days plus one UPDATE of the unconfirmed rows
+        confirm_team_attendance_range(
+            self.dc, CustomUser.objects.filter(pk__in=[user.pk for user in self.members]),
+            self.day, self.day + timedelta(days=2)
+        )
+        self.assertSummaryMatches()
+        
+        # bulk_update of existing rows through approved leave
+        leave = LeaveRequest.objects.create(
+            user=self.members[1], leave_type='unplanned', start_date=self.day, end_date=self.day + timedelta(days=1),
+            days_requested=2, reason='FEVER', status='approved'
+        )
+        apply_leave(leave)
+        self.assertSummaryMatches()
+        revert_leave(leave)
+        self.assertSummaryMatches()
+    
+    def test_user_changes_move_their_rows(self):
+        for user in self.members:
+            Attendance.objects.create(user=user, date=self.day, status='present', check_in_time=time(9, 0))
+        
+        moved = self.members[0]
+        moved.dccb = 'AHMEDABAD'
+        moved.save()
+        self.assertSummaryMatches()
+        
+        moved.is_active = False
+        moved.save(update_fields=['is_active'])
+        self.assertSummaryMatches()
+
+class TeamConfirmationTests(TestCase):
+    """confirm_team_attendance_range creates the missing days and confirms the rest in a fixed number of queries"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = date(2026, 6, 1)
+        cls.dc = create_user(41, 'DC', 'BARODA')
+        cls.members = [create_user(number, 'MT', 'BARODA') for number in (42, 43, 44)]
+    
+    def team(self):
+        return CustomUser.objects.filter(pk__in=[user.pk for user in self.members])
+    
+    def test_creates_missing_days_and_confirms_open_rows(self):
+        Attendance.objects.create(user=self.members[0], date=self.day, status='present', check_in_time=time(9, 0))
+        reviewed = Attendance.objects.create(user=self.members[1], date=self.day + timedelta(days=1), status='present')
+        Attendance.objects.filter(pk=reviewed.pk).update(is_confirmed_by_dc=True)
+        TravelRequest.objects.create(
+            user=self.members[2], from_date=self.day + timedelta(days=2), to_date=self.day + timedelta(days=2),
+            er_id='ER0000000000000AB', distance_km=10, address='PACS OFFICE', contact_person='MANAGER',
+            purpose='FIELD VISIT'
+        )
+        
+        result = confirm_team_attendance_range(self.dc, self.team(), self.day, self.day + timedelta(days=2))
+        self.assertEqual(result, {'created': 7, 'confirmed': 1, 'total': 8})
+        
+        rows = Attendance.objects.filter(user__in=self.members)
+        self.assertEqual(rows.count(), 9)
+        self.assertFalse(rows.filter(is_confirmed_by_dc=False).exists())
+        self.assertEqual(rows.filter(confirmed_by_dc=self.dc, confirmation_source='DC').count(), 8)
+        self.assertEqual(rows.filter(status='absent').count(), 7)
+        self.assertEqual(Attendance.objects.get(pk=reviewed.pk).confirmed_by_dc, None)
+        self.assertEqual(
+            list(rows.filter(has_pending_travel=True).values_list('user', 'date')),
+            [(self.members[2].pk, self.day + timedelta(days=2))]
+        )
+        
+        # A second run has nothing left to do
+        self.assertEqual(
+            confirm_team_attendance_range(self.dc, self.team(), self.day, self.day + timedelta(days=2)),
+            {'created': 0, 'confirmed': 0, 'total': 0}
+        )
+    
+    def test_query_count_does_not_grow_with_the_range(self):
+        query_counts = []
+        for start_offset, end_offset in ((0, 1), (10, 29)):
+            with CaptureQueriesContext(connection) as queries:
+                confirm_team_attendance_range(
+                    self.dc, self.team(), self.day + timedelta(days=start_offset), self.day + timedelta(days=end_offset)
+                )
+            # bulk_create splits the INSERT by the backend's parameter limit, everything else is fixed
+            query_counts.append(sum('INTO "authe_attendance"' not in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Attendance.objects.filter(user__in=self.members).count(), 3 * (2 + 20))
+
+class LeaveAttendanceTests(TestCase):
+    """Reversing a leave restores only the days that leave holds"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(11, 'MT')
+        cls.day = date(2026, 4, 6)
+    
+    def leave(self, start_offset, end_offset, leave_type='planned'):
+        start_date = self.day + timedelta(days=start_offset)
+        end_date = self.day + timedelta(days=end_offset)
+        return LeaveRequest.objects.create(
+            user=self.user, leave_type=leave_type, start_date=start_date, end_date=end_date,
+            days_requested=end_offset - start_offset + 1, reason='FAMILY FUNCTION',
+            status='approved', approved_at=timezone.now()
+        )
+    
+    def reverse(self, leave):
+        leave.status = 'rejected'
+        leave.save()
+        return revert_leave(leave)
+    
+    def attendance_state(self):
+        return list(Attendance.objects.filter(user=self.user).order_by('date').values_list(
+            'date', 'status', 'remarks', 'is_leave_day'
+        ))
+    
+    def test_revert_restores_overwritten_and_removes_created_rows(self):
+        Attendance.objects.create(
+            user=self.user, date=self.day, status='present', check_in_time=time(9, 0), remarks='SITE VISIT'
+        )
+        before = self.attendance_state()
+        leave = self.leave(0, 2)
+        
+        self.assertEqual(apply_leave(leave), {'created': 2, 'updated': 1})
+        self.assertEqual(
+            set(Attendance.objects.filter(user=self.user).values_list('status', 'remarks', 'is_leave_day')),
+            {('absent', 'On approved leave: planned', True)}
+        )
+        
+        self.assertEqual(self.reverse(leave), {'removed': 2, 'restored': 1, 'kept': 0})
+        self.assertEqual(self.attendance_state(), before)
+        self.assertFalse(Attendance.objects.filter(user=self.user, pre_leave_state__isnull=False).exists())
+    
+    def test_created_row_with_check_in_keeps_attendance(self):
+        leave = self.leave(0, 0)
+        apply_leave(leave)
+        Attendance.objects.filter(user=self.user, date=self.day).update(check_in_time=time(9, 0), time_status='on_time')
+        
+        self.assertEqual(self.reverse(leave), {'removed': 0, 'restored': 1, 'kept': 0})
+        self.assertEqual(self.attendance_state(), [(self.day, 'present', None, False)])
+    
+    def test_overlapping_leave_keeps_its_days(self):
+        Attendance.objects.create(user=self.user, date=self.day + timedelta(days=1), status='present', check_in_time=time(9, 0))
+        before = self.attendance_state()
+        first = self.leave(0, 2)
+        second = self.leave(1, 3, leave_type='unplanned')
+        apply_leave(first)
+        # Days 1 and 2 are already held by the first leave, only day 3 is taken by the second
+        self.assertEqual(apply_leave(second), {'created': 1, 'updated': 0})
+        
+        self.assertEqual(self.reverse(first), {'removed': 1, 'restored': 0, 'kept': 2})
+        self.assertEqual(
+            self.attendance_state(),
+            [(self.day + timedelta(days=offset), 'absent', 'On approved leave: unplanned', True) for offset in (1, 2, 3)]
+        )
+        
+        self.assertEqual(self.reverse(second), {'removed': 2, 'restored': 1, 'kept': 0})
+        self.assertEqual(self.attendance_state(), before)
+
+class AutoUpdateAttendanceTests(TestCase):
+    """The scheduled run only closes today after 6 PM; a date range catches up missed days"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date(2026, 4, 8)
+        cls.open_row = {}
+        for number, offset in ((21, 0), (22, 0), (23, 1), (24, 2)):
+            user = create_user(number, 'MT', 'BARODA')
+            cls.open_row[number] = Attendance.objects.create(
+                user=user, date=cls.today - timedelta(days=offset), status='present', check_in_time=time(9, 0)
+            )
+        # Already signed off by Admin
+        Attendance.objects.filter(pk__in=[cls.open_row[22].pk, cls.open_row[24].pk]).update(is_approved_by_admin=True)
+    
+    def run_command(self, hour, *args):
+        now = timezone.make_aware(datetime.combine(self.today, time(hour, 0)))
+        localtime = timezone.localtime
+        out = StringIO()
+        with mock.patch('django.utils.timezone.localtime', side_effect=lambda value=None, *rest: localtime(value or now, *rest)):
+            call_command('auto_update_attendance', *args, stdout=out)
+        return out.getvalue()
+    
+    def half_day_rows(self):
+        return set(Attendance.objects.filter(status='half_day').values_list('user__employee_id', flat=True))
+    
+    def test_scheduled_run_waits_for_six_pm(self):
+        self.assertEqual(self.run_command(17), 'Auto-update only runs after 6 PM\n')
+        self.assertFalse(Attendance.objects.filter(status='half_day').exists())
+    
+    def test_scheduled_run_closes_today_only(self):
+        output = self.run_command(19)
+        self.assertIn('Successfully updated 2 attendance records to Half Day\n', output)
+        self.assertEqual(self.half_day_rows(), {'MGJ80021', 'MGJ80022'})
+        attendance = Attendance.objects.get(pk=self.open_row[21].pk)
+        self.assertEqual(attendance.check_out_time, time(18, 0))
+        self.assertEqual(attendance.remarks, 'Auto-updated to Half Day (missed check-out)')
+    
+    def test_catch_up_skips_reviewed_rows(self):
+        output = self.run_command(10, '--catch-up')
+        # Today is not closed before 6 PM and the reviewed row two days back does not widen the range
+        yesterday = self.today - timedelta(days=1)
+        self.assertIn(f'Successfully updated 1 attendance records to Half Day for {yesterday} to {yesterday}', output)
+        self.assertEqual(self.half_day_rows(), {'MGJ80023'})
+        
+        self.run_command(19, '--catch-up', '--include-reviewed')
+        self.assertEqual(self.half_day_rows(), {'MGJ80021', 'MGJ80022', 'MGJ80023', 'MGJ80024'})
+
+class StreamCSVTests(SimpleTestCase):
+    """Exports must reach the client chunk by chunk under both WSGI and ASGI"""
+    
+    def rows(self, produced):
+        for number in range(3):
+            produced.append(number)
+            yield [number]
+    
+    @override_settings(EXPORT_FLUSH_ROWS=1)
+    def test_wsgi_iteration_is_incremental(self):
+        produced = []
+        parts = [(part, len(produced)) for part in stream_csv('export.csv', ['n'], self.rows(produced))]
+        self.assertEqual(parts, [(b'n\r\n', 0), (b'0\r\n', 1), (b'1\r\n', 2), (b'2\r\n', 3)])
+    
+    @override_settings(EXPORT_FLUSH_ROWS=1)
+    def test_asgi_iteration_is_incremental(self):
+        produced = []
+        response = stream_csv('export.csv', ['n'], self.rows(produced))
+        
+        async def consume():
+            return [(part, len(produced)) async for part in response]
+        
+        self.assertEqual(async_to_sync(consume)(), [(b'n\r\n', 0), (b'0\r\n', 1), (b'1\r\n', 2), (b'2\r\n', 3)])
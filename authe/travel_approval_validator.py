@@ -4,6 +4,7 @@ Enforces business rule: DC cannot confirm MT/Support attendance without approved
 """
 
 from .models import TravelRequest, Attendance, CustomUser
+from .travel_resolver import TravelResolver
 from django.utils import timezone
 
 def validate_travel_approval_for_dc_confirmation(attendance):
@@ -21,43 +22,7 @@ def validate_travel_approval_for_dc_confirmation(attendance):
         tuple: (can_confirm: bool, error_message: str or None)
     """
     
-    # Rule does NOT apply to Associates and DCs
-    if attendance.user.designation in ['Associate', 'DC']:
-        return (True, None)
-    
-    # Rule applies ONLY to MT and Support
-    if attendance.user.designation not in ['MT', 'Support']:
-        return (True, None)
-    
-    # Rule applies ONLY to Present and Half Day
-    if attendance.status not in ['present', 'half_day']:
-        return (True, None)
-    
-    # Check if travel request exists for this date
-    travel_requests = TravelRequest.objects.filter(
-        user=attendance.user,
-        from_date__lte=attendance.date,
-        to_date__gte=attendance.date
-    )
-    
-    # If no travel request exists, DC confirmation allowed
-    if not travel_requests.exists():
-        return (True, None)
-    
-    # Handle multiple travel requests (invalid state)
-    if travel_requests.count() > 1:
-        return (False, "Multiple travel requests found for this date. Please contact Admin.")
-    
-    # Get the travel request for this date
-    travel_request = travel_requests.first()
-    
-    # Check travel approval status
-    if travel_request.status == 'pending':
-        # Travel pending - Block DC confirmation until Associate takes action
-        return (False, "Travel Request is pending")
-    
-    # Associate has taken action (approved OR rejected) - DC can confirm
-    return (True, None)
+    return TravelResolver([attendance]).dc_confirmation(attendance)
 
 
 def validate_dc_attendance_for_admin_approval(attendance):
@@ -72,28 +37,7 @@ def validate_dc_attendance_for_admin_approval(attendance):
         tuple: (can_approve: bool, error_message: str or None, remark: str or None)
     """
     
-    # Rule applies ONLY to DC users
-    if attendance.user.designation != 'DC':
-        return (True, None, None)
-    
-    # Check if travel request exists for this date
-    travel_request = TravelRequest.objects.filter(
-        user=attendance.user,
-        from_date__lte=attendance.date,
-        to_date__gte=attendance.date
-    ).first()
-    
-    # If no travel request exists, Admin approval allowed
-    if not travel_request:
-        return (True, None, None)
-    
-    # Check travel approval status
-    if travel_request.status == 'pending':
-        # Travel pending - Block Admin approval
-        return (False, "Cannot approve DC attendance - Travel approval pending with Associate", "Travel Approval Pending")
-    
-    # Travel approved or rejected - Admin can approve
-    return (True, None, None)
+    return TravelResolver([attendance]).admin_approval(attendance)
 
 
 def log_blocked_dc_confirmation(dc_user, attendance, reason):
@@ -0,0 +1,113 @@
+"""
+Travel Resolver - travel dependency checks for a batch of attendance records
+One TravelRequest query covers every user and date in the batch; lookups then go through per-user interval indexes
+"""
+from .interval_index import build_interval_indexes
+from .models import TravelRequest
+
+TRAVEL_STATUSES = ['pending', 'approved', 'rejected']
+
+def overlapping_spans(rows):
+    """Day spans where two or more of a user's travel requests overlap"""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row['user_id'], []).append(row)
+    
+    for user_rows in grouped.values():
+        user_rows.sort(key=lambda row: row['from_date'])
+        for position, row in enumerate(user_rows):
+            for other in user_rows[position + 1:]:
+                if other['from_date'] > row['to_date']:
+                    break
+                yield {
+                    'user_id': row['user_id'],
+                    'from_date': other['from_date'],
+                    'to_date': min(row['to_date'], other['to_date']),
+                    'created_at': other['created_at']
+                }
+
+class TravelResolver:
+    """
+    Resolves the travel requests covering each (user, date) of an attendance batch.
+    Where requests overlap, the most recently created one wins - the same one .first() returns.
+    """
+    
+    def __init__(self, attendance_records):
+        self.records = list(attendance_records)
+        rows = []
+        if self.records:
+            dates = [record.date for record in self.records]
+            rows = list(TravelRequest.objects.filter(
+                user_id__in={record.user_id for record in self.records},
+                from_date__lte=max(dates),
+                to_date__gte=min(dates)
+            ).order_by().values('id', 'user_id', 'from_date', 'to_date', 'status', 'created_at'))
+        
+        self.indexes = {None: build_interval_indexes(rows, 'from_date', 'to_date', 'created_at')}
+        for status in TRAVEL_STATUSES:
+            self.indexes[status] = build_interval_indexes(
+                [row for row in rows if row['status'] == status], 'from_date', 'to_date', 'created_at'
+            )
+        self.overlaps = build_interval_indexes(list(overlapping_spans(rows)), 'from_date', 'to_date', 'created_at')
+    
+    def __iter__(self):
+        return iter(self.records)
+    
+    def travel_for(self, attendance, status=None):
+        """Latest travel request (values row) covering the attendance date, optionally limited to one status"""
+        index = self.indexes[status].get(attendance.user_id)
+        return index.find(attendance.date) if index else None
+    
+    def has_multiple(self, attendance):
+        """True when more than one travel request covers the attendance date"""
+        index = self.overlaps.get(attendance.user_id)
+        return bool(index and index.find(attendance.date))
+    
+    def attendance_approval(self, attendance):
+        """Batch form of travel_dependency_validator.validate_attendance_approval"""
+        pending = self.travel_for(attendance, 'pending')
+        rejected = self.travel_for(attendance, 'rejected')
+        conflicting = max(
+            (travel for travel in (pending, rejected) if travel),
+            key=lambda travel: travel['created_at'],
+            default=None
+        )
+        
+        if conflicting:
+            if conflicting['status'] == 'pending':
+                return False, "Travel Approval Pending - Cannot approve attendance", "Travel Approval Pending"
+            return False, "Travel Request Rejected - Cannot approve attendance", "Travel Not Approved"
+        
+        if self.travel_for(attendance, 'approved'):
+            return True, "", "Travel Approved"
+        
+        return True, "", ""
+    
+    def dc_confirmation(self, attendance):
+        """Batch form of travel_approval_validator.validate_travel_approval_for_dc_confirmation"""
+        # Rule applies ONLY to MT and Support, and ONLY to Present and Half Day
+        if attendance.user.designation not in ['MT', 'Support']:
+            return (True, None)
+        if attendance.status not in ['present', 'half_day']:
+            return (True, None)
+        
+        travel = self.travel_for(attendance)
+        if not travel:
+            return (True, None)
+        if self.has_multiple(attendance):
+            return (False, "Multiple travel requests found for this date. Please contact Admin.")
+        if travel['status'] == 'pending':
+            return (False, "Travel Request is pending")
+        # Associate has taken action (approved OR rejected) - DC can confirm
+        return (True, None)
+    
+    def admin_approval(self, attendance):
+        """Batch form of travel_approval_validator.validate_dc_attendance_for_admin_approval"""
+        # Rule applies ONLY to DC users
+        if attendance.user.designation != 'DC':
+            return (True, None, None)
+        
+        travel = self.travel_for(attendance)
+        if travel and travel['status'] == 'pending':
+            return (False, "Cannot approve DC attendance - Travel approval pending with Associate", "Travel Approval Pending")
+        return (True, None, None)
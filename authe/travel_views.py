@@ -8,6 +8,8 @@ from django.db import transaction
 from django.core.paginator import Paginator
 from datetime import datetime, timedelta, date
 from .models import CustomUser, TravelRequest
+from .csv_export import iter_values, stream_csv
+from .associate_directory import get_associate_for
 import json
 import csv
 
@@ -16,19 +18,14 @@ def get_associate_for_dccb(request):
     """Get Associate name for current user's DCCB"""
     user_dccb = request.user.dccb
     
-    # Get all Associates and check their multiple_dccb field
-    associates = CustomUser.objects.filter(
-        designation='Associate',
-        is_active=True
-    )
-    
-    for assoc in associates:
-        if assoc.multiple_dccb and user_dccb in assoc.multiple_dccb:
-            return JsonResponse({
-                'success': True,
-                'associate_name': f"{assoc.first_name} {assoc.last_name}",
-                'associate_id': assoc.employee_id
-            })
+    # Cached DCCB -> Associate mapping (rebuilt when users change)
+    assoc = get_associate_for(user_dccb)
+    if assoc:
+        return JsonResponse({
+            'success': True,
+            'associate_name': f"{assoc['first_name']} {assoc['last_name']}",
+            'associate_id': assoc['employee_id']
+        })
     
     return JsonResponse({
         'success': False,
@@ -153,8 +150,8 @@ def create_travel_request(request):
             )
             
             # Send notification to all Associates (since any can approve)
-            from .notification_service import notify_travel_request
-            notify_travel_request(travel_request)
+            from .notification_service import queue_notification
+            queue_notification('notify_travel_request', travel_request)
             
             return JsonResponse({
                 'success': True,
@@ -290,8 +287,8 @@ def approve_travel_request(request, travel_id):
                         current_date += timedelta(days=1)
                 
                 # Send notification to user about approval/rejection
-                from .notification_service import notify_travel_approval
-                notify_travel_approval(travel_request, action == 'approve')
+                from .notification_service import queue_notification
+                queue_notification('notify_travel_approval', travel_request, action == 'approve')
             
             return JsonResponse({
                 'success': True,
@@ -307,7 +304,7 @@ def approve_travel_request(request, travel_id):
 def export_travel_requests(request):
     """Export travel request history with correct headers and data"""
     # Get ALL travel requests like the admin screen shows, not just current user's
-    travel_requests = TravelRequest.objects.select_related('user', 'approved_by').all().order_by('-created_at')
+    travel_requests = TravelRequest.objects.order_by('-created_at')
     
     # Apply same filters as the admin screen
     status_filter = request.GET.get('status', '')
@@ -318,37 +315,41 @@ def export_travel_requests(request):
     if dccb_filter:
         travel_requests = travel_requests.filter(user__dccb=dccb_filter)
     
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="travel_requests_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
+    header = [
         'Employee ID', 'Name', 'DCCB', 'From Date', 'To Date', 'Duration', 'Days', 'ER ID', 'Distance (KM)',
         'Address', 'Contact Person', 'Purpose', 'Status', 'Approved By', 'Remarks', 'Created At'
-    ])
+    ]
+    duration_labels = dict(TravelRequest.DURATION_CHOICES)
+    status_labels = dict(TravelRequest.STATUS_CHOICES)
     
-    for tr in travel_requests:
-        approved_by_text = 'N/A'
-        if tr.approved_by:
-            approved_by_text = f"{tr.approved_by.employee_id} - {tr.approved_by.first_name} {tr.approved_by.last_name}"
-        
-        writer.writerow([
-            tr.user.employee_id,
-            f"{tr.user.first_name} {tr.user.last_name}",
-            tr.user.dccb or 'N/A',
-            tr.from_date.strftime('%d %b %Y'),
-            tr.to_date.strftime('%d %b %Y'),
-            tr.get_duration_display(),
-            tr.days_count,
-            tr.er_id,
-            tr.distance_km,
-            tr.address,
-            tr.contact_person,
-            tr.purpose,
-            tr.get_status_display(),
-            approved_by_text,
-            tr.remarks or 'N/A',
-            tr.created_at.strftime('%d %b %Y %H:%M')
-        ])
+    def rows():
+        for tr in iter_values(
+            travel_requests, 'user__employee_id', 'user__first_name', 'user__last_name', 'user__dccb',
+            'from_date', 'to_date', 'duration', 'days_count', 'er_id', 'distance_km', 'address',
+            'contact_person', 'purpose', 'status', 'approved_by__employee_id', 'approved_by__first_name',
+            'approved_by__last_name', 'remarks', 'created_at'
+        ):
+            approved_by_text = 'N/A'
+            if tr['approved_by__employee_id']:
+                approved_by_text = f"{tr['approved_by__employee_id']} - {tr['approved_by__first_name']} {tr['approved_by__last_name']}"
+            
+            yield [
+                tr['user__employee_id'],
+                f"{tr['user__first_name']} {tr['user__last_name']}",
+                tr['user__dccb'] or 'N/A',
+                tr['from_date'].strftime('%d %b %Y'),
+                tr['to_date'].strftime('%d %b %Y'),
+                duration_labels.get(tr['duration'], tr['duration']),
+                tr['days_count'],
+                tr['er_id'],
+                tr['distance_km'],
+                tr['address'],
+                tr['contact_person'],
+                tr['purpose'],
+                status_labels.get(tr['status'], tr['status']),
+                approved_by_text,
+                tr['remarks'] or 'N/A',
+                tr['created_at'].strftime('%d %b %Y %H:%M')
+            ]
     
-    return response
\ No newline at end of file
+    return stream_csv(f'travel_requests_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv', header, rows())
\ No newline at end of file
@@ -32,6 +32,7 @@ urlpatterns = [
     path('admin/attendance/update-status/', admin_views.update_attendance_status, name='update_attendance_status'),
     path('admin/employees/<str:employee_id>/attendance-history/', admin_views.employee_attendance_history, name='admin_employee_attendance_history'),
     path('admin/export/attendance-daily/', admin_views.export_attendance_daily, name='export_attendance_daily'),
+    path('admin/export/attendance-detailed/', admin_views.export_attendance_detailed, name='export_attendance_detailed'),
     path('admin/leaves/', admin_views.leave_requests, name='admin_leave_requests'),
     path('admin/leaves/<int:leave_id>/decide/', admin_views.decide_leave, name='decide_leave'),
     path('admin/export/employees/', admin_views.export_employees, name='export_employees'),
@@ -81,15 +82,20 @@ urlpatterns = [
     path('attendance-marking-interface/', enhanced_super_admin_views.attendance_marking_interface, name='attendance_marking_interface'),
     path('status-reversal-management/', enhanced_super_admin_views.status_reversal_management, name='status_reversal_management'),
     path('system-override-tools/', enhanced_super_admin_views.system_override_tools, name='system_override_tools'),
+    path('gps-anomalies/', enhanced_super_admin_views.gps_anomalies, name='gps_anomalies'),
+    path('query-stats/', enhanced_super_admin_views.query_stats, name='query_stats'),
     path('reverse-attendance-status/', enhanced_super_admin_views.reverse_attendance_status, name='reverse_attendance_status'),
     path('reverse-travel-status/', enhanced_super_admin_views.reverse_travel_status, name='reverse_travel_status'),
+    path('reverse-leave-status/', enhanced_super_admin_views.reverse_leave_status, name='reverse_leave_status'),
     path('bulk-status-operations/', enhanced_super_admin_views.bulk_status_operations, name='bulk_status_operations'),
     path('employee-management/', simple_redirect.employee_management_redirect, name='employee_management'),
     path('create-user/', views.register_view, name='create_user'),
     
     # Bulk Upload URLs
     path('bulk-upload/', bulk_upload_views.bulk_upload_view, name='bulk_upload'),
-    path('bulk-upload/preview/', bulk_upload_views.bulk_upload_preview, name='bulk_upload_preview'),
+    path('bulk-upload/preview/<int:batch_id>/', bulk_upload_views.bulk_upload_preview, name='bulk_upload_preview'),
+    path('bulk-upload/errors/<int:batch_id>/', bulk_upload_views.bulk_upload_errors, name='bulk_upload_errors'),
+    path('bulk-upload/<int:batch_id>/progress/', bulk_upload_views.bulk_upload_progress, name='bulk_upload_progress'),
     path('download-template/', bulk_upload_views.download_template, name='download_template'),
     
     # Test URLs
@@ -106,6 +112,7 @@ urlpatterns = [
     
     # Notification URLs
     path('notifications/', notification_views.get_notifications, name='get_notifications'),
+    path('notifications/stream/', notification_views.notification_stream, name='notification_stream'),
     path('notifications/<int:notification_id>/read/', notification_views.mark_notification_read, name='mark_notification_read'),
     path('notifications/mark-all-read/', notification_views.mark_all_notifications_read, name='mark_all_notifications_read'),
     path('test-notifications/', notification_test_views.test_notification_system, name='test_notifications'),
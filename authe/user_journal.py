@@ -0,0 +1,181 @@
+"""
+User Backup Journal - append-only record of user changes on top of a periodic snapshot
+Each save or delete appends one JSON line, so backup cost follows the change rather than the user count.
+Restore replays the snapshot plus the journal; compaction folds the journal back into the snapshot.
+"""
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = 'users_persistent.json'
+JOURNAL_FILE = 'users_journal.jsonl'
+COMPACTING_FILE = 'users_journal.compacting.jsonl'
+
+def backup_dir():
+    """Directory holding the snapshot and journal (relative to the working directory, as before)"""
+    return Path(getattr(settings, 'USER_BACKUP_DIR', 'persistent_data'))
+
+@contextmanager
+def scratch_backup_dir():
+    """Send snapshot and journal writes to a throwaway directory - for tests, benchmarks and synthetic data"""
+    with tempfile.TemporaryDirectory(prefix='user_backup_') as path, override_settings(USER_BACKUP_DIR=path):
+        yield Path(path)
+
+def snapshot_path():
+    return backup_dir() / SNAPSHOT_FILE
+
+def journal_path():
+    return backup_dir() / JOURNAL_FILE
+
+def serialize_user(user):
+    """Backup record for one user - same fields as the snapshot has always held"""
+    return {
+        'employee_id': user.employee_id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'contact_number': user.contact_number,
+        'role': user.role,
+        'designation': user.designation,
+        'dccb': user.dccb,
+        'reporting_manager': user.reporting_manager,
+        'is_active': user.is_active,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        # Restored users still carry the ISO string they were created from
+        'date_joined': user.date_joined if isinstance(user.date_joined, str) else user.date_joined.isoformat(),
+        'password': user.password
+    }
+
+def journal_lines(changes):
+    """Journal lines for (op, user) pairs - op is 'upsert' or 'delete'"""
+    lines = []
+    now = timezone.now().isoformat()
+    for op, user in changes:
+        entry = {'op': op, 'at': now, 'employee_id': user.employee_id}
+        if op == 'upsert':
+            entry['user'] = serialize_user(user)
+        lines.append(json.dumps(entry) + '\n')
+    return lines
+
+def append_changes(changes):
+    """
+    Append (op, user) pairs to the journal in one write.
+    Returns the journal size so callers can decide when to compact.
+    """
+    return append_lines(journal_lines(changes))
+
+def append_lines(lines):
+    """Write prepared journal lines in one append; returns the journal size"""
+    if not lines:
+        return 0
+    
+    path = journal_path()
+    path.parent.mkdir(exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(''.join(lines))
+        return f.tell()
+
+def record_user_change(user, deleted=False):
+    """
+    Journal one user save/delete once the surrounding transaction commits - a rolled-back save
+    never reaches the journal - and queue a compaction once it grows past USER_JOURNAL_MAX_BYTES.
+    The record is taken now, so it holds the user as saved rather than as later modified in memory.
+    """
+    lines = journal_lines([('delete' if deleted else 'upsert', user)])
+    
+    def write_change():
+        try:
+            size = append_lines(lines)
+        except Exception as e:
+            logger.error(f"User journal write failed: {e}")
+            return
+        if size > getattr(settings, 'USER_JOURNAL_MAX_BYTES', 1024 * 1024):
+            from .task_queue import enqueue
+            enqueue('compact_user_journal', coalesce=True)
+    
+    transaction.on_commit(write_change)
+
+def read_snapshot():
+    """Users from the snapshot, keyed by employee_id"""
+    path = snapshot_path()
+    if not path.exists():
+        return {}
+    with open(path, 'r') as f:
+        return {user_data['employee_id']: user_data for user_data in json.load(f)}
+
+def replay(users, path):
+    """Apply one journal file to a users dict in order; a torn final line is ignored"""
+    if not path.exists():
+        return users
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable journal line in {path}")
+                continue
+            if entry['op'] == 'delete':
+                users.pop(entry['employee_id'], None)
+            else:
+                users[entry['employee_id']] = entry['user']
+    return users
+
+def load_users():
+    """Current backup state - snapshot, then any interrupted compaction, then the live journal"""
+    users = read_snapshot()
+    replay(users, backup_dir() / COMPACTING_FILE)
+    replay(users, journal_path())
+    return users
+
+def write_snapshot(users_data):
+    """Atomically replace the snapshot file"""
+    path = snapshot_path()
+    path.parent.mkdir(exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(users_data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def compact():
+    """
+    Fold the journal into the snapshot.
+    The journal is renamed first so changes recorded meanwhile start a fresh journal.
+    """
+    compacting = backup_dir() / COMPACTING_FILE
+    journal = journal_path()
+    if journal.exists() and not compacting.exists():
+        os.replace(journal, compacting)
+    
+    users = read_snapshot()
+    replay(users, compacting)
+    write_snapshot(list(users.values()))
+    if compacting.exists():
+        compacting.unlink()
+    return len(users)
+
+def rebuild_from_database(users):
+    """
+    Fresh snapshot from a user queryset, superseding the journal.
+    The journal is set aside before the queryset is read so later changes are kept.
+    """
+    compacting = backup_dir() / COMPACTING_FILE
+    journal = journal_path()
+    if journal.exists() and not compacting.exists():
+        os.replace(journal, compacting)
+    
+    users_data = [serialize_user(user) for user in users]
+    write_snapshot(users_data)
+    if compacting.exists():
+        compacting.unlink()
+    return len(users_data)
@@ -4,6 +4,7 @@ from django.http import JsonResponse
 from django.utils import timezone
 from .models import CustomUser
 from .admin_views import admin_required
+from .middleware import get_persistence_stats
 import json
 import os
 
@@ -96,5 +97,6 @@ def user_persistence_api(request):
         'role_distribution': role_counts,
         'designation_distribution': designation_counts,
         'dccb_distribution': dccb_counts,
+        'persistence_checks': get_persistence_stats(),
         'timestamp': timezone.now().isoformat()
     })
\ No newline at end of file
@@ -6,7 +6,9 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from .forms import EnhancedSignUpForm, LoginForm
+from django.utils import timezone
 from .models import CustomUser, AuditLog
+from .task_queue import enqueue
 import re
 import json
 import time
@@ -21,12 +23,14 @@ def get_client_ip(request):
     return ip
 
 def create_audit_log(user, action, request, details=None):
-    """Create audit log entry"""
-    AuditLog.objects.create(
-        user=user,
-        action=action,
-        ip_address=get_client_ip(request),
-        details=details or ''
+    """Queue an audit log entry - written by the background worker once the request commits"""
+    enqueue(
+        'write_audit_log',
+        user.id,
+        action,
+        get_client_ip(request),
+        details or '',
+        occurred_at=timezone.now()
     )
 
 @require_http_methods(["GET"])
@@ -103,8 +107,8 @@ def register_view(request):
             user = form.save()
             
             # Send notification to admins about new user registration
-            from .notification_service import notify_new_user_registration
-            notify_new_user_registration(user)
+            from .notification_service import queue_notification
+            queue_notification('notify_new_user_registration', user)
             
             # Create audit log
             create_audit_log(
@@ -6,7 +6,7 @@ backlog = 2048
 
 # Worker processes
 workers = 3
-worker_class = "sync"
+worker_class = "uvicorn.workers.UvicornWorker"  # ASGI - notification streams do not hold a worker
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -22,7 +22,8 @@ echo "✅ Deployment complete!"
 echo "🌐 Starting production server..."
 
 # Start Gunicorn server
-exec gunicorn Sat_Shine.wsgi:application \
+exec gunicorn Sat_Shine.asgi:application \
+    --worker-class uvicorn.workers.UvicornWorker \
     --bind 0.0.0.0:$PORT \
     --workers 3 \
     --timeout 120 \
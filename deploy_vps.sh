@@ -101,6 +101,13 @@ sudo systemctl daemon-reload
 sudo systemctl enable sat-shine
 sudo systemctl start sat-shine
 
+# Setup background task worker (notifications, audit logs, user backups)
+echo "🔧 Setting up task worker service..."
+sudo cp $PROJECT_DIR/sat-shine-worker.service /etc/systemd/system/
+sudo systemctl daemon-reload
+sudo systemctl enable sat-shine-worker
+sudo systemctl start sat-shine-worker
+
 # Setup Nginx
 echo "🔧 Setting up Nginx..."
 sudo cp $PROJECT_DIR/nginx_sat_shine.conf /etc/nginx/sites-available/$PROJECT_NAME
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 
@@ -52,6 +53,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files for production
+    'authe.middleware.QueryBudgetMiddleware',  # Inactive unless QUERY_BUDGET_ENABLED=true
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,10 +88,12 @@ WSGI_APPLICATION = 'Sat_Shine.wsgi.application'
 # Database - Use PostgreSQL without PostGIS for Railway
 if os.environ.get('DATABASE_URL'):
     import dj_database_url
+    # Requests are served over ASGI (asgi.py), where persistent connections are not reused safely -
+    # keep them off unless DB_CONN_MAX_AGE says otherwise
     DATABASES = {
         'default': dj_database_url.parse(
             os.environ.get('DATABASE_URL'),
-            conn_max_age=600,
+            conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', '0')),
             conn_health_checks=True,
         )
     }
@@ -187,6 +191,101 @@ SESSION_COOKIE_AGE = 900  # 15 minutes
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_SAVE_EVERY_REQUEST = True
 
+# Cache - Redis when REDIS_URL is set, so cache versions (dashboard KPIs, notification recipients and
+# streams) are shared by the web workers and the task worker; otherwise each process has its own memory cache
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+
+# Without a shared cache, user changes only invalidate the saving process's copies - cached user
+# lookups (notification recipients, DCCB -> Associate) are then kept at most this many seconds
+PROCESS_LOCAL_CACHE_TTL = int(os.environ.get('PROCESS_LOCAL_CACHE_TTL', '5'))
+
+# Dashboard KPI cache (seconds) - counters are also invalidated on data changes
+KPI_CACHE_TTL = int(os.environ.get('KPI_CACHE_TTL', '30'))
+
+# Streaming CSV exports - rows per database fetch and rows per flushed chunk
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+EXPORT_FLUSH_ROWS = int(os.environ.get('EXPORT_FLUSH_ROWS', '500'))
+
+# Notification fan-out - cached recipient sets (seconds), also invalidated on user changes
+NOTIFICATION_RECIPIENT_CACHE_TTL = int(os.environ.get('NOTIFICATION_RECIPIENT_CACHE_TTL', '300'))
+
+# DCCB -> Associate lookup cache (seconds), also invalidated on user changes
+ASSOCIATE_DIRECTORY_CACHE_TTL = int(os.environ.get('ASSOCIATE_DIRECTORY_CACHE_TTL', '300'))
+
+# Notification push stream (served via asgi.py) - seconds between cache-version checks, between
+# database re-checks (expiries, changes not seen through the cache) and per-connection lifetime
+NOTIFICATION_STREAM_INTERVAL = int(os.environ.get('NOTIFICATION_STREAM_INTERVAL', '5'))
+NOTIFICATION_STREAM_RESYNC = int(os.environ.get('NOTIFICATION_STREAM_RESYNC', '60'))
+NOTIFICATION_STREAM_TIMEOUT = int(os.environ.get('NOTIFICATION_STREAM_TIMEOUT', '300'))
+
+# Background task queue (manage.py run_tasks) - set TASK_QUEUE_EAGER=true to run tasks in-process when no worker is deployed
+TASK_QUEUE_EAGER = os.environ.get('TASK_QUEUE_EAGER', 'False').lower() == 'true'
+TASK_QUEUE_MAX_ATTEMPTS = int(os.environ.get('TASK_QUEUE_MAX_ATTEMPTS', '5'))
+TASK_QUEUE_RETRY_DELAY = int(os.environ.get('TASK_QUEUE_RETRY_DELAY', '30'))
+TASK_QUEUE_POLL_SECONDS = int(os.environ.get('TASK_QUEUE_POLL_SECONDS', '2'))
+TASK_QUEUE_STALE_SECONDS = int(os.environ.get('TASK_QUEUE_STALE_SECONDS', '600'))
+TASK_QUEUE_KEEP_DAYS = int(os.environ.get('TASK_QUEUE_KEEP_DAYS', '7'))
+
+# User backup journal - compact into the snapshot once the journal passes this size (bytes)
+USER_JOURNAL_MAX_BYTES = int(os.environ.get('USER_JOURNAL_MAX_BYTES', str(1024 * 1024)))
+
+# DataPersistenceMiddleware - seconds each worker trusts its user-integrity and backup-file checks
+PERSISTENCE_CHECK_TTL = int(os.environ.get('PERSISTENCE_CHECK_TTL', '300'))
+
+# Query budgets (QueryBudgetMiddleware) - off by default; queries per request for views not listed
+# in QUERY_BUDGETS (JSON {"url_name": budget} merged over the defaults below), and how often one
+# SQL shape may repeat in a request before it is logged as a likely N+1
+QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED', 'False').lower() == 'true'
+QUERY_BUDGET_DEFAULT = int(os.environ.get('QUERY_BUDGET_DEFAULT', '50'))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', '10'))
+QUERY_BUDGETS = {
+    'admin_attendance_daily': 30,
+    'admin_dc_confirmation': 30,
+    'admin_admin_approval': 30,
+    'export_attendance_daily': 30,
+    'field_dashboard': 25,
+    **json.loads(os.environ.get('QUERY_BUDGETS', '{}')),
+}
+
+# Benchmarks (manage.py run_benchmarks) - percent growth in time, queries or memory that fails the run
+BENCHMARK_REGRESSION_THRESHOLD = int(os.environ.get('BENCHMARK_REGRESSION_THRESHOLD', '25'))
+
+# Bulk employee upload - users per INSERT and password-hashing processes (0 = CPU count)
+BULK_UPLOAD_CHUNK_SIZE = int(os.environ.get('BULK_UPLOAD_CHUNK_SIZE', '500'))
+BULK_UPLOAD_HASH_WORKERS = int(os.environ.get('BULK_UPLOAD_HASH_WORKERS', '0'))
+# Hours an unfinished upload (and the staged rows of a finished one) is kept before it is purged
+BULK_UPLOAD_BATCH_TTL_HOURS = int(os.environ.get('BULK_UPLOAD_BATCH_TTL_HOURS', '24'))
+
+# Attendance map API - clustered below this zoom, point cap before falling back to clusters,
+# cluster cell size in screen pixels and the longest date range (days)
+GEO_CLUSTER_MAX_ZOOM = int(os.environ.get('GEO_CLUSTER_MAX_ZOOM', '14'))
+GEO_MAX_POINTS = int(os.environ.get('GEO_MAX_POINTS', '5000'))
+GEO_CLUSTER_CELL_PX = int(os.environ.get('GEO_CLUSTER_CELL_PX', '60'))
+GEO_MAX_RANGE_DAYS = int(os.environ.get('GEO_MAX_RANGE_DAYS', '31'))
+# Most geohash prefixes a bbox/radius lookup may OR together before falling back to a coarser precision
+GEO_INDEX_MAX_CELLS = int(os.environ.get('GEO_INDEX_MAX_CELLS', '16'))
+
+# GPS anomaly job - decimal places for "identical" coordinates, fastest plausible travel (km/h)
+# and the shortest jump it applies to (m), and the worst acceptable location accuracy (m)
+GPS_SHARED_DECIMALS = int(os.environ.get('GPS_SHARED_DECIMALS', '5'))
+GPS_MAX_SPEED_KMH = int(os.environ.get('GPS_MAX_SPEED_KMH', '200'))
+GPS_MIN_JUMP_M = int(os.environ.get('GPS_MIN_JUMP_M', '1000'))
+GPS_MAX_ACCURACY_M = int(os.environ.get('GPS_MAX_ACCURACY_M', '200'))
+
+# Geofence - DCCB office locations as JSON {"DCCB": [latitude, longitude, radius_m]} (radius optional)
+# and the radius used when an office has none; DCCBs without an office are not geofenced
+DCCB_OFFICE_LOCATIONS = json.loads(os.environ.get('DCCB_OFFICE_LOCATIONS', '{}'))
+GEOFENCE_DEFAULT_RADIUS = int(os.environ.get('GEOFENCE_DEFAULT_RADIUS', '200'))
+
+# Approved leave - skip Sundays and holidays when marking leave days in attendance
+LEAVE_SKIP_NON_WORKING_DAYS = os.environ.get('LEAVE_SKIP_NON_WORKING_DAYS', 'False').lower() == 'true'
+
 # Login URLs
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
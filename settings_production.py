@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'authe.middleware.QueryBudgetMiddleware',  # Inactive unless QUERY_BUDGET_ENABLED=true
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -99,6 +101,53 @@ SESSION_COOKIE_AGE = 900
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_SAVE_EVERY_REQUEST = True
 
+# Cache - Redis when REDIS_URL is set, shared by the web workers and the task worker
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+
+# Without a shared cache, user changes only invalidate the saving process's copies - cached user
+# lookups (notification recipients, DCCB -> Associate) are then kept at most this many seconds
+PROCESS_LOCAL_CACHE_TTL = int(os.environ.get('PROCESS_LOCAL_CACHE_TTL', '5'))
+
+# Notification push stream - seconds between cache-version checks, between database re-checks and per-connection lifetime
+NOTIFICATION_STREAM_INTERVAL = int(os.environ.get('NOTIFICATION_STREAM_INTERVAL', '5'))
+NOTIFICATION_STREAM_RESYNC = int(os.environ.get('NOTIFICATION_STREAM_RESYNC', '60'))
+NOTIFICATION_STREAM_TIMEOUT = int(os.environ.get('NOTIFICATION_STREAM_TIMEOUT', '300'))
+
+# Background task queue (manage.py run_tasks) - the worker must run with this settings module so it
+# reads the same database; set TASK_QUEUE_EAGER=true to run tasks in-process when no worker is deployed
+TASK_QUEUE_EAGER = os.environ.get('TASK_QUEUE_EAGER', 'False').lower() == 'true'
+TASK_QUEUE_MAX_ATTEMPTS = int(os.environ.get('TASK_QUEUE_MAX_ATTEMPTS', '5'))
+TASK_QUEUE_RETRY_DELAY = int(os.environ.get('TASK_QUEUE_RETRY_DELAY', '30'))
+TASK_QUEUE_POLL_SECONDS = int(os.environ.get('TASK_QUEUE_POLL_SECONDS', '2'))
+TASK_QUEUE_STALE_SECONDS = int(os.environ.get('TASK_QUEUE_STALE_SECONDS', '600'))
+TASK_QUEUE_KEEP_DAYS = int(os.environ.get('TASK_QUEUE_KEEP_DAYS', '7'))
+
+# Geofence - DCCB office locations as JSON {"DCCB": [latitude, longitude, radius_m]} (radius optional)
+# and the radius used when an office has none; DCCBs without an office are not geofenced
+DCCB_OFFICE_LOCATIONS = json.loads(os.environ.get('DCCB_OFFICE_LOCATIONS', '{}'))
+GEOFENCE_DEFAULT_RADIUS = int(os.environ.get('GEOFENCE_DEFAULT_RADIUS', '200'))
+
+# Query budgets (QueryBudgetMiddleware) - off by default; queries per request for views not listed
+# in QUERY_BUDGETS (JSON {"url_name": budget} merged over the defaults below), and how often one
+# SQL shape may repeat in a request before it is logged as a likely N+1
+QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED', 'False').lower() == 'true'
+QUERY_BUDGET_DEFAULT = int(os.environ.get('QUERY_BUDGET_DEFAULT', '50'))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', '10'))
+QUERY_BUDGETS = {
+    'admin_attendance_daily': 30,
+    'admin_dc_confirmation': 30,
+    'admin_admin_approval': 30,
+    'export_attendance_daily': 30,
+    'field_dashboard': 25,
+    **json.loads(os.environ.get('QUERY_BUDGETS', '{}')),
+}
+
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/auth/login/'
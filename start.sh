@@ -13,4 +13,4 @@ python manage.py collectstatic --noinput
 
 # Start the server
 echo "Starting server..."
-gunicorn Sat_Shine.wsgi:application --bind 0.0.0.0:$PORT
\ No newline at end of file
+gunicorn Sat_Shine.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
\ No newline at end of file